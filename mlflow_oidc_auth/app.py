@@ -32,6 +32,8 @@ app.add_url_rule(rule=routes.UI_ROOT, methods=["GET"], view_func=views.oidc_ui)
 
 # User token
 app.add_url_rule(rule=routes.CREATE_ACCESS_TOKEN, methods=["PATCH"], view_func=views.create_user_access_token)
+app.add_url_rule(rule=routes.ACCESS_TOKENS, methods=["GET"], view_func=views.list_user_access_tokens)
+app.add_url_rule(rule=routes.ACCESS_TOKENS, methods=["DELETE"], view_func=views.delete_user_access_token)
 app.add_url_rule(rule=routes.GET_CURRENT_USER, methods=["GET"], view_func=views.get_current_user)
 
 # User management
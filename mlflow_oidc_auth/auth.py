@@ -1,17 +1,23 @@
+import hashlib
+import time
 from typing import Optional
 
-import requests
 from authlib.integrations.flask_client import OAuth
 from authlib.jose import jwt
 from authlib.jose.errors import BadSignatureError
 from flask import request
 from mlflow.server import app
 
+from mlflow_oidc_auth.auth_context import set_token_claims
 from mlflow_oidc_auth.config import config
+from mlflow_oidc_auth.jwks import JwksFetcher, JwksKeyRegistry
+from mlflow_oidc_auth.local_cache import LocalCache
 from mlflow_oidc_auth.store import store
 from mlflow_oidc_auth.user import create_user, populate_groups, update_user
 
 _oauth_instance: Optional[OAuth] = None
+# validated bearer token claims keyed by the SHA-256 of the token, never by the token itself
+_token_claims_cache = LocalCache(maxsize=config.OIDC_TOKEN_CACHE_SIZE)
 
 
 def get_oauth_instance(app) -> OAuth:
@@ -31,37 +37,80 @@ def get_oauth_instance(app) -> OAuth:
     return _oauth_instance
 
 
+def _key_ids(jwks: dict) -> frozenset:
+    return frozenset(key.get("kid") for key in jwks.get("keys", []))
+
+
 def _get_oidc_jwks(clear_cache: bool = False):
     from mlflow_oidc_auth.app import cache
 
-    if clear_cache:
-        app.logger.debug("Clearing JWKS cache")
-        cache.delete("jwks")
-    jwks = cache.get("jwks")
-    if jwks:
-        app.logger.debug("JWKS cache hit")
-        return jwks
-    app.logger.debug("JWKS cache miss")
+    if not clear_cache:
+        jwks = cache.get("jwks")
+        if jwks:
+            app.logger.debug("JWKS cache hit")
+            return jwks
+        app.logger.debug("JWKS cache miss")
     if config.OIDC_DISCOVERY_URL is None:
         raise ValueError("OIDC_DISCOVERY_URL is not set in the configuration")
-    metadata = requests.get(config.OIDC_DISCOVERY_URL).json()
-    jwks_uri = metadata.get("jwks_uri")
-    jwks = requests.get(jwks_uri).json()
+    jwks = jwks_fetcher.fetch_jwks(config.OIDC_DISCOVERY_URL)
+    # replaced in place: other workers keep reading the previous key set until the new one is stored
     cache.set("jwks", jwks, timeout=3600)
+    if _key_ids(jwks) != _jwks_registry.key_ids:
+        app.logger.debug("JWKS key IDs changed, clearing validated token claims")
+        # claims verified with a key that is no longer published must be verified again
+        _token_claims_cache.clear()
     return jwks
 
 
+jwks_fetcher = JwksFetcher(
+    timeout=(config.OIDC_HTTP_CONNECT_TIMEOUT, config.OIDC_HTTP_READ_TIMEOUT),
+    retries=config.OIDC_HTTP_RETRIES,
+    discovery_ttl=config.OIDC_DISCOVERY_CACHE_TTL,
+)
+# parsed signing keys, seeded from the shared JWKS cache and refreshed from the IdP
+_jwks_registry = JwksKeyRegistry(lambda force: _get_oidc_jwks(clear_cache=force), ttl=3600)
+
+
+def _token_cache_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _cache_token_claims(key: str, payload) -> None:
+    """
+    Remember validated claims until the token expires, capped by OIDC_TOKEN_CACHE_MAX_TTL.
+    Tokens without a numeric ``exp`` claim are never cached.
+    """
+    exp = payload.get("exp")
+    if isinstance(exp, bool) or not isinstance(exp, (int, float)):
+        return
+    ttl = min(exp - time.time(), config.OIDC_TOKEN_CACHE_MAX_TTL)
+    if ttl > 0:
+        _token_claims_cache.set(key, payload, ttl=ttl)
+
+
 def validate_token(token):
+    key = _token_cache_key(token)
+    payload = _token_claims_cache.get(key)
+    if payload is not None:
+        return payload
+    payload = _decode_and_validate_token(token)
+    _cache_token_claims(key, payload)
+    return payload
+
+
+def _decode_and_validate_token(token):
     try:
-        jwks = _get_oidc_jwks()
-        payload = jwt.decode(token, jwks)
+        payload = jwt.decode(token, _jwks_registry.find_key)
         payload.validate()
         return payload
     except BadSignatureError as e:
         app.logger.warning("Token validation failed. Attempting JWKS refresh. Error: %s", str(e))
-        jwks = _get_oidc_jwks(clear_cache=True)
+        # forged tokens must not make every request fetch the key set from the identity provider
+        if not _jwks_registry.refresh_if_allowed():
+            app.logger.error("JWKS was refreshed recently, not refreshing it again. Error: %s", str(e))
+            raise
         try:
-            payload = jwt.decode(token, jwks)
+            payload = jwt.decode(token, _jwks_registry.find_key)
             payload.validate()
             return payload
         except BadSignatureError as e:
@@ -91,6 +140,7 @@ def authenticate_request_bearer_token() -> bool:
         token = request.authorization.token
         try:
             user = validate_token(token)
+            set_token_claims(user)
             app.logger.debug("User %s authenticated", user.get("email"))
             return True
         except Exception as e:
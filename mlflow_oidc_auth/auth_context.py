@@ -0,0 +1,46 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from flask import g, has_request_context
+
+_AUTH_CONTEXT_ATTR = "mlflow_oidc_auth_context"
+_TOKEN_CLAIMS_ATTR = "mlflow_oidc_auth_token_claims"
+
+
+@dataclass
+class AuthContext:
+    """
+    Identity of the caller, resolved once per request by the before request hook.
+
+    ``groups`` and ``group_ids`` are loaded lazily the first time a permission
+    check needs them and are then reused for the rest of the request.
+    """
+
+    username: str
+    is_admin: bool = False
+    user_id: Optional[int] = None
+    claims: Optional[Dict[str, Any]] = None
+    groups: Optional[List[str]] = None
+    group_ids: Optional[List[int]] = None
+
+
+def get_auth_context() -> Optional[AuthContext]:
+    if not has_request_context():
+        return None
+    return g.get(_AUTH_CONTEXT_ATTR)
+
+
+def set_auth_context(context: Optional[AuthContext]) -> None:
+    setattr(g, _AUTH_CONTEXT_ATTR, context)
+
+
+def get_token_claims() -> Optional[Dict[str, Any]]:
+    """Claims of the bearer token validated for the current request, if any."""
+    if not has_request_context():
+        return None
+    return g.get(_TOKEN_CLAIMS_ATTR)
+
+
+def set_token_claims(claims: Optional[Dict[str, Any]]) -> None:
+    if has_request_context():
+        setattr(g, _TOKEN_CLAIMS_ATTR, claims)
@@ -1,3 +1,5 @@
+import hashlib
+import hmac
 import importlib
 import os
 import secrets
@@ -32,8 +34,35 @@ class AppConfig:
         self.OIDC_CLIENT_SECRET = os.environ.get("OIDC_CLIENT_SECRET", None)
         self.AUTOMATIC_LOGIN_REDIRECT = get_bool_env_variable("AUTOMATIC_LOGIN_REDIRECT", False)
         self.OIDC_ALEMBIC_VERSION_TABLE = os.environ.get("OIDC_ALEMBIC_VERSION_TABLE", "alembic_version")
+        self.OIDC_API_KEY_DIGEST_SECRET = os.environ.get("OIDC_API_KEY_DIGEST_SECRET") or self._api_key_digest_secret()
         self.PERMISSION_SOURCE_ORDER = [source.strip() for source in os.environ.get("PERMISSION_SOURCE_ORDER", "user,group,regex,group-regex").split(",")]
 
+        # in-process caches
+        self.OIDC_TOKEN_CACHE_SIZE = int(os.environ.get("OIDC_TOKEN_CACHE_SIZE", 1024))
+        self.OIDC_TOKEN_CACHE_MAX_TTL = int(os.environ.get("OIDC_TOKEN_CACHE_MAX_TTL", 300))
+        self.OIDC_CREDENTIAL_CACHE_SIZE = int(os.environ.get("OIDC_CREDENTIAL_CACHE_SIZE", 1024))
+        self.OIDC_CREDENTIAL_CACHE_TTL = int(os.environ.get("OIDC_CREDENTIAL_CACHE_TTL", 60))
+        self.OIDC_REGEX_CACHE_SIZE = int(os.environ.get("OIDC_REGEX_CACHE_SIZE", 4096))
+        self.OIDC_REGEX_CACHE_TTL = int(os.environ.get("OIDC_REGEX_CACHE_TTL", 300))
+        self.OIDC_EXPERIMENT_NAME_CACHE_SIZE = int(os.environ.get("OIDC_EXPERIMENT_NAME_CACHE_SIZE", 10000))
+        self.OIDC_EXPERIMENT_NAME_CACHE_TTL = int(os.environ.get("OIDC_EXPERIMENT_NAME_CACHE_TTL", 300))
+        self.OIDC_RUN_EXPERIMENT_CACHE_SIZE = int(os.environ.get("OIDC_RUN_EXPERIMENT_CACHE_SIZE", 100000))
+        self.OIDC_RUN_EXPERIMENT_CACHE_SHARED = get_bool_env_variable("OIDC_RUN_EXPERIMENT_CACHE_SHARED", False)
+        self.OIDC_PERMISSION_CACHE_SIZE = int(os.environ.get("OIDC_PERMISSION_CACHE_SIZE", 10000))
+        self.OIDC_PERMISSION_CACHE_TTL = int(os.environ.get("OIDC_PERMISSION_CACHE_TTL", 30))
+        self.OIDC_PERMISSION_CACHE_SHARED = get_bool_env_variable("OIDC_PERMISSION_CACHE_SHARED", False)
+        self.OIDC_RUN_WRITE_LEASE_SIZE = int(os.environ.get("OIDC_RUN_WRITE_LEASE_SIZE", 10000))
+        self.OIDC_RUN_WRITE_LEASE_TTL = int(os.environ.get("OIDC_RUN_WRITE_LEASE_TTL", 10))
+        self.OIDC_PERMISSION_POLL_INTERVAL_MS = int(os.environ.get("OIDC_PERMISSION_POLL_INTERVAL_MS", 1000))
+        self.OIDC_MATERIALIZED_PERMISSIONS = get_bool_env_variable("OIDC_MATERIALIZED_PERMISSIONS", False)
+        self.OIDC_PERMISSION_SNAPSHOT_PATH = os.environ.get("OIDC_PERMISSION_SNAPSHOT_PATH")
+        self.OIDC_DISCOVERY_CACHE_TTL = int(os.environ.get("OIDC_DISCOVERY_CACHE_TTL", 86400))
+
+        # identity provider HTTP client
+        self.OIDC_HTTP_CONNECT_TIMEOUT = float(os.environ.get("OIDC_HTTP_CONNECT_TIMEOUT", 5))
+        self.OIDC_HTTP_READ_TIMEOUT = float(os.environ.get("OIDC_HTTP_READ_TIMEOUT", 10))
+        self.OIDC_HTTP_RETRIES = int(os.environ.get("OIDC_HTTP_RETRIES", 3))
+
         # session
         self.SESSION_TYPE = os.environ.get("SESSION_TYPE", "cachelib")
         self.SESSION_PERMANENT = get_bool_env_variable("SESSION_PERMANENT", False)
@@ -60,5 +89,17 @@ class AppConfig:
             except ImportError:
                 app.logger.error(f"Cache module for {self.CACHE_TYPE} could not be imported.")
 
+    @staticmethod
+    def _api_key_digest_secret():
+        # the generated SECRET_KEY differs per process, so only a configured one can key the digests
+        secret_key = os.environ.get("SECRET_KEY")
+        if secret_key:
+            return hmac.new(secret_key.encode("utf-8"), b"api-key-digest", hashlib.sha256).hexdigest()
+        app.logger.warning(
+            "Neither OIDC_API_KEY_DIGEST_SECRET nor SECRET_KEY is set; access token digests are keyed with a public default, "
+            "so a copy of the database is enough to check candidate tokens against them."
+        )
+        return "mlflow-oidc-auth"
+
 
 config = AppConfig()
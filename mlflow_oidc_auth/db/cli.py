@@ -16,3 +16,23 @@ def upgrade(url: str, revision: str) -> None:
     engine = sqlalchemy.create_engine(url)
     utils.migrate(engine, revision)
     engine.dispose()
+
+
+@commands.command(name="rebuild-effective-permissions")
+@click.option("--url", required=True, help="URL of the auth database.")
+@click.option("--backend-store-uri", required=True, help="URI of the MLflow tracking store.")
+@click.option("--registry-store-uri", default=None, help="URI of the MLflow model registry, defaults to the tracking store.")
+def rebuild_effective_permissions(url: str, backend_store_uri: str, registry_store_uri: str) -> None:
+    from mlflow.server.handlers import _get_model_registry_store, _get_tracking_store
+
+    from mlflow_oidc_auth.store import store
+    from mlflow_oidc_auth.utils import rebuild_materialized_permissions
+
+    store.init_db(url)
+    _get_tracking_store(backend_store_uri)
+    _get_model_registry_store(registry_store_uri or backend_store_uri)
+    click.echo(f"Materialized {rebuild_materialized_permissions()} effective permissions")
+
+
+if __name__ == "__main__":
+    commands()
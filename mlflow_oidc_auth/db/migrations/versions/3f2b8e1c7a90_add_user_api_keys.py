@@ -0,0 +1,36 @@
+"""add user api keys
+
+Revision ID: 3f2b8e1c7a90
+Revises: 0565cf04c12e
+Create Date: 2025-06-02 10:12:45.118302
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3f2b8e1c7a90"
+down_revision = "0565cf04c12e"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_api_keys",
+        sa.Column("id", sa.Integer(), nullable=False, primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("key_id", sa.String(length=32), nullable=False),
+        sa.Column("key_digest", sa.String(length=64), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("user_id", "name", name="unique_user_api_key_name"),
+    )
+    op.create_index("ix_user_api_keys_key_id", "user_api_keys", ["key_id"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_api_keys_key_id", table_name="user_api_keys")
+    op.drop_table("user_api_keys")
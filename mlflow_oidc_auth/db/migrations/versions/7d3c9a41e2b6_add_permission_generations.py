@@ -0,0 +1,31 @@
+"""add permission generations
+
+Revision ID: 7d3c9a41e2b6
+Revises: 3f2b8e1c7a90
+Create Date: 2025-06-16 09:27:51.604417
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7d3c9a41e2b6"
+down_revision = "3f2b8e1c7a90"
+branch_labels = None
+depends_on = None
+
+SCOPES = ["user", "group", "experiment", "registered_model", "prompt"]
+
+
+def upgrade() -> None:
+    permission_generations = op.create_table(
+        "permission_generations",
+        sa.Column("scope", sa.String(length=64), nullable=False, primary_key=True),
+        sa.Column("generation", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.bulk_insert(permission_generations, [{"scope": scope, "generation": 0} for scope in SCOPES])
+
+
+def downgrade() -> None:
+    op.drop_table("permission_generations")
@@ -0,0 +1,35 @@
+"""add effective permissions
+
+Revision ID: b52e0f6d9a13
+Revises: 7d3c9a41e2b6
+Create Date: 2025-06-23 14:05:12.730915
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b52e0f6d9a13"
+down_revision = "7d3c9a41e2b6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "effective_permissions",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("resource_type", sa.String(length=32), nullable=False),
+        sa.Column("resource_key", sa.String(length=255), nullable=False),
+        sa.Column("permission", sa.String(length=255), nullable=False),
+        sa.Column("source", sa.String(length=32), nullable=False),
+        sa.Column("config", sa.String(length=16), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "resource_type", "resource_key", "config"),
+    )
+    op.create_index("ix_effective_permissions_resource", "effective_permissions", ["resource_type", "resource_key"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_effective_permissions_resource", table_name="effective_permissions")
+    op.drop_table("effective_permissions")
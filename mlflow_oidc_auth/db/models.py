@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy import Boolean, ForeignKey, Index, Integer, String, UniqueConstraint
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 from mlflow_oidc_auth.entities import (
@@ -12,6 +12,7 @@ from mlflow_oidc_auth.entities import (
     RegisteredModelPermission,
     RegisteredModelRegexPermission,
     User,
+    UserApiKey,
     UserGroup,
 )
 
@@ -36,6 +37,7 @@ class SqlUser(Base):
         secondary="user_groups",
         back_populates="users",
     )
+    api_keys: Mapped[list["SqlUserApiKey"]] = relationship("SqlUserApiKey", cascade="all, delete-orphan")
 
     def to_mlflow_entity(self):
         return User(
@@ -52,6 +54,28 @@ class SqlUser(Base):
         )
 
 
+class SqlUserApiKey(Base):
+    __tablename__ = "user_api_keys"
+    id: Mapped[int] = mapped_column(Integer(), primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    key_id: Mapped[str] = mapped_column(String(32), nullable=False, unique=True, index=True)
+    key_digest: Mapped[str] = mapped_column(String(64), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(nullable=True)
+    __table_args__ = (UniqueConstraint("user_id", "name", name="unique_user_api_key_name"),)
+
+    def to_mlflow_entity(self):
+        return UserApiKey(
+            id_=self.id,
+            user_id=self.user_id,
+            name=self.name,
+            key_id=self.key_id,
+            created_at=self.created_at,
+            expires_at=self.expires_at,
+        )
+
+
 class SqlExperimentPermission(Base):
     __tablename__ = "experiment_permissions"
     id: Mapped[int] = mapped_column(Integer(), primary_key=True)
@@ -226,3 +250,21 @@ class SqlRegisteredModelGroupRegexPermission(Base):
             permission=self.permission,
             prompt=bool(self.prompt),
         )
+
+
+class SqlPermissionGeneration(Base):
+    __tablename__ = "permission_generations"
+    scope: Mapped[str] = mapped_column(String(64), primary_key=True)
+    generation: Mapped[int] = mapped_column(Integer(), nullable=False, default=0)
+
+
+class SqlEffectivePermission(Base):
+    __tablename__ = "effective_permissions"
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    resource_type: Mapped[str] = mapped_column(String(32), primary_key=True)
+    resource_key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    permission: Mapped[str] = mapped_column(String(255), nullable=False)
+    source: Mapped[str] = mapped_column(String(32), nullable=False)
+    # fingerprint of the configuration the permission was resolved under; workers with different configurations keep their own rows
+    config: Mapped[str] = mapped_column(String(16), primary_key=True)
+    __table_args__ = (Index("ix_effective_permissions_resource", "resource_type", "resource_key"),)
@@ -118,6 +118,124 @@ class User:
         )
 
 
+class UserIdentity:
+    def __init__(
+        self,
+        id_,
+        username,
+        is_admin,
+        is_service_account,
+        password_expiration=None,
+    ):
+        self._id = id_
+        self._username = username
+        self._is_admin = is_admin
+        self._is_service_account = is_service_account
+        self._password_expiration = password_expiration
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def username(self):
+        return self._username
+
+    @property
+    def is_admin(self):
+        return self._is_admin
+
+    @property
+    def is_service_account(self):
+        return self._is_service_account
+
+    @property
+    def password_expiration(self):
+        return self._password_expiration
+
+    def to_json(self):
+        return {
+            "id": self.id,
+            "username": self.username,
+            "is_admin": self.is_admin,
+            "is_service_account": self.is_service_account,
+            "password_expiration": self.password_expiration,
+        }
+
+    @classmethod
+    def from_json(cls, dictionary):
+        return cls(
+            id_=dictionary["id"],
+            username=dictionary["username"],
+            is_admin=dictionary["is_admin"],
+            is_service_account=dictionary.get("is_service_account", False),
+            password_expiration=dictionary.get("password_expiration"),
+        )
+
+
+class UserApiKey:
+    def __init__(
+        self,
+        id_,
+        user_id,
+        name,
+        key_id,
+        created_at=None,
+        expires_at=None,
+    ):
+        self._id = id_
+        self._user_id = user_id
+        self._name = name
+        self._key_id = key_id
+        self._created_at = created_at
+        self._expires_at = expires_at
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def user_id(self):
+        return self._user_id
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def key_id(self):
+        return self._key_id
+
+    @property
+    def created_at(self):
+        return self._created_at
+
+    @property
+    def expires_at(self):
+        return self._expires_at
+
+    def to_json(self):
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "name": self.name,
+            "key_id": self.key_id,
+            "created_at": self.created_at,
+            "expires_at": self.expires_at,
+        }
+
+    @classmethod
+    def from_json(cls, dictionary):
+        return cls(
+            id_=dictionary["id"],
+            user_id=dictionary["user_id"],
+            name=dictionary["name"],
+            key_id=dictionary["key_id"],
+            created_at=dictionary.get("created_at"),
+            expires_at=dictionary.get("expires_at"),
+        )
+
+
 class ExperimentPermission:
     def __init__(
         self,
@@ -1,39 +1,37 @@
 from flask import Response, request
-from mlflow.entities import Experiment
-from mlflow.entities.model_registry import RegisteredModel
-from mlflow.protos.model_registry_pb2 import CreateRegisteredModel, DeleteRegisteredModel, SearchRegisteredModels
-from mlflow.protos.service_pb2 import CreateExperiment, SearchExperiments
-from mlflow.server.handlers import (
-    _get_model_registry_store,
-    _get_request_message,
-    _get_tracking_store,
-    catch_mlflow_exception,
-    get_endpoints,
-)
-from mlflow.store.entities.paged_list import PagedList
-from mlflow.utils.proto_json_utils import message_to_json, parse_dict
-from mlflow.utils.search_utils import SearchUtils
+from mlflow.protos.model_registry_pb2 import CreateRegisteredModel, DeleteRegisteredModel, ModelRegistryService, RenameRegisteredModel
+from mlflow.protos.service_pb2 import CreateExperiment, DeleteExperiment, MlflowService, RestoreExperiment, UpdateExperiment
+from mlflow.server.handlers import catch_mlflow_exception, get_service_endpoints
+from mlflow.utils.proto_json_utils import parse_dict
 
 from mlflow_oidc_auth.config import config
+from mlflow_oidc_auth.hooks.before_request import _get_route
+from mlflow_oidc_auth.permission_cache import permission_decision_cache
 from mlflow_oidc_auth.permissions import MANAGE
+from mlflow_oidc_auth.repository.permission_generation import EXPERIMENT
 from mlflow_oidc_auth.store import store
+from mlflow_oidc_auth.tracking_cache import experiment_name_cache
 from mlflow_oidc_auth.utils import (
-    can_read_experiment,
-    can_read_registered_model,
-    get_is_admin,
+    get_experiment_id,
     get_username,
     get_model_name,
-    fetch_registered_models_paginated,
-    fetch_readable_registered_models,
-    fetch_readable_experiments,
+    get_request_param,
     get_user_groups,
 )
 
 
+def _forget_materialized_experiment_permissions(experiment_id: str):
+    """Regex permissions match experiment names, which materialized permissions of an experiment ID may predate."""
+    if config.OIDC_MATERIALIZED_PERMISSIONS:
+        store.forget_materialized_permissions("experiment", [experiment_id])
+
+
 def _set_initial_experiment_permission(resp: Response):
     response_message = CreateExperiment.Response()
     parse_dict(resp.json, response_message)
     experiment_id = response_message.experiment_id
+    experiment_name_cache.invalidate(experiment_name=get_request_param("name"))
+    _forget_materialized_experiment_permissions(experiment_id)
     username = get_username()
     store.create_experiment_permission(experiment_id, username, MANAGE.name)
     user_groups = get_user_groups(username)
@@ -57,6 +55,25 @@ def _set_initial_registered_model_permission(resp: Response):
 # TODO: Should a _delete_experiment_permission be added?
 
 
+def _invalidate_experiment_name(resp: Response):
+    """Drop the cached name of a renamed, deleted or restored experiment, and the decisions regex permissions took on it."""
+    experiment_id = get_experiment_id()
+    experiment_name_cache.invalidate(experiment_id=experiment_id)
+    # other workers drop their cached names and decisions when they see the experiment generation change
+    store.bump_permission_generations({EXPERIMENT})
+    _forget_materialized_experiment_permissions(experiment_id)
+
+
+def _invalidate_permission_decisions(resp: Response):
+    """Regex permissions of a renamed registered model may differ under its new name."""
+    permission_decision_cache.invalidate()
+    if config.OIDC_MATERIALIZED_PERMISSIONS:
+        # prompts are registered models as well
+        names = [get_request_param("name"), get_request_param("new_name")]
+        store.forget_materialized_permissions("registered_model", names)
+        store.forget_materialized_permissions("prompt", names)
+
+
 def _delete_registered_model_permission(resp: Response):
     """
     Delete registered model permission when the model is deleted.
@@ -75,81 +92,24 @@ def _get_after_request_handler(request_class):
     return AFTER_REQUEST_PATH_HANDLERS.get(request_class)
 
 
-def _filter_search_experiments(resp: Response):
-    if get_is_admin():
-        return
-
-    response_message = SearchExperiments.Response()  # type: ignore
-    parse_dict(resp.json, response_message)
-    request_message = _get_request_message(SearchExperiments())
-
-    # Get current user
-    username = get_username()
-
-    # Get all readable experiments with the original filter and order
-    readable_experiments = fetch_readable_experiments(
-        view_type=request_message.view_type, order_by=request_message.order_by, filter_string=request_message.filter, username=username
-    )
-
-    # Convert to proto format and apply max_results limit
-    readable_experiments_proto = [experiment.to_proto() for experiment in readable_experiments[: request_message.max_results]]
-
-    # Update response with filtered experiments
-    response_message.ClearField("experiments")
-    response_message.experiments.extend(readable_experiments_proto)
-
-    # Handle pagination token
-    if len(readable_experiments) > request_message.max_results:
-        # Set next page token if there are more results
-        response_message.next_page_token = SearchUtils.create_page_token(request_message.max_results)
-    else:
-        # Clear next page token if all results fit
-        response_message.next_page_token = ""
-
-    resp.data = message_to_json(response_message)
-
-
-def _filter_search_registered_models(resp: Response):
-    if get_is_admin():
-        return
-
-    response_message = SearchRegisteredModels.Response()  # type: ignore
-    parse_dict(resp.json, response_message)
-    request_message = _get_request_message(SearchRegisteredModels())
-
-    # Get current user
-    username = get_username()
-
-    # Get all readable models with the original filter and order
-    readable_models = fetch_readable_registered_models(filter_string=request_message.filter, order_by=request_message.order_by, username=username)
-
-    # Convert to proto format and apply max_results limit
-    readable_models_proto = [model.to_proto() for model in readable_models[: request_message.max_results]]
-
-    # Update response with filtered models
-    response_message.ClearField("registered_models")
-    response_message.registered_models.extend(readable_models_proto)
-
-    # Handle pagination token
-    if len(readable_models) > request_message.max_results:
-        # Set next page token if there are more results
-        response_message.next_page_token = SearchUtils.create_page_token(request_message.max_results)
-    else:
-        # Clear next page token if all results fit
-        response_message.next_page_token = ""
-
-    resp.data = message_to_json(response_message)
-
-
 AFTER_REQUEST_PATH_HANDLERS = {
     CreateExperiment: _set_initial_experiment_permission,
     CreateRegisteredModel: _set_initial_registered_model_permission,
+    DeleteExperiment: _invalidate_experiment_name,
+    RestoreExperiment: _invalidate_experiment_name,
+    UpdateExperiment: _invalidate_experiment_name,
     DeleteRegisteredModel: _delete_registered_model_permission,
-    SearchExperiments: _filter_search_experiments,
-    SearchRegisteredModels: _filter_search_registered_models,
+    RenameRegisteredModel: _invalidate_permission_decisions,
 }
 
-AFTER_REQUEST_HANDLERS = {(http_path, method): handler for http_path, handler, methods in get_endpoints(_get_after_request_handler) for method in methods}
+# keyed on URL rules and looked up by the rule a request matched, like the before request validators
+AFTER_REQUEST_HANDLERS = {
+    (http_path, method): handler
+    for service in (MlflowService, ModelRegistryService)
+    for http_path, handler, methods in get_service_endpoints(service, _get_after_request_handler)
+    if handler
+    for method in methods
+}
 
 
 @catch_mlflow_exception
@@ -157,6 +117,6 @@ def after_request_hook(resp: Response):
     if 400 <= resp.status_code < 600:
         return resp
 
-    if handler := AFTER_REQUEST_HANDLERS.get((request.path, request.method)):
+    if handler := AFTER_REQUEST_HANDLERS.get((_get_route(), request.method)):
         handler(resp)
     return resp
@@ -1,6 +1,7 @@
+from functools import lru_cache
 from typing import Any, Callable, Dict, Optional
 
-from flask import redirect, render_template, request, session, url_for
+from flask import Response, redirect, render_template, request, session, url_for
 from mlflow.protos.model_registry_pb2 import (
     CreateModelVersion,
     CreateRegisteredModel,
@@ -15,6 +16,8 @@ from mlflow.protos.model_registry_pb2 import (
     GetModelVersionDownloadUri,
     GetRegisteredModel,
     RenameRegisteredModel,
+    ModelRegistryService,
+    SearchModelVersions,
     SearchRegisteredModels,
     SetModelVersionTag,
     SetRegisteredModelAlias,
@@ -32,28 +35,51 @@ from mlflow.protos.service_pb2 import (
     GetExperiment,
     GetExperimentByName,
     GetMetricHistory,
+    GetMetricHistoryBulkInterval,
     GetRun,
     ListArtifacts,
     LogBatch,
     LogMetric,
     LogModel,
     LogParam,
+    MlflowService,
     RestoreExperiment,
     RestoreRun,
     SearchExperiments,
+    SearchRuns,
+    SearchTraces,
     SetExperimentTag,
     SetTag,
     UpdateExperiment,
     UpdateRun,
 )
-from mlflow.server.handlers import get_endpoints
-from mlflow.utils.rest_utils import _REST_API_PATH_PREFIX
+from mlflow.server.handlers import (
+    _assert_array,
+    _assert_intlike,
+    _assert_item_type_string,
+    _assert_less_than_or_equal,
+    _assert_string,
+    _get_paths,
+    _get_request_message,
+    catch_mlflow_exception,
+    get_service_endpoints,
+)
+from mlflow.utils.proto_json_utils import message_to_json
 
 import mlflow_oidc_auth.responses as responses
 from mlflow_oidc_auth import routes
 from mlflow_oidc_auth.auth import authenticate_request_basic_auth, authenticate_request_bearer_token
+from mlflow_oidc_auth.auth_context import set_auth_context
 from mlflow_oidc_auth.config import config
-from mlflow_oidc_auth.utils import get_is_admin
+from mlflow_oidc_auth.store import store
+from mlflow_oidc_auth.utils import (
+    build_auth_context,
+    get_is_admin,
+    get_username,
+    search_readable_experiments,
+    search_readable_model_versions,
+    search_readable_registered_models,
+)
 from mlflow_oidc_auth.validators import (
     validate_can_create_user,
     validate_can_delete_experiment,
@@ -67,8 +93,11 @@ from mlflow_oidc_auth.validators import (
     validate_can_read_experiment,
     validate_can_read_experiment_artifact_proxy,
     validate_can_read_experiment_by_name,
+    validate_can_read_experiments,
     validate_can_read_registered_model,
     validate_can_read_run,
+    validate_can_read_runs,
+    validate_can_read_trace_locations,
     validate_can_update_experiment,
     validate_can_update_experiment_artifact_proxy,
     validate_can_update_registered_model,
@@ -77,9 +106,22 @@ from mlflow_oidc_auth.validators import (
     validate_can_update_user_password,
 )
 
+try:
+    from mlflow.protos.service_pb2 import SearchLoggedModels, SearchTracesV3
+except ImportError:  # MLflow < 3
+    SearchLoggedModels = SearchTracesV3 = None
+
+
+def _get_route() -> str:
+    """The URL rule the request matched, e.g. ``/api/2.0/mlflow/traces/<request_id>``, or its path if none did."""
+    url_rule = request.url_rule
+    return url_rule.rule if url_rule is not None else request.path
 
-def _is_unprotected_route(path: str) -> bool:
-    return path.startswith(
+
+# routes are URL rules, so the cache holds one entry per rule; unmatched paths share the bounded rest
+@lru_cache(maxsize=1024)
+def _is_unprotected_route(route: str) -> bool:
+    return route.startswith(
         (
             "/health",
             "/login",
@@ -112,7 +154,11 @@ BEFORE_REQUEST_HANDLERS = {
     DeleteTag: validate_can_update_run,
     LogParam: validate_can_update_run,
     GetMetricHistory: validate_can_read_run,
+    GetMetricHistoryBulkInterval: validate_can_read_runs,
     ListArtifacts: validate_can_read_run,
+    # # Searches over several experiments
+    SearchRuns: validate_can_read_experiments,
+    SearchTraces: validate_can_read_experiments,
     # # Routes for model registry
     GetRegisteredModel: validate_can_read_registered_model,
     DeleteRegisteredModel: validate_can_delete_registered_model,
@@ -134,24 +180,40 @@ BEFORE_REQUEST_HANDLERS = {
     GetModelVersionByAlias: validate_can_read_registered_model,
 }
 
+if SearchLoggedModels is not None:
+    BEFORE_REQUEST_HANDLERS[SearchLoggedModels] = validate_can_read_experiments
+if SearchTracesV3 is not None:
+    BEFORE_REQUEST_HANDLERS[SearchTracesV3] = validate_can_read_trace_locations
+
 
 def _get_before_request_handler(request_class):
     return BEFORE_REQUEST_HANDLERS.get(request_class)
 
 
-BEFORE_REQUEST_VALIDATORS = {(http_path, method): handler for http_path, handler, methods in get_endpoints(_get_before_request_handler) for method in methods}
+# only the service endpoints: get_endpoints also lists endpoints such as /graphql with their MLflow views,
+# which must not be called as validators
+BEFORE_REQUEST_VALIDATORS = {
+    (http_path, method): handler
+    for service in (MlflowService, ModelRegistryService)
+    for http_path, handler, methods in get_service_endpoints(service, _get_before_request_handler)
+    if handler
+    for method in methods
+}
 
+# keyed on URL rules like MLflow's endpoints; listings by user or group and pattern permissions name no
+# experiment, model or prompt and are authorized by their views
 BEFORE_REQUEST_VALIDATORS.update(
     {
+        (routes.GET_METRIC_HISTORY_BULK, "GET"): validate_can_read_runs,
         (routes.CREATE_ACCESS_TOKEN, "PATCH"): validate_can_get_user_token,
+        (routes.ACCESS_TOKENS, "GET"): validate_can_get_user_token,
+        (routes.ACCESS_TOKENS, "DELETE"): validate_can_get_user_token,
         # (SIGNUP, "GET"): validate_can_create_user,
         # (routes.GET_USER, "GET"): validate_can_read_user,
         (routes.CREATE_USER, "POST"): validate_can_create_user,
         (routes.UPDATE_USER_PASSWORD, "PATCH"): validate_can_update_user_password,
         (routes.UPDATE_USER_ADMIN, "PATCH"): validate_can_update_user_admin,
         (routes.DELETE_USER, "DELETE"): validate_can_delete_user,
-        (routes.USER_EXPERIMENT_PERMISSIONS, "GET"): validate_can_manage_experiment,
-        (routes.USER_EXPERIMENT_PERMISSIONS, "POST"): validate_can_manage_experiment,
         (routes.USER_EXPERIMENT_PERMISSION_DETAIL, "GET"): validate_can_manage_experiment,
         (routes.USER_EXPERIMENT_PERMISSION_DETAIL, "POST"): validate_can_manage_experiment,
         (routes.USER_EXPERIMENT_PERMISSION_DETAIL, "PATCH"): validate_can_manage_experiment,
@@ -162,8 +224,6 @@ BEFORE_REQUEST_VALIDATORS.update(
         (routes.EXPERIMENT_USER_PERMISSION_DETAIL, "POST"): validate_can_manage_experiment,
         (routes.EXPERIMENT_USER_PERMISSION_DETAIL, "PATCH"): validate_can_manage_experiment,
         (routes.EXPERIMENT_USER_PERMISSION_DETAIL, "DELETE"): validate_can_manage_experiment,
-        (routes.USER_REGISTERED_MODEL_PERMISSIONS, "GET"): validate_can_manage_registered_model,
-        (routes.USER_REGISTERED_MODEL_PERMISSIONS, "POST"): validate_can_manage_registered_model,
         (routes.USER_REGISTERED_MODEL_PERMISSION_DETAIL, "GET"): validate_can_manage_registered_model,
         (routes.USER_REGISTERED_MODEL_PERMISSION_DETAIL, "POST"): validate_can_manage_registered_model,
         (routes.USER_REGISTERED_MODEL_PERMISSION_DETAIL, "PATCH"): validate_can_manage_registered_model,
@@ -174,8 +234,6 @@ BEFORE_REQUEST_VALIDATORS.update(
         (routes.REGISTERED_MODEL_USER_PERMISSION_DETAIL, "POST"): validate_can_manage_registered_model,
         (routes.REGISTERED_MODEL_USER_PERMISSION_DETAIL, "PATCH"): validate_can_manage_registered_model,
         (routes.REGISTERED_MODEL_USER_PERMISSION_DETAIL, "DELETE"): validate_can_manage_registered_model,
-        (routes.USER_PROMPT_PERMISSIONS, "GET"): validate_can_manage_registered_model,
-        (routes.USER_PROMPT_PERMISSIONS, "POST"): validate_can_manage_registered_model,
         (routes.USER_PROMPT_PERMISSION_DETAIL, "GET"): validate_can_manage_registered_model,
         (routes.USER_PROMPT_PERMISSION_DETAIL, "POST"): validate_can_manage_registered_model,
         (routes.USER_PROMPT_PERMISSION_DETAIL, "PATCH"): validate_can_manage_registered_model,
@@ -186,26 +244,6 @@ BEFORE_REQUEST_VALIDATORS.update(
         (routes.PROMPT_USER_PERMISSION_DETAIL, "POST"): validate_can_manage_registered_model,
         (routes.PROMPT_USER_PERMISSION_DETAIL, "PATCH"): validate_can_manage_registered_model,
         (routes.PROMPT_USER_PERMISSION_DETAIL, "DELETE"): validate_can_manage_registered_model,
-        (routes.USER_EXPERIMENT_PATTERN_PERMISSIONS, "GET"): validate_can_manage_experiment,
-        (routes.USER_EXPERIMENT_PATTERN_PERMISSIONS, "POST"): validate_can_manage_experiment,
-        (routes.USER_EXPERIMENT_PATTERN_PERMISSION_DETAIL, "GET"): validate_can_manage_experiment,
-        (routes.USER_EXPERIMENT_PATTERN_PERMISSION_DETAIL, "POST"): validate_can_manage_experiment,
-        (routes.USER_EXPERIMENT_PATTERN_PERMISSION_DETAIL, "PATCH"): validate_can_manage_experiment,
-        (routes.USER_EXPERIMENT_PATTERN_PERMISSION_DETAIL, "DELETE"): validate_can_manage_experiment,
-        (routes.USER_REGISTERED_MODEL_PATTERN_PERMISSIONS, "GET"): validate_can_manage_registered_model,
-        (routes.USER_REGISTERED_MODEL_PATTERN_PERMISSIONS, "POST"): validate_can_manage_registered_model,
-        (routes.USER_REGISTERED_MODEL_PATTERN_PERMISSION_DETAIL, "GET"): validate_can_manage_registered_model,
-        (routes.USER_REGISTERED_MODEL_PATTERN_PERMISSION_DETAIL, "POST"): validate_can_manage_registered_model,
-        (routes.USER_REGISTERED_MODEL_PATTERN_PERMISSION_DETAIL, "PATCH"): validate_can_manage_registered_model,
-        (routes.USER_REGISTERED_MODEL_PATTERN_PERMISSION_DETAIL, "DELETE"): validate_can_manage_registered_model,
-        (routes.USER_PROMPT_PATTERN_PERMISSIONS, "GET"): validate_can_manage_registered_model,
-        (routes.USER_PROMPT_PATTERN_PERMISSIONS, "POST"): validate_can_manage_registered_model,
-        (routes.USER_PROMPT_PATTERN_PERMISSION_DETAIL, "GET"): validate_can_manage_registered_model,
-        (routes.USER_PROMPT_PATTERN_PERMISSION_DETAIL, "POST"): validate_can_manage_registered_model,
-        (routes.USER_PROMPT_PATTERN_PERMISSION_DETAIL, "PATCH"): validate_can_manage_registered_model,
-        (routes.USER_PROMPT_PATTERN_PERMISSION_DETAIL, "DELETE"): validate_can_manage_registered_model,
-        (routes.GROUP_EXPERIMENT_PERMISSIONS, "GET"): validate_can_manage_experiment,
-        (routes.GROUP_EXPERIMENT_PERMISSIONS, "POST"): validate_can_manage_experiment,
         (routes.GROUP_EXPERIMENT_PERMISSION_DETAIL, "GET"): validate_can_manage_experiment,
         (routes.GROUP_EXPERIMENT_PERMISSION_DETAIL, "POST"): validate_can_manage_experiment,
         (routes.GROUP_EXPERIMENT_PERMISSION_DETAIL, "PATCH"): validate_can_manage_experiment,
@@ -216,14 +254,6 @@ BEFORE_REQUEST_VALIDATORS.update(
         (routes.EXPERIMENT_GROUP_PERMISSION_DETAIL, "POST"): validate_can_manage_experiment,
         (routes.EXPERIMENT_GROUP_PERMISSION_DETAIL, "PATCH"): validate_can_manage_experiment,
         (routes.EXPERIMENT_GROUP_PERMISSION_DETAIL, "DELETE"): validate_can_manage_experiment,
-        (routes.GROUP_EXPERIMENT_PATTERN_PERMISSIONS, "GET"): validate_can_manage_experiment,
-        (routes.GROUP_EXPERIMENT_PATTERN_PERMISSIONS, "POST"): validate_can_manage_experiment,
-        (routes.GROUP_EXPERIMENT_PATTERN_PERMISSION_DETAIL, "GET"): validate_can_manage_experiment,
-        (routes.GROUP_EXPERIMENT_PATTERN_PERMISSION_DETAIL, "POST"): validate_can_manage_experiment,
-        (routes.GROUP_EXPERIMENT_PATTERN_PERMISSION_DETAIL, "PATCH"): validate_can_manage_experiment,
-        (routes.GROUP_EXPERIMENT_PATTERN_PERMISSION_DETAIL, "DELETE"): validate_can_manage_experiment,
-        (routes.GROUP_REGISTERED_MODEL_PERMISSIONS, "GET"): validate_can_manage_registered_model,
-        (routes.GROUP_REGISTERED_MODEL_PERMISSIONS, "POST"): validate_can_manage_registered_model,
         (routes.GROUP_REGISTERED_MODEL_PERMISSION_DETAIL, "GET"): validate_can_manage_registered_model,
         (routes.GROUP_REGISTERED_MODEL_PERMISSION_DETAIL, "POST"): validate_can_manage_registered_model,
         (routes.GROUP_REGISTERED_MODEL_PERMISSION_DETAIL, "PATCH"): validate_can_manage_registered_model,
@@ -234,14 +264,6 @@ BEFORE_REQUEST_VALIDATORS.update(
         (routes.REGISTERED_MODEL_GROUP_PERMISSION_DETAIL, "POST"): validate_can_manage_registered_model,
         (routes.REGISTERED_MODEL_GROUP_PERMISSION_DETAIL, "PATCH"): validate_can_manage_registered_model,
         (routes.REGISTERED_MODEL_GROUP_PERMISSION_DETAIL, "DELETE"): validate_can_manage_registered_model,
-        (routes.GROUP_REGISTERED_MODEL_PATTERN_PERMISSIONS, "GET"): validate_can_manage_registered_model,
-        (routes.GROUP_REGISTERED_MODEL_PATTERN_PERMISSIONS, "POST"): validate_can_manage_registered_model,
-        (routes.GROUP_REGISTERED_MODEL_PATTERN_PERMISSION_DETAIL, "GET"): validate_can_manage_registered_model,
-        (routes.GROUP_REGISTERED_MODEL_PATTERN_PERMISSION_DETAIL, "POST"): validate_can_manage_registered_model,
-        (routes.GROUP_REGISTERED_MODEL_PATTERN_PERMISSION_DETAIL, "PATCH"): validate_can_manage_registered_model,
-        (routes.GROUP_REGISTERED_MODEL_PATTERN_PERMISSION_DETAIL, "DELETE"): validate_can_manage_registered_model,
-        (routes.GROUP_PROMPT_PERMISSIONS, "GET"): validate_can_manage_registered_model,
-        (routes.GROUP_PROMPT_PERMISSIONS, "POST"): validate_can_manage_registered_model,
         (routes.GROUP_PROMPT_PERMISSION_DETAIL, "GET"): validate_can_manage_registered_model,
         (routes.GROUP_PROMPT_PERMISSION_DETAIL, "POST"): validate_can_manage_registered_model,
         (routes.GROUP_PROMPT_PERMISSION_DETAIL, "PATCH"): validate_can_manage_registered_model,
@@ -252,16 +274,118 @@ BEFORE_REQUEST_VALIDATORS.update(
         (routes.PROMPT_GROUP_PERMISSION_DETAIL, "POST"): validate_can_manage_registered_model,
         (routes.PROMPT_GROUP_PERMISSION_DETAIL, "PATCH"): validate_can_manage_registered_model,
         (routes.PROMPT_GROUP_PERMISSION_DETAIL, "DELETE"): validate_can_manage_registered_model,
-        (routes.GROUP_PROMPT_PATTERN_PERMISSIONS, "GET"): validate_can_manage_registered_model,
-        (routes.GROUP_PROMPT_PATTERN_PERMISSIONS, "POST"): validate_can_manage_registered_model,
-        (routes.GROUP_PROMPT_PATTERN_PERMISSION_DETAIL, "GET"): validate_can_manage_registered_model,
-        (routes.GROUP_PROMPT_PATTERN_PERMISSION_DETAIL, "POST"): validate_can_manage_registered_model,
-        (routes.GROUP_PROMPT_PATTERN_PERMISSION_DETAIL, "PATCH"): validate_can_manage_registered_model,
-        (routes.GROUP_PROMPT_PATTERN_PERMISSION_DETAIL, "DELETE"): validate_can_manage_registered_model,
     }
 )
 
 
+def _json_response(message) -> Response:
+    response = Response(mimetype="application/json")
+    response.set_data(message_to_json(message))
+    return response
+
+
+@catch_mlflow_exception
+def _search_experiments() -> Response:
+    """SearchExperiments for users who are not admins: only the experiments they can read, without running MLflow's search."""
+    request_message = _get_request_message(
+        SearchExperiments(),
+        schema={
+            "view_type": [_assert_intlike],
+            "max_results": [_assert_intlike],
+            "order_by": [_assert_array],
+            "filter": [_assert_string],
+            "page_token": [_assert_string],
+        },
+    )
+    experiments, next_page_token = search_readable_experiments(
+        view_type=request_message.view_type,
+        max_results=request_message.max_results,
+        order_by=list(request_message.order_by),
+        filter_string=request_message.filter,
+        page_token=request_message.page_token,
+        username=get_username(),
+    )
+    response_message = SearchExperiments.Response()  # type: ignore
+    response_message.experiments.extend(experiment.to_proto() for experiment in experiments)
+    if next_page_token:
+        response_message.next_page_token = next_page_token
+    return _json_response(response_message)
+
+
+@catch_mlflow_exception
+def _search_registered_models() -> Response:
+    """SearchRegisteredModels for users who are not admins: only the models they can read, without running MLflow's search."""
+    request_message = _get_request_message(
+        SearchRegisteredModels(),
+        schema={
+            "filter": [_assert_string],
+            "max_results": [_assert_intlike, lambda x: _assert_less_than_or_equal(int(x), 1000)],
+            "order_by": [_assert_array, _assert_item_type_string],
+            "page_token": [_assert_string],
+        },
+    )
+    models, next_page_token = search_readable_registered_models(
+        filter_string=request_message.filter,
+        max_results=request_message.max_results,
+        order_by=list(request_message.order_by),
+        page_token=request_message.page_token,
+        username=get_username(),
+    )
+    response_message = SearchRegisteredModels.Response()  # type: ignore
+    response_message.registered_models.extend(model.to_proto() for model in models)
+    if next_page_token:
+        response_message.next_page_token = next_page_token
+    return _json_response(response_message)
+
+
+@catch_mlflow_exception
+def _search_model_versions() -> Response:
+    """SearchModelVersions for users who are not admins: only versions of the models they can read, without running MLflow's search."""
+    request_message = _get_request_message(
+        SearchModelVersions(),
+        schema={
+            "filter": [_assert_string],
+            "max_results": [_assert_intlike, lambda x: _assert_less_than_or_equal(int(x), 200_000)],
+            "order_by": [_assert_array, _assert_item_type_string],
+            "page_token": [_assert_string],
+        },
+    )
+    model_versions, next_page_token = search_readable_model_versions(
+        filter_string=request_message.filter,
+        max_results=request_message.max_results,
+        order_by=list(request_message.order_by),
+        page_token=request_message.page_token,
+        username=get_username(),
+    )
+    response_message = SearchModelVersions.Response()  # type: ignore
+    response_message.model_versions.extend(model_version.to_proto() for model_version in model_versions)
+    if next_page_token:
+        response_message.next_page_token = next_page_token
+    return _json_response(response_message)
+
+
+# requests the plugin answers itself for users who are not admins, instead of filtering MLflow's response
+BEFORE_REQUEST_RESPONDERS = {
+    SearchExperiments: _search_experiments,
+    SearchRegisteredModels: _search_registered_models,
+    SearchModelVersions: _search_model_versions,
+}
+
+
+def _get_before_request_responder(request_class):
+    return BEFORE_REQUEST_RESPONDERS.get(request_class)
+
+
+# only the service endpoints, as for BEFORE_REQUEST_VALIDATORS
+BEFORE_REQUEST_RESPONDER_PATHS = {
+    (http_path, method): responder
+    for service in (MlflowService, ModelRegistryService)
+    for http_path, responder, methods in get_service_endpoints(service, _get_before_request_responder)
+    if responder
+    for method in methods
+}
+
+
 def _get_proxy_artifact_validator(method: str, view_args: Optional[Dict[str, Any]]) -> Optional[Callable[[], bool]]:
     if view_args is None:
         return validate_can_read_experiment_artifact_proxy  # List
@@ -273,15 +397,17 @@ def _get_proxy_artifact_validator(method: str, view_args: Optional[Dict[str, Any
     }.get(method)
 
 
-def _is_proxy_artifact_path(path: str) -> bool:
-    return path.startswith(f"{_REST_API_PATH_PREFIX}/mlflow-artifacts/artifacts/")
+# download, upload and delete of a proxied artifact, under /api and /ajax-api
+PROXY_ARTIFACT_ROUTES = frozenset(_get_paths("/mlflow-artifacts/artifacts/<path:artifact_path>"))
 
 
 def before_request_hook():
     """Called before each request. If it did not return a response,
     the view function for the matched route is called and returns a response"""
-    if _is_unprotected_route(request.path):
+    route = _get_route()
+    if _is_unprotected_route(route):
         return
+    store.poll_permission_changes()
     if request.authorization is not None:
         if request.authorization.type == "basic":
             if not authenticate_request_basic_auth():
@@ -300,14 +426,18 @@ def before_request_hook():
                 username=None,
                 provide_display_name=config.OIDC_PROVIDER_DISPLAY_NAME,
             )
+    # resolve the caller once, the rest of the request reads it from flask.g
+    set_auth_context(build_auth_context())
     # admins don't need to be authorized
     if get_is_admin():
         return
+    if responder := BEFORE_REQUEST_RESPONDER_PATHS.get((route, request.method)):
+        return responder()
     # authorization
-    if validator := BEFORE_REQUEST_VALIDATORS.get((request.path, request.method)):
+    if validator := BEFORE_REQUEST_VALIDATORS.get((route, request.method)):
         if not validator():
             return responses.make_forbidden_response()
-    elif _is_proxy_artifact_path(request.path):
+    elif route in PROXY_ARTIFACT_ROUTES:
         if validator := _get_proxy_artifact_validator(request.method, request.view_args):
             if not validator():
                 return responses.make_forbidden_response()
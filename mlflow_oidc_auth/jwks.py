@@ -0,0 +1,259 @@
+import threading
+import time
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple
+
+import requests
+from authlib.jose import JsonWebKey
+from mlflow.server import app
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class _InFlightFetch:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[dict] = None
+        self.error: Optional[BaseException] = None
+
+
+class JwksFetcher:
+    """
+    Fetches the OIDC discovery document and the JWKS it points to.
+
+    Uses a pooled keep-alive ``requests.Session`` with timeouts and retries. The
+    discovery document is cached for ``discovery_ttl`` seconds independently of
+    the JWKS. Concurrent ``fetch_jwks`` calls are coalesced into a single request
+    to the identity provider whose result (or error) is shared by all callers.
+    """
+
+    def __init__(
+        self,
+        timeout: Tuple[float, float] = (5, 10),
+        retries: int = 3,
+        discovery_ttl: float = 86400,
+        session: Optional[requests.Session] = None,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.timeout = timeout
+        self.discovery_ttl = discovery_ttl
+        self._timer = timer
+        self._session = session or self._create_session(retries)
+        self._lock = threading.Lock()
+        self._in_flight: Optional[_InFlightFetch] = None
+        self._discovery: Optional[Tuple[str, dict, float]] = None
+        self.last_refresh: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.refresh_count = 0
+        self.failure_count = 0
+        self.consecutive_failures = 0
+        self.coalesced_count = 0
+
+    @staticmethod
+    def _create_session(retries: int) -> requests.Session:
+        session = requests.Session()
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=2, pool_maxsize=4)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _get_json(self, url: str) -> dict:
+        response = self._session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def get_discovery_document(self, discovery_url: str) -> dict:
+        cached = self._discovery
+        if cached is not None and cached[0] == discovery_url and cached[2] > self._timer():
+            return cached[1]
+        metadata = self._get_json(discovery_url)
+        self._discovery = (discovery_url, metadata, self._timer() + self.discovery_ttl)
+        return metadata
+
+    def fetch_jwks(self, discovery_url: str) -> dict:
+        with self._lock:
+            call = self._in_flight
+            leader = call is None
+            if leader:
+                call = self._in_flight = _InFlightFetch()
+            else:
+                self.coalesced_count += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = self._fetch_jwks(discovery_url)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight = None
+            call.done.set()
+
+    def _fetch_jwks(self, discovery_url: str) -> dict:
+        try:
+            jwks_uri = self.get_discovery_document(discovery_url).get("jwks_uri")
+            jwks = self._get_json(jwks_uri)
+        except Exception as e:
+            # the jwks_uri may have moved, re-read the discovery document next time
+            self._discovery = None
+            self.failure_count += 1
+            self.consecutive_failures += 1
+            self.last_error = str(e)
+            app.logger.error("JWKS fetch failed: %s", str(e))
+            raise
+        self.refresh_count += 1
+        self.consecutive_failures = 0
+        self.last_refresh = time.time()
+        return jwks
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "last_refresh": self.last_refresh,
+            "refresh_count": self.refresh_count,
+            "failure_count": self.failure_count,
+            "consecutive_failures": self.consecutive_failures,
+            "coalesced_count": self.coalesced_count,
+            "last_error": self.last_error,
+        }
+
+
+class JwksKeyRegistry:
+    """
+    Process-local registry of parsed JWKS signing keys indexed by ``kid``.
+
+    Keys are parsed once when a key set is loaded instead of on every token
+    validation. The registry is seeded from ``load_jwks(False)`` (the shared
+    cache) on first use and whenever a token names an unknown ``kid``; it is
+    refreshed from the identity provider with ``load_jwks(True)`` in a
+    background thread shortly before ``ttl`` lapses.
+    """
+
+    def __init__(
+        self,
+        load_jwks: Callable[[bool], dict],
+        ttl: float = 3600,
+        refresh_ahead: float = 0.9,
+        min_forced_refresh_interval: float = 30,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self._load_jwks = load_jwks
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.min_forced_refresh_interval = min_forced_refresh_interval
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._keys: Optional[Dict[Optional[str], object]] = None
+        # key IDs of the loaded document, including keys that could not be parsed
+        self.key_ids: FrozenSet[Optional[str]] = frozenset()
+        self._loaded_at: Optional[float] = None
+        self._last_forced_refresh: Optional[float] = None
+        self._background_refresh: Optional[threading.Thread] = None
+        self._generation = 0
+
+    def load(self, jwks: dict) -> None:
+        """Parse a JWKS document and atomically replace the registered keys."""
+        keys = {}
+        for key_data in jwks.get("keys", []):
+            try:
+                key = JsonWebKey.import_key(key_data)
+            except Exception as e:
+                app.logger.warning("Skipping JWKS key %s: %s", key_data.get("kid"), str(e))
+                continue
+            keys[key_data.get("kid")] = key
+        self._keys = keys
+        self.key_ids = frozenset(key_data.get("kid") for key_data in jwks.get("keys", []))
+        self._loaded_at = self._timer()
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        Reload the key set.
+
+        :param force: Bypass the shared cache and fetch the key set from the identity provider.
+        """
+        generation = self._generation
+        with self._lock:
+            if generation != self._generation:
+                # another thread reloaded the key set while this one was waiting
+                return
+            if force:
+                self._last_forced_refresh = self._timer()
+            self.load(self._load_jwks(force))
+            self._generation += 1
+
+    def refresh_if_allowed(self) -> bool:
+        """
+        Fetch the key set from the identity provider unless that was done less than
+        ``min_forced_refresh_interval`` seconds ago.
+
+        :return: Whether the key set was fetched.
+        """
+        if not self._may_force_refresh():
+            return False
+        self.refresh(force=True)
+        return True
+
+    def clear(self) -> None:
+        self._keys = None
+        self.key_ids = frozenset()
+        self._loaded_at = None
+        self._generation += 1
+
+    def find_key(self, header: dict, payload=None):
+        """
+        Return the key that signed a token. Matches the ``load_key(header, payload)``
+        callable accepted by ``authlib.jose.jwt.decode``.
+        """
+        if self._keys is None:
+            self.refresh()
+        elif self._age() >= self.ttl * self.refresh_ahead and self._may_force_refresh():
+            if self._age() >= self.ttl:
+                self._refresh_keeping_current_keys()
+            else:
+                self._refresh_in_background()
+
+        kid = header.get("kid")
+        key = self._lookup(kid)
+        if key is None:
+            # the key set may have been rotated by the identity provider
+            self.refresh()
+            key = self._lookup(kid)
+        if key is None and self.refresh_if_allowed():
+            key = self._lookup(kid)
+        if key is None:
+            raise ValueError(f"Key '{kid}' not found in JWKS")
+        return key
+
+    def _lookup(self, kid: Optional[str]):
+        keys = self._keys or {}
+        if kid is None and len(keys) == 1:
+            return next(iter(keys.values()))
+        return keys.get(kid)
+
+    def _age(self) -> float:
+        return self._timer() - (self._loaded_at or 0)
+
+    def _may_force_refresh(self) -> bool:
+        return self._last_forced_refresh is None or self._timer() - self._last_forced_refresh >= self.min_forced_refresh_interval
+
+    def _refresh_keeping_current_keys(self) -> None:
+        try:
+            self.refresh(force=True)
+        except Exception as e:
+            app.logger.error("JWKS refresh failed, keeping the current keys: %s", str(e))
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._background_refresh is not None and self._background_refresh.is_alive():
+                return
+            self._background_refresh = threading.Thread(target=self._refresh_keeping_current_keys, name="jwks-refresh", daemon=True)
+            self._background_refresh.start()
@@ -0,0 +1,207 @@
+import secrets
+import threading
+import time
+from functools import wraps
+from typing import Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from mlflow.server import app
+
+from mlflow_oidc_auth.config import config
+from mlflow_oidc_auth.local_cache import LocalCache
+
+# (permission name, permission source)
+Decision = Tuple[str, str]
+
+_SHARED_VERSION_KEY = "permission_decisions:version"
+
+
+class PermissionDecisionCache:
+    """
+    Permission decisions by resource type, user and resource.
+
+    Every write to the permission store changes the version; decisions computed
+    under an older version are never served and a decision whose computation
+    raced with a write is not stored. Decisions expire after ``ttl`` seconds
+    regardless. With ``shared`` the version and the decisions are also kept in
+    the configured cache backend (``CACHE_TYPE``), so a write handled by one
+    worker invalidates the decisions of all workers.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None, shared: bool = False):
+        self._cache = LocalCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.ttl = ttl
+        self.shared = shared
+        self.version = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._cache.enabled
+
+    def current_version(self) -> Tuple[int, Optional[str]]:
+        """The version to pass to ``get`` and ``set``; read it before computing a decision."""
+        if not self.shared:
+            return self.version, None
+        from mlflow_oidc_auth.app import cache
+
+        return self.version, cache.get(_SHARED_VERSION_KEY)
+
+    @staticmethod
+    def _shared_key(version: Tuple[int, Optional[str]], key: Tuple[Hashable, ...]) -> str:
+        return f"permission_decision:{version[1]}:" + ":".join(str(part) for part in key)
+
+    def get(self, kind: str, username: str, resource: str, version: Tuple[int, Optional[str]]) -> Optional[Decision]:
+        key = (kind, username, str(resource))
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        if not self.shared:
+            return None
+        from mlflow_oidc_auth.app import cache
+
+        decision = cache.get(self._shared_key(version, key))
+        if decision is not None:
+            decision = tuple(decision)
+            with self._lock:
+                if version[0] == self.version:
+                    self._cache.set(key, (version, decision))
+        return decision
+
+    def set(self, kind: str, username: str, resource: str, decision: Decision, version: Tuple[int, Optional[str]]) -> None:
+        if not self.enabled:
+            return
+        key = (kind, username, str(resource))
+        with self._lock:
+            if version[0] != self.version:
+                return
+            self._cache.set(key, (version, decision))
+        if self.shared:
+            from mlflow_oidc_auth.app import cache
+
+            cache.set(self._shared_key(version, key), decision, timeout=self.ttl)
+
+    def invalidate(self, local_only: bool = False) -> None:
+        """
+        Drop all decisions.
+        :param local_only: Keep the shared version, for changes the writing worker already announced.
+        """
+        with self._lock:
+            self.version += 1
+            self._cache.clear()
+        if self.shared and not local_only:
+            from mlflow_oidc_auth.app import cache
+
+            # a random token rather than a counter: concurrent writes always end on a version no reader has seen
+            cache.set(_SHARED_VERSION_KEY, secrets.token_hex(8), timeout=0)
+
+    def stats(self):
+        return {**self._cache.stats(), "version": self.version}
+
+
+permission_decision_cache = PermissionDecisionCache(
+    maxsize=config.OIDC_PERMISSION_CACHE_SIZE,
+    ttl=config.OIDC_PERMISSION_CACHE_TTL,
+    shared=config.OIDC_PERMISSION_CACHE_SHARED,
+)
+
+
+class RunWriteLeases:
+    """
+    Short-lived grants of write access to a run, by user and run, so a training loop
+    logging to the same run is authorized with one lookup per request.
+
+    A lease is only honoured under the permission decision version it was granted
+    under: any permission write in this worker, or one announced by another worker
+    through the permission generations, revokes all leases. Leases expire after
+    ``ttl`` seconds regardless.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = LocalCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def current_version() -> int:
+        """The version to pass to ``grant``; read it before checking the permission."""
+        return permission_decision_cache.version
+
+    def holds(self, username: str, run_id: str) -> bool:
+        return self._cache.get((username, run_id)) == permission_decision_cache.version
+
+    def grant(self, username: str, run_id: str, version: int) -> None:
+        if version == permission_decision_cache.version:
+            self._cache.set((username, run_id), version)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self):
+        return self._cache.stats()
+
+
+run_write_leases = RunWriteLeases(maxsize=config.OIDC_RUN_WRITE_LEASE_SIZE, ttl=config.OIDC_RUN_WRITE_LEASE_TTL)
+
+
+def invalidates_permission_decisions(f):
+    """Drop the cached permission decisions once the decorated store method has committed."""
+
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        try:
+            return f(*args, **kwargs)
+        finally:
+            permission_decision_cache.invalidate()
+
+    return wrapper
+
+
+class PermissionChangePoller:
+    """
+    Detects permission changes made by any worker from the generation counters
+    in the ``permission_generations`` table.
+
+    ``poll`` is cheap to call on every request: it reads the counters at most
+    once per ``interval`` seconds, and only one thread of a worker reads them
+    at a time. Subscribers are called with the scopes whose generation changed;
+    the first poll reports ``"*"`` in addition, since the caches may have been
+    filled before it.
+    """
+
+    def __init__(self, load_generations: Callable[[], Dict[str, int]], interval: float, timer: Callable[[], float] = time.monotonic):
+        self._load_generations = load_generations
+        self.interval = interval
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._generations: Optional[Dict[str, int]] = None
+        self._next_poll = 0.0
+        self._subscribers: List[Callable[[Set[str]], None]] = []
+
+    @property
+    def generations(self) -> Optional[Dict[str, int]]:
+        """The generations read by the last successful poll."""
+        return self._generations
+
+    def subscribe(self, callback: Callable[[Set[str]], None]) -> None:
+        self._subscribers.append(callback)
+
+    def poll(self) -> None:
+        if self.interval < 0 or self._timer() < self._next_poll or not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._next_poll = self._timer() + self.interval
+            try:
+                generations = self._load_generations()
+            except Exception as e:
+                app.logger.warning("Could not read permission generations: %s", str(e))
+                return
+            previous = self._generations
+            self._generations = generations
+            if previous is None:
+                changed = set(generations) | {"*"}
+            else:
+                changed = {scope for scope in set(generations) | set(previous) if generations.get(scope) != previous.get(scope)}
+            if changed:
+                app.logger.debug("Permission changes detected in %s", sorted(changed))
+                for callback in self._subscribers:
+                    callback(changed)
+        finally:
+            self._lock.release()
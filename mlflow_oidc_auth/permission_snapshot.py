@@ -0,0 +1,367 @@
+import json
+import mmap
+import os
+import re
+import sys
+import tempfile
+import threading
+from array import array
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from mlflow.server import app
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from mlflow_oidc_auth.db.models import (
+    SqlExperimentGroupPermission,
+    SqlExperimentGroupRegexPermission,
+    SqlExperimentPermission,
+    SqlExperimentRegexPermission,
+    SqlPermissionGeneration,
+    SqlRegisteredModelGroupPermission,
+    SqlRegisteredModelGroupRegexPermission,
+    SqlRegisteredModelPermission,
+    SqlRegisteredModelRegexPermission,
+    SqlUser,
+    SqlUserGroup,
+)
+from mlflow_oidc_auth.permission_cache import permission_decision_cache
+from mlflow_oidc_auth.regex_rules import RegexRule, RegexRuleSet, literal_prefix, regex_rule_cache
+from mlflow_oidc_auth.repository.effective_permission import PermissionSources
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+_MAGIC = b"MOASNAP1"
+_ALIGNMENT = 8
+
+# record layouts, all fields are int32; strings are referenced by their index in the sorted string table
+_USER = ("name", "id", "groups_start", "groups_end")
+_GRANT = ("key", "owner", "permission")
+_REGEX = ("owner", "priority", "regex", "permission", "prefix")
+
+_GRANT_SECTIONS = {
+    "experiment_user_grants": (SqlExperimentPermission.experiment_id, SqlExperimentPermission.user_id, SqlExperimentPermission.permission),
+    "experiment_group_grants": (SqlExperimentGroupPermission.experiment_id, SqlExperimentGroupPermission.group_id, SqlExperimentGroupPermission.permission),
+    "model_user_grants": (SqlRegisteredModelPermission.name, SqlRegisteredModelPermission.user_id, SqlRegisteredModelPermission.permission),
+    "model_group_grants": (SqlRegisteredModelGroupPermission.name, SqlRegisteredModelGroupPermission.group_id, SqlRegisteredModelGroupPermission.permission),
+}
+
+
+def _regex_query(model, owner_column, condition=None):
+    query = select(owner_column, model.priority, model.regex, model.permission)
+    return query if condition is None else query.where(condition)
+
+
+_REGEX_SECTIONS = {
+    "experiment_user_regexes": _regex_query(SqlExperimentRegexPermission, SqlExperimentRegexPermission.user_id),
+    "experiment_group_regexes": _regex_query(SqlExperimentGroupRegexPermission, SqlExperimentGroupRegexPermission.group_id),
+    "registered_model_user_regexes": _regex_query(
+        SqlRegisteredModelRegexPermission, SqlRegisteredModelRegexPermission.user_id, SqlRegisteredModelRegexPermission.prompt.is_(False)
+    ),
+    "registered_model_group_regexes": _regex_query(
+        SqlRegisteredModelGroupRegexPermission, SqlRegisteredModelGroupRegexPermission.group_id, SqlRegisteredModelGroupRegexPermission.prompt.is_(False)
+    ),
+    "prompt_user_regexes": _regex_query(
+        SqlRegisteredModelRegexPermission, SqlRegisteredModelRegexPermission.user_id, SqlRegisteredModelRegexPermission.prompt.is_(True)
+    ),
+    "prompt_group_regexes": _regex_query(
+        SqlRegisteredModelGroupRegexPermission, SqlRegisteredModelGroupRegexPermission.group_id, SqlRegisteredModelGroupRegexPermission.prompt.is_(True)
+    ),
+}
+
+
+def _valid_regexes(rows) -> Iterator[Tuple[int, int, str, str, str]]:
+    for owner, priority, regex, permission in rows:
+        try:
+            pattern = re.compile(regex)
+        except re.error as e:
+            app.logger.warning("Skipping invalid permission regex %s: %s", regex, str(e))
+            continue
+        yield owner, priority, regex, permission, literal_prefix(pattern)
+
+
+def build_snapshot(session: Session) -> Tuple[Dict[str, int], bytes]:
+    """
+    Compile users, group memberships, grants and regex rules into a snapshot.
+    :param session: The session to read the auth database with.
+    :return: The permission generations the snapshot was built from and its content.
+    """
+    # generations are read first: a change committed while the tables are read makes the snapshot look outdated, never current
+    generations = {scope: generation for scope, generation in session.execute(select(SqlPermissionGeneration.scope, SqlPermissionGeneration.generation))}
+    users = session.execute(select(SqlUser.id, SqlUser.username)).all()
+    memberships = session.execute(select(SqlUserGroup.user_id, SqlUserGroup.group_id)).all()
+    grants = {
+        name: [(str(key), owner, permission) for key, owner, permission in session.execute(select(*columns))] for name, columns in _GRANT_SECTIONS.items()
+    }
+    regexes = {name: list(_valid_regexes(session.execute(query))) for name, query in _REGEX_SECTIONS.items()}
+
+    strings = {username for _, username in users}
+    for rows in grants.values():
+        strings.update(string for key, _, permission in rows for string in (key, permission))
+    for rows in regexes.values():
+        strings.update(string for _, _, regex, permission, prefix in rows for string in (regex, permission, prefix))
+    # sorted by UTF-8 bytes, so a string is found by bisecting the raw table
+    encoded = sorted(string.encode("utf-8") for string in strings)
+    index = {string.decode("utf-8"): position for position, string in enumerate(encoded)}
+    offsets = array("i", [0])
+    for string in encoded:
+        offsets.append(offsets[-1] + len(string))
+
+    groups_of: Dict[int, List[int]] = {}
+    for user_id, group_id in memberships:
+        groups_of.setdefault(user_id, []).append(group_id)
+    user_records, user_groups = array("i"), array("i")
+    for user_id, username in sorted(users, key=lambda user: index[user[1]]):
+        start = len(user_groups)
+        user_groups.extend(sorted(groups_of.get(user_id, [])))
+        user_records.extend((index[username], user_id, start, len(user_groups)))
+
+    sections: Dict[str, bytes] = {
+        "strings": b"".join(encoded),
+        "string_offsets": offsets.tobytes(),
+        "users": user_records.tobytes(),
+        "user_groups": user_groups.tobytes(),
+    }
+    for name, rows in grants.items():
+        sections[name] = array(
+            "i", [field for row in sorted((index[key], owner, index[permission]) for key, owner, permission in rows) for field in row]
+        ).tobytes()
+    for name, rows in regexes.items():
+        records = sorted((owner, priority, index[regex], index[permission], index[prefix]) for owner, priority, regex, permission, prefix in rows)
+        sections[name] = array("i", [field for row in records for field in row]).tobytes()
+
+    layout, body = {}, bytearray()
+    for name, content in sections.items():
+        body.extend(b"\0" * (-len(body) % _ALIGNMENT))
+        layout[name] = [len(body), len(content)]
+        body.extend(content)
+    header = json.dumps({"byteorder": sys.byteorder, "generations": generations, "sections": layout}).encode("utf-8")
+    header += b" " * (-(len(_MAGIC) + 4 + len(header)) % _ALIGNMENT)
+    return generations, _MAGIC + len(header).to_bytes(4, "little") + header + bytes(body)
+
+
+class PermissionSnapshot:
+    """
+    A snapshot file mapped read-only into memory.
+
+    Lookups read the records straight from the mapping, which the operating
+    system shares between all processes of a node that map the same file.
+    The file is never modified in place: a newer snapshot is a new file.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        if bytes(view[: len(_MAGIC)]) != _MAGIC:
+            raise ValueError(f"{path} is not a permission snapshot")
+        header_length = int.from_bytes(view[len(_MAGIC) : len(_MAGIC) + 4], "little")
+        body_start = len(_MAGIC) + 4 + header_length
+        header = json.loads(bytes(view[len(_MAGIC) + 4 : body_start]))
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was written on a {header['byteorder']} endian machine")
+        self.generations: Dict[str, int] = header["generations"]
+        sections = {name: view[body_start + offset : body_start + offset + length] for name, (offset, length) in header["sections"].items()}
+        self._strings = sections.pop("strings")
+        self._string_offsets = sections.pop("string_offsets").cast("i")
+        self._user_groups = sections.pop("user_groups").cast("i")
+        self._records = {name: section.cast("i") for name, section in sections.items()}
+        self._views = [view, self._strings, self._string_offsets, self._user_groups, *sections.values(), *self._records.values()]
+
+    def covers(self, generations: Dict[str, int]) -> bool:
+        """Whether the snapshot reflects ``generations`` or newer ones in every scope."""
+        return all(self.generations.get(scope, 0) >= generation for scope, generation in generations.items())
+
+    def close(self) -> None:
+        """Unmap the file; the snapshot must not be read afterwards."""
+        for view in reversed(self._views):
+            view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # a lookup still holds a record; the mapping goes away with it
+            pass
+
+    def _string(self, position: int) -> str:
+        return str(self._strings[self._string_offsets[position] : self._string_offsets[position + 1]], "utf-8")
+
+    def _find_string(self, string: str) -> Optional[int]:
+        encoded = string.encode("utf-8")
+        low, high = 0, len(self._string_offsets) - 1
+        while low < high:
+            middle = (low + high) // 2
+            if bytes(self._strings[self._string_offsets[middle] : self._string_offsets[middle + 1]]) < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self._string_offsets) - 1 and self._strings[self._string_offsets[low] : self._string_offsets[low + 1]] == encoded:
+            return low
+        return None
+
+    @staticmethod
+    def _first(records: Sequence[int], width: int, value: int) -> int:
+        """The first record whose first field is not less than ``value``; records are sorted."""
+        low, high = 0, len(records) // width
+        while low < high:
+            middle = (low + high) // 2
+            if records[middle * width] < value:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _matching(self, section: str, width: int, value: int) -> Iterator[memoryview]:
+        records = self._records[section]
+        position = self._first(records, width, value) * width
+        while position < len(records) and records[position] == value:
+            yield records[position : position + width]
+            position += width
+
+    def _user(self, username: str) -> Optional[Tuple[int, List[int]]]:
+        name = self._find_string(username)
+        if name is None:
+            return None
+        for record in self._matching("users", len(_USER), name):
+            return record[1], list(self._user_groups[record[2] : record[3]])
+        return None
+
+    def _regex_rules(self, section: str, owner: int) -> RegexRuleSet:
+        return RegexRuleSet(
+            RegexRule(self._string(regex), re.compile(self._string(regex)), priority, self._string(permission), self._string(prefix))
+            for _, priority, regex, permission, prefix in self._matching(section, len(_REGEX), owner)
+        )
+
+    def _load(self, kind: str, grants: str, keys: Iterable[str], username: str) -> Dict[str, PermissionSources]:
+        keys = list(dict.fromkeys(str(key) for key in keys))
+        sources = {key: PermissionSources() for key in keys}
+        user = self._user(username)
+        user_id, group_ids = user if user is not None else (None, [])
+        for key in keys:
+            position = self._find_string(key)
+            if position is None or user_id is None:
+                continue
+            for _, owner, permission in self._matching(f"{grants}_user_grants", len(_GRANT), position):
+                if owner == user_id:
+                    sources[key].user = self._string(permission)
+            for _, owner, permission in self._matching(f"{grants}_group_grants", len(_GRANT), position):
+                if owner in group_ids:
+                    sources[key].groups.append(self._string(permission))
+
+        version = regex_rule_cache.version
+        user_rules = regex_rule_cache.get((kind, "user", username))
+        if user_rules is None:
+            user_rules = self._regex_rules(f"{kind}_user_regexes", user_id) if user_id is not None else RegexRuleSet()
+            regex_rule_cache.set((kind, "user", username), user_rules, version)
+        group_rules = []
+        for group_id in group_ids:
+            rules = regex_rule_cache.get((kind, "group", group_id))
+            if rules is None:
+                rules = self._regex_rules(f"{kind}_group_regexes", group_id)
+                regex_rule_cache.set((kind, "group", group_id), rules, version)
+            group_rules.append(rules)
+        merged_group_rules = RegexRuleSet.merge(group_rules)
+        for source in sources.values():
+            source.regexes = user_rules
+            source.group_regexes = merged_group_rules
+        return sources
+
+    def for_experiments(self, experiment_ids: List[str], username: str) -> Dict[str, PermissionSources]:
+        """Same as ``EffectivePermissionRepository.for_experiments``, read from the snapshot."""
+        return self._load("experiment", "experiment", experiment_ids, username)
+
+    def for_registered_models(self, names: List[str], username: str, prompt: bool = False) -> Dict[str, PermissionSources]:
+        """Same as ``EffectivePermissionRepository.for_registered_models``, read from the snapshot."""
+        return self._load("prompt" if prompt else "registered_model", "model", names, username)
+
+
+class PermissionSnapshotManager:
+    """
+    Keeps the snapshot at ``path`` in line with the permission generations and
+    serves it to this process.
+
+    ``refresh`` is called with the generations read by the permission change
+    poller. The first process to see new generations rebuilds the file, under
+    an exclusive lock on ``path + ".lock"`` and with an atomic rename; the
+    others map the file it wrote. The snapshot is not served after a write made
+    by this process until the poller saw that write, so a worker always reads
+    its own writes.
+    """
+
+    def __init__(self, path: str, session_maker: Callable[[], Session]):
+        self.path = path
+        self._Session = session_maker
+        self._lock = threading.Lock()
+        self._snapshot: Optional[PermissionSnapshot] = None
+        self._version: Optional[int] = None
+        self._retired: Optional[PermissionSnapshot] = None
+
+    @property
+    def snapshot(self) -> Optional[PermissionSnapshot]:
+        """The current snapshot, or None when permissions changed since it was mapped."""
+        snapshot = self._snapshot
+        return snapshot if self._version == permission_decision_cache.version else None
+
+    def refresh(self, generations: Optional[Dict[str, int]]) -> None:
+        """
+        Map a snapshot of ``generations``, building it first when the file on disk is older.
+        :param generations: The permission generations the snapshot must reflect.
+        """
+        if generations is None:
+            return
+        with self._lock:
+            version = permission_decision_cache.version
+            try:
+                snapshot = self._snapshot if self._snapshot is not None and self._snapshot.covers(generations) else self._current_file(generations)
+            except Exception as e:
+                app.logger.warning("Could not load permission snapshot %s: %s", self.path, str(e))
+                if self._snapshot is not None:
+                    self._retire(self._snapshot)
+                self._snapshot = None
+                return
+            previous, self._snapshot, self._version = self._snapshot, snapshot, version
+            if previous is not None and previous is not snapshot:
+                self._retire(previous)
+
+    def _retire(self, snapshot: PermissionSnapshot) -> None:
+        # lookups that started on the replaced snapshot may still be running; it is unmapped on the next swap
+        if self._retired is not None:
+            self._retired.close()
+        self._retired = snapshot
+
+    def _open(self, generations: Dict[str, int]) -> Optional[PermissionSnapshot]:
+        try:
+            snapshot = PermissionSnapshot(self.path)
+        except (FileNotFoundError, ValueError):
+            return None
+        if snapshot.covers(generations):
+            return snapshot
+        snapshot.close()
+        return None
+
+    def _current_file(self, generations: Dict[str, int]) -> PermissionSnapshot:
+        snapshot = self._open(generations)
+        if snapshot is not None:
+            return snapshot
+        with open(self.path + ".lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                # another process may have written it while this one waited for the lock
+                snapshot = self._open(generations)
+                if snapshot is not None:
+                    return snapshot
+                with self._Session() as session:
+                    built_generations, content = build_snapshot(session)
+                directory = os.path.dirname(os.path.abspath(self.path))
+                with tempfile.NamedTemporaryFile(dir=directory, prefix=".permission-snapshot-", delete=False) as f:
+                    f.write(content)
+                os.replace(f.name, self.path)
+                app.logger.debug("Permission snapshot %s rebuilt for generations %s", self.path, built_generations)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+        # the file may already reflect newer generations than the poller saw, which other processes accept as current
+        return PermissionSnapshot(self.path)
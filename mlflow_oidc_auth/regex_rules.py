@@ -0,0 +1,184 @@
+import heapq
+import re
+import threading
+from functools import wraps
+from typing import Dict, Hashable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from mlflow.server import app
+
+from mlflow_oidc_auth.config import config
+from mlflow_oidc_auth.local_cache import LocalCache
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+
+class RegexRule(NamedTuple):
+    regex: str
+    pattern: "re.Pattern[str]"
+    priority: int
+    permission: str
+    prefix: str = ""
+
+
+def literal_prefix(pattern: "re.Pattern[str]") -> str:
+    """
+    Return the literal text every string matched by ``pattern.match`` starts with.
+
+    ``^team-a/.*`` gives ``team-a/``; patterns starting with a class, group,
+    alternation or optional character, and case-insensitive patterns, give ``""``.
+    """
+    if pattern.flags & re.IGNORECASE:
+        return ""
+    prefix = []
+    for position, (opcode, argument) in enumerate(sre_parse.parse(pattern.pattern, pattern.flags)):
+        if opcode == sre_parse.LITERAL:
+            prefix.append(chr(argument))
+        elif not (position == 0 and opcode == sre_parse.AT and argument in (sre_parse.AT_BEGINNING, sre_parse.AT_BEGINNING_STRING)):
+            break
+    return "".join(prefix)
+
+
+class _PrefixTrie:
+    """Indexes of rules by literal prefix, one character per level."""
+
+    __slots__ = ("root",)
+
+    def __init__(self, rules: Tuple[RegexRule, ...]):
+        # a node is (children by character, indexes of the rules whose prefix ends here)
+        self.root: Tuple[Dict[str, tuple], List[int]] = ({}, [])
+        for index, rule in enumerate(rules):
+            node = self.root
+            for char in rule.prefix:
+                node = node[0].setdefault(char, ({}, []))
+            node[1].append(index)
+
+    def candidates(self, name: str) -> Iterator[int]:
+        """Indexes, in ascending order, of the rules whose prefix ``name`` starts with."""
+        found = [self.root[1]]
+        node = self.root
+        for char in name:
+            node = node[0].get(char)
+            if node is None:
+                break
+            if node[1]:
+                found.append(node[1])
+        return iter(found[0]) if len(found) == 1 else heapq.merge(*found)
+
+
+class RegexRuleSet:
+    """
+    Pre-compiled regex permission rules ordered by priority.
+
+    Rules with the same priority keep the order they were given in. Rules are
+    indexed by their literal prefix, so matching a name only runs the patterns
+    that can match it.
+    """
+
+    __slots__ = ("rules", "_trie")
+
+    def __init__(self, rules: Iterable[RegexRule] = ()):
+        self.rules = tuple(sorted(rules, key=lambda rule: rule.priority))
+        self._trie: Optional[_PrefixTrie] = None
+
+    @classmethod
+    def compile(cls, regexes) -> "RegexRuleSet":
+        """
+        Build a rule set from objects with ``regex``, ``priority`` and ``permission`` attributes.
+        Rule sets are returned unchanged.
+        """
+        if isinstance(regexes, cls):
+            return regexes
+        rules = []
+        for regex in regexes:
+            try:
+                pattern = re.compile(regex.regex)
+            except re.error as e:
+                app.logger.warning("Skipping invalid permission regex %s: %s", regex.regex, str(e))
+                continue
+            rules.append(RegexRule(regex.regex, pattern, regex.priority, regex.permission, literal_prefix(pattern)))
+        return cls(rules)
+
+    @classmethod
+    def merge(cls, rule_sets: Iterable["RegexRuleSet"]) -> "RegexRuleSet":
+        merged = cls()
+        merged.rules = tuple(heapq.merge(*(rule_set.rules for rule_set in rule_sets), key=lambda rule: rule.priority))
+        return merged
+
+    def match(self, name: str) -> Optional[RegexRule]:
+        """Return the highest priority rule matching the start of ``name``, like ``re.match``."""
+        if not self.rules:
+            return None
+        if self._trie is None:
+            # built on first use, merged rule sets are often only matched once
+            self._trie = _PrefixTrie(self.rules)
+        for index in self._trie.candidates(name):
+            rule = self.rules[index]
+            if rule.pattern.match(name):
+                return rule
+        return None
+
+    def __iter__(self) -> Iterator[RegexRule]:
+        return iter(self.rules)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def _key(self):
+        return [(rule.regex, rule.priority, rule.permission) for rule in self.rules]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, RegexRuleSet) and self._key() == other._key()
+
+    def __repr__(self) -> str:
+        return f"RegexRuleSet({self._key()})"
+
+
+class RegexRuleCache:
+    """
+    Compiled regex rule sets by principal.
+
+    Every change to a regex permission bumps ``version`` and drops all rule
+    sets. A rule set loaded from the database is only stored when no change
+    happened since the version was read, so a load racing with a change never
+    brings stale rules back.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self._cache = LocalCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def get(self, key: Hashable) -> Optional[RegexRuleSet]:
+        return self._cache.get(key)
+
+    def set(self, key: Hashable, rule_set: RegexRuleSet, version: int) -> None:
+        with self._lock:
+            if version == self.version:
+                self._cache.set(key, rule_set)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._cache.clear()
+
+    def stats(self):
+        return {**self._cache.stats(), "version": self.version}
+
+
+regex_rule_cache = RegexRuleCache(maxsize=config.OIDC_REGEX_CACHE_SIZE, ttl=config.OIDC_REGEX_CACHE_TTL)
+
+
+def invalidates_regex_rules(f):
+    """Drop the cached regex rule sets once the decorated repository method has committed."""
+
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        try:
+            return f(*args, **kwargs)
+        finally:
+            regex_rule_cache.invalidate()
+
+    return wrapper
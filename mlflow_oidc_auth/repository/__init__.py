@@ -1,10 +1,14 @@
+from mlflow_oidc_auth.repository.effective_permission import EffectivePermissionRepository
 from mlflow_oidc_auth.repository.experiment_permission import ExperimentPermissionRepository
 from mlflow_oidc_auth.repository.experiment_permission_group import ExperimentPermissionGroupRepository
 from mlflow_oidc_auth.repository.group import GroupRepository
+from mlflow_oidc_auth.repository.materialized_permission import MaterializedPermissionRepository
+from mlflow_oidc_auth.repository.permission_generation import PermissionGenerationRepository
 from mlflow_oidc_auth.repository.prompt_permission_group import PromptPermissionGroupRepository
 from mlflow_oidc_auth.repository.registered_model_permission import RegisteredModelPermissionRepository
 from mlflow_oidc_auth.repository.registered_model_permission_group import RegisteredModelPermissionGroupRepository
 from mlflow_oidc_auth.repository.user import UserRepository
+from mlflow_oidc_auth.repository.user_api_key import UserApiKeyRepository
 from mlflow_oidc_auth.repository.experiment_permission_regex import ExperimentPermissionRegexRepository
 from mlflow_oidc_auth.repository.experiment_permission_regex_group import ExperimentPermissionGroupRegexRepository
 from mlflow_oidc_auth.repository.registered_model_permission_regex import RegisteredModelPermissionRegexRepository
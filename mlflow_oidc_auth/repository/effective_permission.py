@@ -0,0 +1,256 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import Integer, String, cast, literal, null, select, union_all
+from sqlalchemy.orm import Session
+
+from mlflow_oidc_auth.db.models import (
+    SqlExperimentGroupPermission,
+    SqlExperimentGroupRegexPermission,
+    SqlExperimentPermission,
+    SqlExperimentRegexPermission,
+    SqlRegisteredModelGroupPermission,
+    SqlRegisteredModelGroupRegexPermission,
+    SqlRegisteredModelPermission,
+    SqlRegisteredModelRegexPermission,
+    SqlUser,
+    SqlUserGroup,
+)
+from mlflow_oidc_auth.permissions import compare_permissions
+from mlflow_oidc_auth.regex_rules import RegexRuleSet, regex_rule_cache
+
+# keeps the number of bound parameters well below the SQLite limit
+_MAX_KEYS_PER_QUERY = 500
+
+
+@dataclass
+class PermissionSources:
+    """
+    Everything the permission sources know about one user and one resource.
+
+    ``regexes`` and ``group_regexes`` hold the compiled regex rules of the user
+    and of the user's groups, ordered by priority; matching them against the
+    resource name is left to the caller.
+    """
+
+    user: Optional[str] = None
+    groups: List[str] = field(default_factory=list)
+    regexes: RegexRuleSet = field(default_factory=RegexRuleSet)
+    group_regexes: RegexRuleSet = field(default_factory=RegexRuleSet)
+
+    @property
+    def group(self) -> Optional[str]:
+        """The highest priority permission granted to any of the user's groups."""
+        winner = None
+        for permission in self.groups:
+            if winner is None or compare_permissions(winner, permission):
+                winner = permission
+        return winner
+
+
+class EffectivePermissionRepository:
+    """
+    Loads the direct grant, group grants and regex rules that decide a user's
+    permission on a resource with a single UNION ALL query, or on a batch of
+    resources with one query per 500 resources.
+
+    Regex rules are compiled once per user and per group and kept in
+    ``regex_rule_cache``; they are only read from the database when missing
+    from the cache.
+    """
+
+    def __init__(self, session_maker):
+        self._Session: Callable[[], Session] = session_maker
+
+    @staticmethod
+    def _user_id(username: str):
+        return select(SqlUser.id).where(SqlUser.username == username).scalar_subquery()
+
+    @staticmethod
+    def _group_ids(user_id):
+        return select(SqlUserGroup.group_id).where(SqlUserGroup.user_id == user_id)
+
+    @staticmethod
+    def _grant_rows(source: str, key_column, permission_column, condition):
+        return select(
+            literal(source, String).label("source"),
+            cast(key_column, String).label("resource"),
+            permission_column.label("permission"),
+            cast(null(), String).label("regex"),
+            cast(null(), Integer).label("priority"),
+            cast(null(), Integer).label("owner_id"),
+        ).where(condition)
+
+    @staticmethod
+    def _membership_rows(user_id):
+        return select(
+            literal("member", String).label("source"),
+            cast(null(), String).label("resource"),
+            cast(null(), String).label("permission"),
+            cast(null(), String).label("regex"),
+            cast(null(), Integer).label("priority"),
+            SqlUserGroup.group_id.label("owner_id"),
+        ).where(SqlUserGroup.user_id == user_id)
+
+    @staticmethod
+    def _regex_rows(source: str, model, owner_column, condition):
+        return select(
+            literal(source, String).label("source"),
+            cast(null(), String).label("resource"),
+            model.permission.label("permission"),
+            model.regex.label("regex"),
+            model.priority.label("priority"),
+            owner_column.label("owner_id"),
+        ).where(condition)
+
+    def _load(
+        self,
+        kind: str,
+        keys: List[str],
+        username: str,
+        grant_rows: Callable[[List[str]], list],
+        user_regex_rows,
+        group_regex_rows: Callable[[List[int]], object],
+    ) -> Dict[str, PermissionSources]:
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        version = regex_rule_cache.version
+        user_rules = regex_rule_cache.get((kind, "user", username))
+        rows = []
+        with self._Session() as session:
+            # memberships and regex rules do not depend on the resource and are only loaded with the first chunk
+            for start in range(0, len(keys), _MAX_KEYS_PER_QUERY):
+                parts = grant_rows(keys[start : start + _MAX_KEYS_PER_QUERY])
+                if start == 0:
+                    parts.append(self._membership_rows(self._user_id(username)))
+                    if user_rules is None:
+                        parts.append(user_regex_rows)
+                rows.extend(session.execute(union_all(*parts)).all())
+            group_ids = sorted(row.owner_id for row in rows if row.source == "member")
+            group_rules = {group_id: regex_rule_cache.get((kind, "group", group_id)) for group_id in group_ids}
+            missing = [group_id for group_id, rules in group_rules.items() if rules is None]
+            if missing:
+                rows.extend(session.execute(group_regex_rows(missing)).all())
+
+        sources = {key: PermissionSources() for key in keys}
+        loaded_user_regexes, loaded_group_regexes = [], defaultdict(list)
+        for row in rows:
+            if row.source == "user":
+                sources[row.resource].user = row.permission
+            elif row.source == "group":
+                sources[row.resource].groups.append(row.permission)
+            elif row.source == "regex":
+                loaded_user_regexes.append(row)
+            elif row.source == "group-regex":
+                loaded_group_regexes[row.owner_id].append(row)
+
+        if user_rules is None:
+            user_rules = RegexRuleSet.compile(loaded_user_regexes)
+            regex_rule_cache.set((kind, "user", username), user_rules, version)
+        for group_id in missing:
+            group_rules[group_id] = RegexRuleSet.compile(loaded_group_regexes[group_id])
+            regex_rule_cache.set((kind, "group", group_id), group_rules[group_id], version)
+        merged_group_rules = RegexRuleSet.merge(group_rules[group_id] for group_id in group_ids)
+        for source in sources.values():
+            source.regexes = user_rules
+            source.group_regexes = merged_group_rules
+        return sources
+
+    def for_experiments(self, experiment_ids: List[str], username: str) -> Dict[str, PermissionSources]:
+        """
+        Load the permission sources of a user for many experiments at once.
+        :param experiment_ids: The IDs of the experiments.
+        :param username: The username of the user.
+        :return: The permission sources by experiment ID; the regex rule sets are shared between entries.
+        """
+        user_id = self._user_id(username)
+        group_ids = self._group_ids(user_id)
+        return self._load(
+            "experiment",
+            experiment_ids,
+            username,
+            lambda chunk: [
+                self._grant_rows(
+                    "user",
+                    SqlExperimentPermission.experiment_id,
+                    SqlExperimentPermission.permission,
+                    (SqlExperimentPermission.experiment_id.in_(chunk)) & (SqlExperimentPermission.user_id == user_id),
+                ),
+                self._grant_rows(
+                    "group",
+                    SqlExperimentGroupPermission.experiment_id,
+                    SqlExperimentGroupPermission.permission,
+                    (SqlExperimentGroupPermission.experiment_id.in_(chunk)) & (SqlExperimentGroupPermission.group_id.in_(group_ids)),
+                ),
+            ],
+            self._regex_rows("regex", SqlExperimentRegexPermission, SqlExperimentRegexPermission.user_id, SqlExperimentRegexPermission.user_id == user_id),
+            lambda missing: self._regex_rows(
+                "group-regex",
+                SqlExperimentGroupRegexPermission,
+                SqlExperimentGroupRegexPermission.group_id,
+                SqlExperimentGroupRegexPermission.group_id.in_(missing),
+            ),
+        )
+
+    def for_registered_models(self, names: List[str], username: str, prompt: bool = False) -> Dict[str, PermissionSources]:
+        """
+        Load the permission sources of a user for many registered models or prompts at once.
+        :param names: The names of the registered models or prompts.
+        :param username: The username of the user.
+        :param prompt: Use the prompt regex rules instead of the registered model ones.
+        :return: The permission sources by name; the regex rule sets are shared between entries.
+        """
+        user_id = self._user_id(username)
+        group_ids = self._group_ids(user_id)
+        return self._load(
+            "prompt" if prompt else "registered_model",
+            names,
+            username,
+            lambda chunk: [
+                self._grant_rows(
+                    "user",
+                    SqlRegisteredModelPermission.name,
+                    SqlRegisteredModelPermission.permission,
+                    (SqlRegisteredModelPermission.name.in_(chunk)) & (SqlRegisteredModelPermission.user_id == user_id),
+                ),
+                self._grant_rows(
+                    "group",
+                    SqlRegisteredModelGroupPermission.name,
+                    SqlRegisteredModelGroupPermission.permission,
+                    (SqlRegisteredModelGroupPermission.name.in_(chunk)) & (SqlRegisteredModelGroupPermission.group_id.in_(group_ids)),
+                ),
+            ],
+            self._regex_rows(
+                "regex",
+                SqlRegisteredModelRegexPermission,
+                SqlRegisteredModelRegexPermission.user_id,
+                (SqlRegisteredModelRegexPermission.user_id == user_id) & (SqlRegisteredModelRegexPermission.prompt == prompt),
+            ),
+            lambda missing: self._regex_rows(
+                "group-regex",
+                SqlRegisteredModelGroupRegexPermission,
+                SqlRegisteredModelGroupRegexPermission.group_id,
+                (SqlRegisteredModelGroupRegexPermission.group_id.in_(missing)) & (SqlRegisteredModelGroupRegexPermission.prompt == prompt),
+            ),
+        )
+
+    def for_experiment(self, experiment_id: str, username: str) -> PermissionSources:
+        """
+        Load the permission sources of a user for an experiment.
+        :param experiment_id: The ID of the experiment.
+        :param username: The username of the user.
+        :return: The permission sources; empty when the user does not exist.
+        """
+        return self.for_experiments([experiment_id], username)[experiment_id]
+
+    def for_registered_model(self, name: str, username: str, prompt: bool = False) -> PermissionSources:
+        """
+        Load the permission sources of a user for a registered model or a prompt.
+        :param name: The name of the registered model or prompt.
+        :param username: The username of the user.
+        :param prompt: Use the prompt regex rules instead of the registered model ones.
+        :return: The permission sources; empty when the user does not exist.
+        """
+        return self.for_registered_models([name], username, prompt)[name]
@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from mlflow_oidc_auth.db.models import SqlExperimentRegexPermission
 from mlflow_oidc_auth.entities import ExperimentRegexPermission
 from mlflow_oidc_auth.permissions import _validate_permission
+from mlflow_oidc_auth.regex_rules import invalidates_regex_rules
 from mlflow_oidc_auth.repository.utils import get_user, validate_regex
 
 
@@ -37,6 +38,7 @@ class ExperimentPermissionRegexRepository:
         except MultipleResultsFound:
             raise MlflowException(f"Multiple Permissions found for user_id: {user_id}, and id: {id}", INVALID_STATE)
 
+    @invalidates_regex_rules
     def grant(
         self,
         regex: str,
@@ -86,6 +88,7 @@ class ExperimentPermissionRegexRepository:
             )
             return [r.to_mlflow_entity() for r in rows]
 
+    @invalidates_regex_rules
     def update(self, regex: str, priority: int, permission: str, username: str, id: int) -> ExperimentRegexPermission:
         validate_regex(regex)
         _validate_permission(permission)
@@ -98,6 +101,7 @@ class ExperimentPermissionRegexRepository:
             session.flush()
             return perm.to_mlflow_entity()
 
+    @invalidates_regex_rules
     def revoke(self, username: str, id: int) -> None:
         with self._Session() as session:
             user = get_user(session, username)
@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from mlflow_oidc_auth.db.models import SqlExperimentGroupRegexPermission
 from mlflow_oidc_auth.entities import ExperimentGroupRegexPermission
 from mlflow_oidc_auth.permissions import _validate_permission
+from mlflow_oidc_auth.regex_rules import invalidates_regex_rules
 from mlflow_oidc_auth.repository.utils import get_group, get_user, list_user_groups, validate_regex
 
 
@@ -45,6 +46,7 @@ class ExperimentPermissionGroupRegexRepository:
             .all()
         )
 
+    @invalidates_regex_rules
     def grant(self, group_name: str, regex: str, priority: int, permission: str) -> ExperimentGroupRegexPermission:
         _validate_permission(permission)
         validate_regex(regex)
@@ -61,6 +63,7 @@ class ExperimentPermissionGroupRegexRepository:
             perm = self._get_experiment_group_regex_permission(session, id, group.id)
             return perm.to_mlflow_entity()
 
+    @invalidates_regex_rules
     def update(self, id: int, group_name: str, regex: str, priority: int, permission: str) -> ExperimentGroupRegexPermission:
         _validate_permission(permission)
         validate_regex(regex)
@@ -73,6 +76,7 @@ class ExperimentPermissionGroupRegexRepository:
             session.commit()
             return perm.to_mlflow_entity()
 
+    @invalidates_regex_rules
     def revoke(self, group_name: str, id: int) -> None:
         with self._Session() as session:
             group = get_group(session, group_name)
@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 
 from mlflow_oidc_auth.db.models import SqlGroup, SqlUser, SqlUserGroup
 from mlflow_oidc_auth.entities import User
+from mlflow_oidc_auth.regex_rules import invalidates_regex_rules
 from mlflow_oidc_auth.repository.utils import get_group, get_user, list_user_groups
 
 
@@ -49,6 +50,7 @@ class GroupRepository:
         with self._Session() as session:
             return [g.group_name for g in session.query(SqlGroup).all()]
 
+    @invalidates_regex_rules
     def delete_group(self, group_name: str) -> None:
         """
         Delete a group by its name.
@@ -0,0 +1,217 @@
+import hashlib
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from mlflow.exceptions import MlflowException
+from sqlalchemy import Select, delete, event, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from mlflow_oidc_auth.db.models import (
+    SqlEffectivePermission,
+    SqlExperimentGroupPermission,
+    SqlExperimentGroupRegexPermission,
+    SqlExperimentPermission,
+    SqlExperimentRegexPermission,
+    SqlGroup,
+    SqlPermissionGeneration,
+    SqlRegisteredModelGroupPermission,
+    SqlRegisteredModelGroupRegexPermission,
+    SqlRegisteredModelPermission,
+    SqlRegisteredModelRegexPermission,
+    SqlUser,
+    SqlUserGroup,
+)
+from mlflow_oidc_auth.repository.permission_generation import EXPERIMENT, GROUP, PROMPT, REGISTERED_MODEL, USER, bump_generations
+
+# (permission name, permission source)
+Decision = Tuple[str, str]
+
+# keeps the number of bound parameters well below the SQLite limit
+_MAX_KEYS_PER_QUERY = 500
+
+_MODEL_TYPES = (REGISTERED_MODEL, PROMPT)
+
+
+def _members(group_id):
+    return select(SqlUserGroup.user_id).where(SqlUserGroup.group_id == group_id)
+
+
+def _regex_types(obj) -> Tuple[str, ...]:
+    return (PROMPT,) if obj.prompt else (REGISTERED_MODEL,)
+
+
+# for every changed row: (users whose rows are stale, resource types, resource key or None for all resources)
+_STALE_ROWS = {
+    SqlExperimentPermission: lambda obj: (obj.user_id, (EXPERIMENT,), obj.experiment_id),
+    SqlExperimentGroupPermission: lambda obj: (_members(obj.group_id), (EXPERIMENT,), obj.experiment_id),
+    SqlExperimentRegexPermission: lambda obj: (obj.user_id, (EXPERIMENT,), None),
+    SqlExperimentGroupRegexPermission: lambda obj: (_members(obj.group_id), (EXPERIMENT,), None),
+    # grants on registered models apply to prompts of the same name as well
+    SqlRegisteredModelPermission: lambda obj: (obj.user_id, _MODEL_TYPES, obj.name),
+    SqlRegisteredModelGroupPermission: lambda obj: (_members(obj.group_id), _MODEL_TYPES, obj.name),
+    SqlRegisteredModelRegexPermission: lambda obj: (obj.user_id, _regex_types(obj), None),
+    SqlRegisteredModelGroupRegexPermission: lambda obj: (_members(obj.group_id), _regex_types(obj), None),
+    SqlUserGroup: lambda obj: (obj.user_id, (EXPERIMENT,) + _MODEL_TYPES, None),
+    SqlGroup: lambda obj: (_members(obj.id), (EXPERIMENT,) + _MODEL_TYPES, None),
+}
+
+
+def _forget_stale_rows(session: Session, obj) -> None:
+    stale_rows = _STALE_ROWS.get(type(obj))
+    if stale_rows is None:
+        return
+    users, resource_types, resource_key = stale_rows(obj)
+    statement = delete(SqlEffectivePermission).where(SqlEffectivePermission.resource_type.in_(resource_types))
+    if resource_key is not None:
+        statement = statement.where(SqlEffectivePermission.resource_key == str(resource_key))
+    if isinstance(users, Select):
+        statement = statement.where(SqlEffectivePermission.user_id.in_(users))
+    elif users is not None:
+        statement = statement.where(SqlEffectivePermission.user_id == users)
+    session.execute(statement.execution_options(synchronize_session=False))
+
+
+def _before_flush(session: Session, flush_context, instances) -> None:
+    for obj in list(session.new) + list(session.deleted):
+        _forget_stale_rows(session, obj)
+    for obj in list(session.dirty):
+        if session.is_modified(obj, include_collections=False):
+            _forget_stale_rows(session, obj)
+
+
+def _do_orm_execute(orm_execute_state):
+    # bulk query(...).update() / .delete() do not go through a flush: look up the rows they change
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return None
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ not in _STALE_ROWS:
+        return None
+    session, model = orm_execute_state.session, mapper.class_
+    where = orm_execute_state.statement.whereclause
+    changed = session.scalars(select(model) if where is None else select(model).where(where)).all()
+    for obj in changed:
+        _forget_stale_rows(session, obj)
+    if orm_execute_state.is_delete:
+        return None
+    # an update may also move rows to other users, groups or resources
+    result = orm_execute_state.invoke_statement()
+    for obj in changed:
+        session.refresh(obj)
+        _forget_stale_rows(session, obj)
+    return result
+
+
+def track_materialized_permissions(session_factory) -> None:
+    """
+    Delete the materialized permissions a write to grants, regex rules, groups or memberships
+    made stale, in the same transaction as the write. Register after ``track_permission_generations``:
+    writers then lock the generations before touching ``effective_permissions``.
+    """
+    event.listen(session_factory, "before_flush", _before_flush)
+    event.listen(session_factory, "do_orm_execute", _do_orm_execute)
+
+
+def config_fingerprint(default_permission: str, source_order: List[str]) -> str:
+    """Identify the configuration permissions are resolved under; rows resolved under another one are not served."""
+    return hashlib.sha256(f"{default_permission}|{','.join(source_order)}".encode("utf-8")).hexdigest()[:16]
+
+
+class MaterializedPermissionRepository:
+    """
+    The ``effective_permissions`` table: the permission every user has on every resource,
+    computed from the permission sources and kept up to date by deleting rows as they go stale.
+
+    Rows are only written together with the permission generations they were computed under;
+    a row computed while a conflicting write committed is never stored. Rows are also keyed by the
+    fingerprint of the default permission and the permission source order they were resolved under,
+    so workers running with different configurations keep separate rows.
+    """
+
+    def __init__(self, session_maker, config: str):
+        self._Session: Callable[[], Session] = session_maker
+        self._config = config
+
+    def get(self, resource_type: str, keys: List[str], username: str) -> Dict[str, Decision]:
+        """
+        Look up the materialized permissions of a user.
+        :param resource_type: experiment, registered_model or prompt.
+        :param keys: The experiment IDs or the names of the registered models or prompts.
+        :param username: The username of the user.
+        :return: The permission and its source by key; keys without a row are left out.
+        """
+        keys = list(dict.fromkeys(str(key) for key in keys))
+        decisions = {}
+        with self._Session() as session:
+            user_id = session.scalar(select(SqlUser.id).where(SqlUser.username == username))
+            if user_id is None:
+                return {}
+            for start in range(0, len(keys), _MAX_KEYS_PER_QUERY):
+                rows = session.execute(
+                    select(SqlEffectivePermission.resource_key, SqlEffectivePermission.permission, SqlEffectivePermission.source).where(
+                        SqlEffectivePermission.user_id == user_id,
+                        SqlEffectivePermission.resource_type == resource_type,
+                        SqlEffectivePermission.resource_key.in_(keys[start : start + _MAX_KEYS_PER_QUERY]),
+                        SqlEffectivePermission.config == self._config,
+                    )
+                )
+                decisions.update((key, (permission, source)) for key, permission, source in rows)
+        return decisions
+
+    def put(self, resource_type: str, decisions: Dict[str, Decision], username: str, generations: Dict[str, int], replace: bool = False) -> bool:
+        """
+        Store permissions of a user unless permissions changed since they were computed.
+        :param resource_type: experiment, registered_model or prompt.
+        :param decisions: The permission and its source by key.
+        :param username: The username of the user.
+        :param generations: The permission generations read before computing the permissions.
+        :param replace: Drop all other rows of the user for the resource type, including rows of other configurations.
+        :return: Whether the permissions were stored.
+        """
+        scopes = (USER, GROUP, resource_type)
+        rows = [{"resource_key": str(key), "permission": permission, "source": source} for key, (permission, source) in decisions.items()]
+        try:
+            with self._Session() as session:
+                # writers bump the generations before deleting stale rows, so this lock orders them against the insert
+                current = dict(
+                    session.execute(
+                        select(SqlPermissionGeneration.scope, SqlPermissionGeneration.generation)
+                        .where(SqlPermissionGeneration.scope.in_(scopes))
+                        .with_for_update()
+                    ).all()
+                )
+                if any(current.get(scope) != generations.get(scope) for scope in scopes):
+                    return False
+                user_id = session.scalar(select(SqlUser.id).where(SqlUser.username == username))
+                if user_id is None:
+                    return False
+                stale = delete(SqlEffectivePermission).where(SqlEffectivePermission.user_id == user_id, SqlEffectivePermission.resource_type == resource_type)
+                if replace:
+                    session.execute(stale)
+                else:
+                    stale = stale.where(SqlEffectivePermission.config == self._config)
+                    for start in range(0, len(rows), _MAX_KEYS_PER_QUERY):
+                        keys = [row["resource_key"] for row in rows[start : start + _MAX_KEYS_PER_QUERY]]
+                        session.execute(stale.where(SqlEffectivePermission.resource_key.in_(keys)))
+                if rows:
+                    session.execute(
+                        insert(SqlEffectivePermission), [{**row, "user_id": user_id, "resource_type": resource_type, "config": self._config} for row in rows]
+                    )
+        except MlflowException as e:
+            # another worker stored the same permissions first
+            if isinstance(e.__cause__, IntegrityError):
+                return False
+            raise
+        return True
+
+    def forget(self, resource_type: str, keys: Iterable[str]) -> None:
+        """
+        Drop the materialized permissions of all users on resources that were created, renamed or deleted.
+        :param resource_type: experiment, registered_model or prompt.
+        :param keys: The experiment IDs or the names of the registered models or prompts.
+        """
+        keys = [str(key) for key in keys]
+        with self._Session() as session:
+            bump_generations(session, {resource_type})
+            session.execute(
+                delete(SqlEffectivePermission).where(SqlEffectivePermission.resource_type == resource_type, SqlEffectivePermission.resource_key.in_(keys))
+            )
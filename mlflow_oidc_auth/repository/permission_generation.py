@@ -0,0 +1,117 @@
+from typing import Callable, Dict, Iterable, Set
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+
+from mlflow_oidc_auth.db.models import (
+    SqlExperimentGroupPermission,
+    SqlExperimentGroupRegexPermission,
+    SqlExperimentPermission,
+    SqlExperimentRegexPermission,
+    SqlGroup,
+    SqlPermissionGeneration,
+    SqlRegisteredModelGroupPermission,
+    SqlRegisteredModelGroupRegexPermission,
+    SqlRegisteredModelPermission,
+    SqlRegisteredModelRegexPermission,
+    SqlUser,
+    SqlUserApiKey,
+    SqlUserGroup,
+)
+
+USER, GROUP, EXPERIMENT, REGISTERED_MODEL, PROMPT = "user", "group", "experiment", "registered_model", "prompt"
+
+_SCOPES_BY_MODEL = {
+    SqlUser: (USER,),
+    SqlUserApiKey: (USER,),
+    SqlGroup: (GROUP,),
+    SqlUserGroup: (USER, GROUP),
+    SqlExperimentPermission: (EXPERIMENT,),
+    SqlExperimentGroupPermission: (EXPERIMENT,),
+    SqlExperimentRegexPermission: (EXPERIMENT,),
+    SqlExperimentGroupRegexPermission: (EXPERIMENT,),
+    # prompts share the registered model tables, user grants have no prompt flag
+    SqlRegisteredModelPermission: (REGISTERED_MODEL, PROMPT),
+    SqlRegisteredModelGroupPermission: (REGISTERED_MODEL, PROMPT),
+    SqlRegisteredModelRegexPermission: (REGISTERED_MODEL, PROMPT),
+    SqlRegisteredModelGroupRegexPermission: (REGISTERED_MODEL, PROMPT),
+}
+
+
+def _scopes_of(obj) -> Iterable[str]:
+    scopes = _SCOPES_BY_MODEL.get(type(obj), ())
+    if PROMPT in scopes and hasattr(obj, "prompt"):
+        return (PROMPT,) if obj.prompt else (REGISTERED_MODEL,)
+    return scopes
+
+
+def bump_generations(session: Session, scopes: Set[str]) -> None:
+    """
+    Increment the generation of scopes in the transaction of ``session``.
+    :param session: The session that made the change.
+    :param scopes: The scopes whose data changed.
+    """
+    if not scopes:
+        return
+    result = session.execute(
+        update(SqlPermissionGeneration)
+        .where(SqlPermissionGeneration.scope.in_(scopes))
+        .values(generation=SqlPermissionGeneration.generation + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount < len(scopes):
+        # the migration creates a row per scope, this only happens for tables created without it
+        existing = set(session.scalars(select(SqlPermissionGeneration.scope).where(SqlPermissionGeneration.scope.in_(scopes))))
+        session.execute(insert(SqlPermissionGeneration), [{"scope": scope, "generation": 1} for scope in sorted(scopes - existing)])
+
+
+def _before_flush(session: Session, flush_context, instances) -> None:
+    scopes = set()
+    for obj in session.new:
+        scopes.update(_scopes_of(obj))
+    for obj in session.deleted:
+        scopes.update(_scopes_of(obj))
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            scopes.update(_scopes_of(obj))
+    bump_generations(session, scopes)
+
+
+def _do_orm_execute(orm_execute_state) -> None:
+    # bulk query(...).update() / .delete() do not go through a flush
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ is SqlPermissionGeneration:
+        return
+    bump_generations(orm_execute_state.session, set(_SCOPES_BY_MODEL.get(mapper.class_, ())))
+
+
+def track_permission_generations(session_factory) -> None:
+    """
+    Bump the generation of the affected scopes whenever a session made by ``session_factory``
+    writes users, groups, memberships or permissions, in the same transaction as the write.
+    """
+    event.listen(session_factory, "before_flush", _before_flush)
+    event.listen(session_factory, "do_orm_execute", _do_orm_execute)
+
+
+class PermissionGenerationRepository:
+    def __init__(self, session_maker):
+        self._Session: Callable[[], Session] = session_maker
+
+    def bump(self, scopes: Set[str]) -> None:
+        """
+        Announce a change that is not a write to the auth database, such as an experiment rename.
+        :param scopes: The scopes whose permissions may have changed.
+        """
+        with self._Session() as session:
+            bump_generations(session, scopes)
+
+    def snapshot(self) -> Dict[str, int]:
+        """
+        Read the generation of every scope.
+        :return: The generations by scope.
+        """
+        with self._Session() as session:
+            return {scope: generation for scope, generation in session.execute(select(SqlPermissionGeneration.scope, SqlPermissionGeneration.generation))}
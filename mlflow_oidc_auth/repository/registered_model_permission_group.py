@@ -1,33 +1,18 @@
-from typing import List, Optional, Callable
+from typing import List, Callable
 from sqlalchemy.orm import Session
 
 from mlflow.exceptions import MlflowException
 from mlflow.protos.databricks_pb2 import RESOURCE_DOES_NOT_EXIST
 
-from mlflow_oidc_auth.db.models import SqlGroup, SqlRegisteredModelGroupPermission
+from mlflow_oidc_auth.db.models import SqlRegisteredModelGroupPermission, SqlUser, SqlUserGroup
 from mlflow_oidc_auth.entities import RegisteredModelPermission
-from mlflow_oidc_auth.permissions import _validate_permission, compare_permissions
-from mlflow_oidc_auth.repository import GroupRepository
-from mlflow_oidc_auth.repository.utils import get_user, get_group, list_user_groups
+from mlflow_oidc_auth.permissions import _validate_permission
+from mlflow_oidc_auth.repository.utils import get_user, get_group, list_user_groups, permission_priority
 
 
 class RegisteredModelPermissionGroupRepository:
     def __init__(self, session_maker):
         self._Session: Callable[[], Session] = session_maker
-        self._group_repo = GroupRepository(session_maker)
-
-    def _get_registered_model_group_permission(self, session: Session, name: str, group_name: str) -> Optional[SqlRegisteredModelGroupPermission]:
-        group = session.query(SqlGroup).filter(SqlGroup.group_name == group_name).one_or_none()
-        if group is None:
-            return None
-        return (
-            session.query(SqlRegisteredModelGroupPermission)
-            .filter(
-                SqlRegisteredModelGroupPermission.name == name,
-                SqlRegisteredModelGroupPermission.group_id == group.id,
-            )
-            .one_or_none()
-        )
 
     def create(self, group_name: str, name: str, permission: str):
         _validate_permission(permission)
@@ -45,34 +30,27 @@ class RegisteredModelPermissionGroupRepository:
             return [p.to_mlflow_entity() for p in perms]
 
     def get_for_user(self, name: str, username: str) -> RegisteredModelPermission:
+        """
+        Get the highest priority registered model or prompt permission granted to any group of a user.
+        :param name: The name of the registered model or prompt.
+        :param username: The username of the user.
+        :return: The registered model permission for the user.
+        """
         with self._Session() as session:
-            user_groups = self._group_repo.list_groups_for_user(username)
-            user_perms: Optional[SqlRegisteredModelGroupPermission] = None
-            for ug in user_groups:
-                perms = self._get_registered_model_group_permission(session, name, ug)
-                if perms is None:
-                    continue
-                if user_perms is None:
-                    user_perms = perms
-                    continue
-                try:
-                    if compare_permissions(str(user_perms.permission), str(perms.permission)):
-                        user_perms = perms
-                except AttributeError:
-                    user_perms = perms
-            try:
-                if user_perms is not None:
-                    return user_perms.to_mlflow_entity()
-                else:
-                    raise MlflowException(
-                        f"Registered model permission with name={name} and username={username} not found",
-                        RESOURCE_DOES_NOT_EXIST,
-                    )
-            except AttributeError:
+            perm = (
+                session.query(SqlRegisteredModelGroupPermission)
+                .join(SqlUserGroup, SqlUserGroup.group_id == SqlRegisteredModelGroupPermission.group_id)
+                .join(SqlUser, SqlUser.id == SqlUserGroup.user_id)
+                .filter(SqlUser.username == username, SqlRegisteredModelGroupPermission.name == name)
+                .order_by(permission_priority(SqlRegisteredModelGroupPermission.permission).desc(), SqlRegisteredModelGroupPermission.group_id)
+                .first()
+            )
+            if perm is None:
                 raise MlflowException(
                     f"Registered model permission with name={name} and username={username} not found",
                     RESOURCE_DOES_NOT_EXIST,
                 )
+            return perm.to_mlflow_entity()
 
     def list_for_user(self, username: str) -> List[RegisteredModelPermission]:
         with self._Session() as session:
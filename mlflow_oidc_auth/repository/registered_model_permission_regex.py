@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from mlflow_oidc_auth.db.models import SqlRegisteredModelRegexPermission
 from mlflow_oidc_auth.entities import RegisteredModelRegexPermission
 from mlflow_oidc_auth.permissions import _validate_permission
+from mlflow_oidc_auth.regex_rules import invalidates_regex_rules
 from mlflow_oidc_auth.repository.utils import get_user, validate_regex
 
 
@@ -39,6 +40,7 @@ class RegisteredModelPermissionRegexRepository:
         except MultipleResultsFound:
             raise MlflowException(f"Multiple Permissions found for user_id: {user_id} and id: {id}", INVALID_STATE)
 
+    @invalidates_regex_rules
     def grant(
         self,
         regex: str,
@@ -88,6 +90,7 @@ class RegisteredModelPermissionRegexRepository:
             )
             return [p.to_mlflow_entity() for p in perms]
 
+    @invalidates_regex_rules
     def update(self, id: int, regex: str, priority: int, permission: str, username: str, prompt: bool = False) -> RegisteredModelRegexPermission:
         validate_regex(regex)
         _validate_permission(permission)
@@ -99,6 +102,7 @@ class RegisteredModelPermissionRegexRepository:
             session.commit()
             return perm.to_mlflow_entity()
 
+    @invalidates_regex_rules
     def revoke(self, id: int, username: str, prompt: bool = False) -> None:
         with self._Session() as session:
             user = get_user(session, username)
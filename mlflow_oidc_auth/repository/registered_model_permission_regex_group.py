@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from mlflow_oidc_auth.db.models import SqlRegisteredModelGroupRegexPermission
 from mlflow_oidc_auth.entities import RegisteredModelGroupRegexPermission
 from mlflow_oidc_auth.permissions import _validate_permission
+from mlflow_oidc_auth.regex_rules import invalidates_regex_rules
 from mlflow_oidc_auth.repository import GroupRepository
 from mlflow_oidc_auth.repository.utils import get_group
 
@@ -49,6 +50,7 @@ class RegisteredModelGroupRegexPermissionRepository:
                 INVALID_STATE,
             )
 
+    @invalidates_regex_rules
     def grant(self, group_name: str, regex: str, permission: str, priority: int = 0, prompt: bool = False) -> RegisteredModelGroupRegexPermission:
         """
         Create a new registered model group permission with regex.
@@ -139,6 +141,7 @@ class RegisteredModelGroupRegexPermissionRepository:
             )
             return [p.to_mlflow_entity() for p in permissions]
 
+    @invalidates_regex_rules
     def update(self, id: int, regex: str, group_name: str, permission: str, priority: int = 0, prompt: bool = False) -> RegisteredModelGroupRegexPermission:
         """
         Update a registered model group permission.
@@ -159,6 +162,7 @@ class RegisteredModelGroupRegexPermissionRepository:
             session.flush()
             return perm.to_mlflow_entity()
 
+    @invalidates_regex_rules
     def revoke(self, id: int, group_name: str, prompt: bool = False) -> None:
         """
         Revoke a registered model group permission.
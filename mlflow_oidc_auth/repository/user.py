@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from typing import Callable, List, Optional
+from typing import Callable, List, Optional, Tuple
 
 from mlflow.exceptions import MlflowException
 from mlflow.protos.databricks_pb2 import RESOURCE_ALREADY_EXISTS, RESOURCE_DOES_NOT_EXIST
@@ -9,7 +9,8 @@ from sqlalchemy.orm import Session
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from mlflow_oidc_auth.db.models import SqlUser
-from mlflow_oidc_auth.entities import User
+from mlflow_oidc_auth.entities import User, UserIdentity
+from mlflow_oidc_auth.regex_rules import invalidates_regex_rules
 from mlflow_oidc_auth.repository.utils import get_user
 
 
@@ -42,6 +43,34 @@ class UserRepository:
                 raise MlflowException(f"User '{username}' not found", RESOURCE_DOES_NOT_EXIST)
             return u.to_mlflow_entity()
 
+    def get_identity(self, username: str) -> UserIdentity:
+        """
+        Get the identity columns of a user without loading permissions or groups.
+        :param username: The username of the user.
+        :return: The user identity.
+        """
+        with self._Session() as session:
+            row = (
+                session.query(
+                    SqlUser.id,
+                    SqlUser.username,
+                    SqlUser.is_admin,
+                    SqlUser.is_service_account,
+                    SqlUser.password_expiration,
+                )
+                .filter(SqlUser.username == username)
+                .one_or_none()
+            )
+            if row is None:
+                raise MlflowException(f"User '{username}' not found", RESOURCE_DOES_NOT_EXIST)
+            return UserIdentity(
+                id_=row.id,
+                username=row.username,
+                is_admin=bool(row.is_admin),
+                is_service_account=bool(row.is_service_account),
+                password_expiration=row.password_expiration,
+            )
+
     def exist(self, username: str) -> bool:
         with self._Session() as session:
             return session.query(SqlUser).filter(SqlUser.username == username).first() is not None
@@ -76,6 +105,7 @@ class UserRepository:
             session.flush()
             return user.to_mlflow_entity()
 
+    @invalidates_regex_rules
     def delete(self, username: str) -> None:
         with self._Session() as session:
             user = get_user(session, username)
@@ -85,14 +115,25 @@ class UserRepository:
             session.flush()
 
     def authenticate(self, username: str, password: str) -> bool:
+        return self.verify_password(username, password)[0]
+
+    def verify_password(self, username: str, password: str) -> Tuple[bool, Optional[datetime]]:
+        """
+        Verify the password of a user.
+        :param username: The username of the user.
+        :param password: The presented password.
+        :return: Whether the password matches and the password expiration, if any.
+        """
         with self._Session() as session:
             try:
                 user = get_user(session, username)
-                if user.password_expiration is not None:
-                    if user.password_expiration.tzinfo is None:
-                        user.password_expiration = user.password_expiration.replace(tzinfo=timezone.utc)
-                    if user.password_expiration < datetime.now(timezone.utc):
-                        return False
-                return check_password_hash(getattr(user, "password_hash"), password)
+                # normalize a copy: changing the row would write it back and announce a permission change
+                password_expiration = user.password_expiration
+                if password_expiration is not None:
+                    if password_expiration.tzinfo is None:
+                        password_expiration = password_expiration.replace(tzinfo=timezone.utc)
+                    if password_expiration < datetime.now(timezone.utc):
+                        return False, password_expiration
+                return check_password_hash(getattr(user, "password_hash"), password), password_expiration
             except MlflowException:
-                return False
+                return False, None
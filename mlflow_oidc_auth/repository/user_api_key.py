@@ -0,0 +1,140 @@
+import hashlib
+import hmac
+import secrets
+import string
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Tuple
+
+from mlflow.exceptions import MlflowException
+from mlflow.protos.databricks_pb2 import RESOURCE_DOES_NOT_EXIST
+from mlflow.server import app
+from sqlalchemy.orm import Session
+
+from mlflow_oidc_auth.db.models import SqlUser, SqlUserApiKey
+from mlflow_oidc_auth.entities import UserApiKey
+from mlflow_oidc_auth.repository.utils import get_user
+
+API_KEY_PREFIX = "mlf"
+DEFAULT_API_KEY_NAME = "default"
+_KEY_ID_LENGTH = 12
+_SECRET_LENGTH = 40
+_ALPHABET = string.ascii_letters + string.digits
+
+
+def _random_string(length: int) -> str:
+    return "".join(secrets.choice(_ALPHABET) for _ in range(length))
+
+
+def parse_api_key(token: str) -> Optional[Tuple[str, str]]:
+    """
+    Split an API key of the form ``mlf_<key id>_<secret>`` into its key id and secret.
+    :param token: The presented credential.
+    :return: ``(key_id, secret)`` or ``None`` if the credential is not an API key.
+    """
+    parts = token.split("_")
+    if len(parts) != 3 or parts[0] != API_KEY_PREFIX:
+        return None
+    key_id, secret = parts[1], parts[2]
+    if len(key_id) != _KEY_ID_LENGTH or len(secret) != _SECRET_LENGTH:
+        return None
+    return key_id, secret
+
+
+def is_api_key(token: str) -> bool:
+    return parse_api_key(token) is not None
+
+
+class UserApiKeyRepository:
+    """
+    Named API keys of a user.
+
+    Only the public key id and a keyed SHA-256 digest of the secret are stored. The
+    secret is random and high-entropy, so a fast digest is as safe as a slow
+    password hash while costing a fraction of the CPU on every request.
+    """
+
+    def __init__(self, session_maker, digest_secret: str):
+        self._Session: Callable[[], Session] = session_maker
+        self._digest_secret = digest_secret.encode("utf-8")
+
+    def _digest(self, secret: str) -> str:
+        return hmac.new(self._digest_secret, secret.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def create(self, username: str, name: str, expires_at: Optional[datetime] = None) -> Tuple[UserApiKey, str]:
+        """
+        Create an API key, replacing the user's key with the same name if there is one.
+        :param username: The username of the key owner.
+        :param name: The name of the key.
+        :param expires_at: Optional expiration of the key.
+        :return: The key metadata and the plain text key, which is not stored and cannot be retrieved later.
+        """
+        if expires_at is not None and expires_at.tzinfo is not None:
+            expires_at = expires_at.astimezone(timezone.utc).replace(tzinfo=None)
+        key_id = _random_string(_KEY_ID_LENGTH)
+        secret = _random_string(_SECRET_LENGTH)
+        with self._Session() as session:
+            user = get_user(session, username)
+            session.query(SqlUserApiKey).filter(SqlUserApiKey.user_id == user.id, SqlUserApiKey.name == name).delete()
+            api_key = SqlUserApiKey(
+                user_id=user.id,
+                name=name,
+                key_id=key_id,
+                key_digest=self._digest(secret),
+                created_at=datetime.now(timezone.utc).replace(tzinfo=None),
+                expires_at=expires_at,
+            )
+            session.add(api_key)
+            session.flush()
+            return api_key.to_mlflow_entity(), f"{API_KEY_PREFIX}_{key_id}_{secret}"
+
+    def list_for_user(self, username: str) -> List[UserApiKey]:
+        with self._Session() as session:
+            user = get_user(session, username)
+            keys = session.query(SqlUserApiKey).filter(SqlUserApiKey.user_id == user.id).order_by(SqlUserApiKey.name).all()
+            return [k.to_mlflow_entity() for k in keys]
+
+    def delete(self, username: str, name: str) -> None:
+        with self._Session() as session:
+            user = get_user(session, username)
+            deleted = session.query(SqlUserApiKey).filter(SqlUserApiKey.user_id == user.id, SqlUserApiKey.name == name).delete()
+            if not deleted:
+                raise MlflowException(f"API key '{name}' not found for user '{username}'", RESOURCE_DOES_NOT_EXIST)
+            session.flush()
+
+    def authenticate(self, username: str, token: str) -> bool:
+        return self.verify(username, token)[0]
+
+    def verify(self, username: str, token: str) -> Tuple[bool, Optional[datetime]]:
+        """
+        Verify an API key with a single indexed lookup by key id.
+        :param username: The username presented with the key.
+        :param token: The presented API key.
+        :return: Whether the key belongs to the user, matches and has not expired, and the key expiration if any.
+        """
+        parsed = parse_api_key(token)
+        if parsed is None:
+            return False, None
+        key_id, secret = parsed
+        with self._Session() as session:
+            row = (
+                session.query(SqlUserApiKey.key_digest, SqlUserApiKey.expires_at)
+                .join(SqlUser, SqlUser.id == SqlUserApiKey.user_id)
+                .filter(SqlUserApiKey.key_id == key_id, SqlUser.username == username)
+                .one_or_none()
+            )
+        if row is None:
+            return False, None
+        expires_at = row.expires_at
+        if expires_at is not None:
+            expires_at = expires_at if expires_at.tzinfo else expires_at.replace(tzinfo=timezone.utc)
+            if expires_at < datetime.now(timezone.utc):
+                return False, expires_at
+        if not hmac.compare_digest(row.key_digest, self._digest(secret)):
+            app.logger.error(
+                "API key %s of user %s does not match its stored digest. If OIDC_API_KEY_DIGEST_SECRET or SECRET_KEY changed, "
+                "all issued API keys were revoked and have to be created again.",
+                key_id,
+                username,
+            )
+            return False, expires_at
+        return True, expires_at
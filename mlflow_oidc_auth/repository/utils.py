@@ -3,10 +3,12 @@ import warnings
 
 from mlflow.exceptions import MlflowException
 from mlflow.protos.databricks_pb2 import INVALID_STATE, RESOURCE_DOES_NOT_EXIST
+from sqlalchemy import case
 from sqlalchemy.exc import MultipleResultsFound, NoResultFound
 from sqlalchemy.orm import Session
 
 from mlflow_oidc_auth.db.models import SqlGroup, SqlUser, SqlUserGroup
+from mlflow_oidc_auth.permissions import ALL_PERMISSIONS
 
 
 def get_user(session: Session, username: str) -> SqlUser:
@@ -63,6 +65,15 @@ def list_user_groups(session: Session, user: SqlUser) -> list[SqlUserGroup]:
     return session.query(SqlUserGroup).filter(SqlUserGroup.user_id == user.id).all()
 
 
+def permission_priority(permission_column):
+    """
+    Map a permission column to the priority of the permission.
+    :param permission_column: The column holding the permission name.
+    :return: A SQL expression that orders permissions like compare_permissions; unknown names rank lowest.
+    """
+    return case({name: permission.priority for name, permission in ALL_PERMISSIONS.items()}, value=permission_column, else_=0)
+
+
 def validate_regex(regex: str) -> None:
     """
     Validate a regex pattern.
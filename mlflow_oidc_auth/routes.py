@@ -1,4 +1,4 @@
-from mlflow.server.handlers import _get_rest_path
+from mlflow.server.handlers import _add_static_prefix, _get_rest_path
 
 HOME = "/"
 LOGIN = "/login"
@@ -9,6 +9,9 @@ STATIC = "/oidc/static/<path:filename>"
 UI = "/oidc/ui/<path:filename>"
 UI_ROOT = "/oidc/ui/"
 
+# MLflow routes served outside of the protobuf services
+GET_METRIC_HISTORY_BULK = _add_static_prefix("/ajax-api/2.0/mlflow/metrics/get-history-bulk")
+
 ########### API refactoring ###########
 # USER, EXPERIMENT, PATTERN
 USER_EXPERIMENT_PERMISSIONS = _get_rest_path("/mlflow/permissions/users/<string:username>/experiments")
@@ -91,6 +94,8 @@ GROUP_USER_PERMISSIONS = _get_rest_path("/mlflow/permissions/groups/<string:grou
 
 # create access token for current user
 CREATE_ACCESS_TOKEN = _get_rest_path("/mlflow/permissions/users/access-token")
+# list and revoke named access tokens of a user
+ACCESS_TOKENS = _get_rest_path("/mlflow/permissions/users/access-tokens")
 # get infrmation about current user
 GET_CURRENT_USER = _get_rest_path("/mlflow/permissions/users/current")
 
@@ -1,11 +1,19 @@
-from datetime import datetime
-from typing import List, Optional
+import hashlib
+import hmac
+import secrets
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
 
 from mlflow.store.db.utils import _get_managed_session_maker, create_sqlalchemy_engine_with_retry
 from mlflow.utils.uri import extract_db_type_from_uri
 from sqlalchemy.orm import sessionmaker
 
+from mlflow_oidc_auth.config import config
 from mlflow_oidc_auth.db import utils as dbutils
+from mlflow_oidc_auth.local_cache import LocalCache
+from mlflow_oidc_auth.permission_cache import PermissionChangePoller, invalidates_permission_decisions, permission_decision_cache
+from mlflow_oidc_auth.permission_snapshot import PermissionSnapshotManager
+from mlflow_oidc_auth.tracking_cache import experiment_name_cache
 from mlflow_oidc_auth.entities import (
     ExperimentGroupRegexPermission,
     ExperimentPermission,
@@ -14,20 +22,31 @@ from mlflow_oidc_auth.entities import (
     RegisteredModelPermission,
     RegisteredModelRegexPermission,
     User,
+    UserApiKey,
+    UserIdentity,
 )
 from mlflow_oidc_auth.repository import (
+    EffectivePermissionRepository,
     ExperimentPermissionGroupRegexRepository,
     ExperimentPermissionGroupRepository,
     ExperimentPermissionRegexRepository,
     ExperimentPermissionRepository,
     GroupRepository,
+    MaterializedPermissionRepository,
+    PermissionGenerationRepository,
     PromptPermissionGroupRepository,
     RegisteredModelGroupRegexPermissionRepository,
     RegisteredModelPermissionGroupRepository,
     RegisteredModelPermissionRegexRepository,
     RegisteredModelPermissionRepository,
+    UserApiKeyRepository,
     UserRepository,
 )
+from mlflow_oidc_auth.regex_rules import regex_rule_cache
+from mlflow_oidc_auth.repository.effective_permission import PermissionSources
+from mlflow_oidc_auth.repository.materialized_permission import Decision, config_fingerprint, track_materialized_permissions
+from mlflow_oidc_auth.repository.permission_generation import EXPERIMENT, USER, track_permission_generations
+from mlflow_oidc_auth.repository.user_api_key import is_api_key
 
 
 class SqlAlchemyStore:
@@ -37,8 +56,16 @@ class SqlAlchemyStore:
         self.engine = create_sqlalchemy_engine_with_retry(db_uri)
         dbutils.migrate_if_needed(self.engine, "head")
         SessionMaker = sessionmaker(bind=self.engine)
+        track_permission_generations(SessionMaker)
+        track_materialized_permissions(SessionMaker)
         self.ManagedSessionMaker = _get_managed_session_maker(SessionMaker, self.db_type)
         self.user_repo = UserRepository(self.ManagedSessionMaker)
+        # successful basic auth verifications keyed by (username, HMAC(process secret, password))
+        self.credential_cache = LocalCache(maxsize=config.OIDC_CREDENTIAL_CACHE_SIZE, ttl=config.OIDC_CREDENTIAL_CACHE_TTL)
+        self._credential_cache_secret = secrets.token_bytes(32)
+        # changes on every credential write; a verification that raced with one is not cached
+        self._credential_generation = 0
+        self.api_key_repo = UserApiKeyRepository(self.ManagedSessionMaker, config.OIDC_API_KEY_DIGEST_SECRET)
         self.experiment_repo = ExperimentPermissionRepository(self.ManagedSessionMaker)
         self.experiment_group_repo = ExperimentPermissionGroupRepository(self.ManagedSessionMaker)
         self.group_repo = GroupRepository(self.ManagedSessionMaker)
@@ -51,10 +78,76 @@ class SqlAlchemyStore:
         self.registered_model_group_regex_repo = RegisteredModelGroupRegexPermissionRepository(self.ManagedSessionMaker)
         self.prompt_group_regex_repo = RegisteredModelGroupRegexPermissionRepository(self.ManagedSessionMaker)
         self.prompt_regex_repo = RegisteredModelPermissionRegexRepository(self.ManagedSessionMaker)
+        self.effective_permission_repo = EffectivePermissionRepository(self.ManagedSessionMaker)
+        self.permission_generation_repo = PermissionGenerationRepository(self.ManagedSessionMaker)
+        self.materialized_permission_repo = MaterializedPermissionRepository(
+            self.ManagedSessionMaker, config_fingerprint(config.DEFAULT_MLFLOW_PERMISSION, config.PERMISSION_SOURCE_ORDER)
+        )
+        self.permission_changes = PermissionChangePoller(self.permission_generation_repo.snapshot, interval=config.OIDC_PERMISSION_POLL_INTERVAL_MS / 1000)
+        self.permission_changes.subscribe(self._drop_stale_caches)
+        self.permission_snapshot = (
+            PermissionSnapshotManager(config.OIDC_PERMISSION_SNAPSHOT_PATH, self.ManagedSessionMaker) if config.OIDC_PERMISSION_SNAPSHOT_PATH else None
+        )
 
-    def authenticate_user(self, username: str, password: str) -> bool:
-        return self.user_repo.authenticate(username, password)
+    def _drop_stale_caches(self, scopes: Set[str]) -> None:
+        # writes made by this worker already invalidated its caches; this catches up with the other workers
+        if USER in scopes or "*" in scopes:
+            self.credential_cache.clear()
+        if EXPERIMENT in scopes or "*" in scopes:
+            # regex permissions are matched against experiment names, which another worker may have changed
+            experiment_name_cache.clear()
+        regex_rule_cache.invalidate()
+        permission_decision_cache.invalidate(local_only=True)
+        if self.permission_snapshot is not None:
+            self.permission_snapshot.refresh(self.permission_changes.generations)
+
+    def _permission_sources(self):
+        # the snapshot when one is current, otherwise the database
+        snapshot = self.permission_snapshot.snapshot if self.permission_snapshot is not None else None
+        return snapshot if snapshot is not None else self.effective_permission_repo
+
+    def poll_permission_changes(self) -> None:
+        """Drop cached permission data if another worker changed permissions since the last poll."""
+        self.permission_changes.poll()
 
+    def authenticate_user(self, username: str, password: str) -> bool:
+        cache_key = (username, hmac.new(self._credential_cache_secret, password.encode("utf-8"), hashlib.sha256).digest())
+        if self.credential_cache.get(cache_key):
+            return True
+        generation = self._credential_generation
+        if is_api_key(password):
+            authenticated, expires_at = self.api_key_repo.verify(username, password)
+        else:
+            authenticated, expires_at = self.user_repo.verify_password(username, password)
+        if authenticated and generation == self._credential_generation:
+            ttl = self.credential_cache.ttl
+            if expires_at is not None:
+                ttl = min(ttl, (expires_at - datetime.now(timezone.utc)).total_seconds())
+            self.credential_cache.set(cache_key, True, ttl=ttl)
+        return authenticated
+
+    def invalidate_user_credentials(self, username: str) -> None:
+        """Forget the verified credentials of a user; call it once the credential change has committed."""
+        self._credential_generation += 1
+        self.credential_cache.delete_where(lambda key: key[0] == username)
+
+    def create_user_api_key(self, username: str, name: str, expires_at: Optional[datetime] = None) -> Tuple[UserApiKey, str]:
+        # creating a key replaces the key with the same name
+        try:
+            return self.api_key_repo.create(username, name, expires_at)
+        finally:
+            self.invalidate_user_credentials(username)
+
+    def list_user_api_keys(self, username: str) -> List[UserApiKey]:
+        return self.api_key_repo.list_for_user(username)
+
+    def delete_user_api_key(self, username: str, name: str) -> None:
+        try:
+            return self.api_key_repo.delete(username, name)
+        finally:
+            self.invalidate_user_credentials(username)
+
+    @invalidates_permission_decisions
     def create_user(self, username: str, password: str, display_name: str, is_admin: bool = False, is_service_account=False):
         return self.user_repo.create(username, password, display_name, is_admin, is_service_account)
 
@@ -64,9 +157,13 @@ class SqlAlchemyStore:
     def get_user(self, username: str) -> User:
         return self.user_repo.get(username)
 
+    def get_user_identity(self, username: str) -> UserIdentity:
+        return self.user_repo.get_identity(username)
+
     def list_users(self, is_service_account: bool = False, all: bool = False) -> List[User]:
         return self.user_repo.list(is_service_account, all)
 
+    @invalidates_permission_decisions
     def update_user(
         self,
         username: str,
@@ -75,23 +172,69 @@ class SqlAlchemyStore:
         is_admin: Optional[bool] = None,
         is_service_account: Optional[bool] = None,
     ) -> User:
-        return self.user_repo.update(
-            username=username,
-            password=password,
-            password_expiration=password_expiration,
-            is_admin=is_admin,
-            is_service_account=is_service_account,
-        )
-
+        try:
+            return self.user_repo.update(
+                username=username,
+                password=password,
+                password_expiration=password_expiration,
+                is_admin=is_admin,
+                is_service_account=is_service_account,
+            )
+        finally:
+            if password is not None or password_expiration is not None:
+                self.invalidate_user_credentials(username)
+
+    @invalidates_permission_decisions
     def delete_user(self, username: str):
-        return self.user_repo.delete(username)
+        try:
+            return self.user_repo.delete(username)
+        finally:
+            self.invalidate_user_credentials(username)
 
+    @invalidates_permission_decisions
     def create_experiment_permission(self, experiment_id: str, username: str, permission: str) -> ExperimentPermission:
         return self.experiment_repo.grant_permission(experiment_id, username, permission)
 
     def get_experiment_permission(self, experiment_id: str, username: str) -> ExperimentPermission:
         return self.experiment_repo.get_permission(experiment_id, username)
 
+    def get_experiment_permission_sources(self, experiment_id: str, username: str) -> PermissionSources:
+        return self._permission_sources().for_experiments([experiment_id], username)[experiment_id]
+
+    def get_registered_model_permission_sources(self, name: str, username: str) -> PermissionSources:
+        return self._permission_sources().for_registered_models([name], username)[name]
+
+    def get_prompt_permission_sources(self, name: str, username: str) -> PermissionSources:
+        return self._permission_sources().for_registered_models([name], username, prompt=True)[name]
+
+    def get_experiments_permission_sources(self, experiment_ids: List[str], username: str) -> Dict[str, PermissionSources]:
+        return self._permission_sources().for_experiments(experiment_ids, username)
+
+    def get_registered_models_permission_sources(self, names: List[str], username: str) -> Dict[str, PermissionSources]:
+        return self._permission_sources().for_registered_models(names, username)
+
+    def get_prompts_permission_sources(self, names: List[str], username: str) -> Dict[str, PermissionSources]:
+        return self._permission_sources().for_registered_models(names, username, prompt=True)
+
+    def get_permission_generations(self) -> Dict[str, int]:
+        return self.permission_generation_repo.snapshot()
+
+    @invalidates_permission_decisions
+    def bump_permission_generations(self, scopes: Set[str]) -> None:
+        self.permission_generation_repo.bump(scopes)
+
+    def get_materialized_permissions(self, resource_type: str, keys: List[str], username: str) -> Dict[str, Decision]:
+        return self.materialized_permission_repo.get(resource_type, keys, username)
+
+    def materialize_permissions(
+        self, resource_type: str, decisions: Dict[str, Decision], username: str, generations: Dict[str, int], replace: bool = False
+    ) -> bool:
+        return self.materialized_permission_repo.put(resource_type, decisions, username, generations, replace)
+
+    @invalidates_permission_decisions
+    def forget_materialized_permissions(self, resource_type: str, keys: List[str]) -> None:
+        self.materialized_permission_repo.forget(resource_type, keys)
+
     def get_user_groups_experiment_permission(self, experiment_id: str, username: str) -> ExperimentPermission:
         return self.experiment_group_repo.get_group_permission_for_user_experiment(experiment_id, username)
 
@@ -107,12 +250,15 @@ class SqlAlchemyStore:
     def list_user_groups_experiment_permissions(self, username: str) -> List[ExperimentPermission]:
         return self.experiment_group_repo.list_permissions_for_user_groups(username)
 
+    @invalidates_permission_decisions
     def update_experiment_permission(self, experiment_id: str, username: str, permission: str) -> ExperimentPermission:
         return self.experiment_repo.update_permission(experiment_id, username, permission)
 
+    @invalidates_permission_decisions
     def delete_experiment_permission(self, experiment_id: str, username: str):
         return self.experiment_repo.revoke_permission(experiment_id, username)
 
+    @invalidates_permission_decisions
     def create_registered_model_permission(self, name: str, username: str, permission: str) -> RegisteredModelPermission:
         return self.registered_model_repo.create(name, username, permission)
 
@@ -128,18 +274,22 @@ class SqlAlchemyStore:
     def list_user_groups_registered_model_permissions(self, username: str) -> List[RegisteredModelPermission]:
         return self.registered_model_group_repo.list_for_user(username)
 
+    @invalidates_permission_decisions
     def update_registered_model_permission(self, name: str, username: str, permission: str) -> RegisteredModelPermission:
         return self.registered_model_repo.update(name, username, permission)
 
+    @invalidates_permission_decisions
     def delete_registered_model_permission(self, name: str, username: str):
         return self.registered_model_repo.delete(name, username)
 
+    @invalidates_permission_decisions
     def wipe_registered_model_permissions(self, name: str):
         return self.registered_model_repo.wipe(name)
 
     def list_experiment_permissions_for_experiment(self, experiment_id: str) -> List[ExperimentPermission]:
         return self.experiment_repo.list_permissions_for_experiment(experiment_id)
 
+    @invalidates_permission_decisions
     def populate_groups(self, group_names: List[str]):
         return self.group_repo.create_groups(group_names)
 
@@ -149,9 +299,11 @@ class SqlAlchemyStore:
     def get_group_users(self, group_name: str) -> List[User]:
         return self.group_repo.list_group_members(group_name)
 
+    @invalidates_permission_decisions
     def add_user_to_group(self, username: str, group_name: str) -> None:
         return self.group_repo.add_user_to_group(username, group_name)
 
+    @invalidates_permission_decisions
     def remove_user_from_group(self, username: str, group_name: str) -> None:
         return self.group_repo.remove_user_from_group(username, group_name)
 
@@ -161,50 +313,62 @@ class SqlAlchemyStore:
     def get_groups_ids_for_user(self, username: str) -> List[int]:
         return self.group_repo.list_group_ids_for_user(username)
 
+    @invalidates_permission_decisions
     def set_user_groups(self, username: str, group_names: List[str]) -> None:
         return self.group_repo.set_groups_for_user(username, group_names)
 
     def get_group_experiments(self, group_name: str) -> List[ExperimentPermission]:
         return self.experiment_group_repo.list_permissions_for_group(group_name)
 
+    @invalidates_permission_decisions
     def create_group_experiment_permission(self, group_name: str, experiment_id: str, permission: str) -> ExperimentPermission:
         return self.experiment_group_repo.grant_group_permission(group_name, experiment_id, permission)
 
+    @invalidates_permission_decisions
     def delete_group_experiment_permission(self, group_name: str, experiment_id: str) -> None:
         return self.experiment_group_repo.revoke_group_permission(group_name, experiment_id)
 
+    @invalidates_permission_decisions
     def update_group_experiment_permission(self, group_name: str, experiment_id: str, permission: str) -> ExperimentPermission:
         return self.experiment_group_repo.update_group_permission(group_name, experiment_id, permission)
 
     def get_group_models(self, group_name: str) -> List[RegisteredModelPermission]:
         return self.registered_model_group_repo.get(group_name)
 
+    @invalidates_permission_decisions
     def create_group_model_permission(self, group_name: str, name: str, permission: str):
         return self.registered_model_group_repo.create(group_name, name, permission)
 
+    @invalidates_permission_decisions
     def delete_group_model_permission(self, group_name: str, name: str):
         return self.registered_model_group_repo.delete(group_name, name)
 
+    @invalidates_permission_decisions
     def wipe_group_model_permissions(self, name: str):
         return self.registered_model_group_repo.wipe(name)
 
+    @invalidates_permission_decisions
     def update_group_model_permission(self, group_name: str, name: str, permission: str):
         return self.registered_model_group_repo.update(group_name, name, permission)
 
     # Prompt CRUD
+    @invalidates_permission_decisions
     def create_group_prompt_permission(self, group_name: str, name: str, permission: str):
         return self.prompt_group_repo.grant_prompt_permission_to_group(group_name, name, permission)
 
     def get_group_prompts(self, group_name: str) -> List[RegisteredModelPermission]:
         return self.prompt_group_repo.list_prompt_permissions_for_group(group_name)
 
+    @invalidates_permission_decisions
     def update_group_prompt_permission(self, group_name: str, name: str, permission: str):
         return self.prompt_group_repo.update_prompt_permission_for_group(group_name, name, permission)
 
+    @invalidates_permission_decisions
     def delete_group_prompt_permission(self, group_name: str, name: str):
         return self.prompt_group_repo.revoke_prompt_permission_from_group(group_name, name)
 
     # Experiment regex CRUD
+    @invalidates_permission_decisions
     def create_experiment_regex_permission(self, regex: str, priority: int, permission: str, username: str):
         return self.experiment_regex_repo.grant(regex, priority, permission, username)
 
@@ -214,13 +378,16 @@ class SqlAlchemyStore:
     def list_experiment_regex_permissions(self, username: str) -> List[ExperimentRegexPermission]:
         return self.experiment_regex_repo.list_regex_for_user(username)
 
+    @invalidates_permission_decisions
     def update_experiment_regex_permission(self, regex: str, priority: int, permission: str, username: str, id: int) -> ExperimentRegexPermission:
         return self.experiment_regex_repo.update(regex=regex, priority=priority, permission=permission, username=username, id=id)
 
+    @invalidates_permission_decisions
     def delete_experiment_regex_permission(self, username: str, id: int) -> None:
         return self.experiment_regex_repo.revoke(username=username, id=id)
 
     # Experiment regex group CRUD
+    @invalidates_permission_decisions
     def create_group_experiment_regex_permission(self, group_name: str, regex: str, priority: int, permission: str) -> ExperimentGroupRegexPermission:
         return self.experiment_group_regex_repo.grant(group_name, regex, priority, permission)
 
@@ -236,13 +403,16 @@ class SqlAlchemyStore:
     def list_group_experiment_regex_permissions_for_groups_ids(self, group_ids: List[int]) -> List[ExperimentGroupRegexPermission]:
         return self.experiment_group_regex_repo.list_permissions_for_groups_ids(group_ids)
 
+    @invalidates_permission_decisions
     def update_group_experiment_regex_permission(self, id: int, group_name: str, regex: str, priority: int, permission: str) -> ExperimentGroupRegexPermission:
         return self.experiment_group_regex_repo.update(id, group_name, regex, priority, permission)
 
+    @invalidates_permission_decisions
     def delete_group_experiment_regex_permission(self, group_name: str, id: int) -> None:
         return self.experiment_group_regex_repo.revoke(group_name, id)
 
     # Registered model regex CRUD
+    @invalidates_permission_decisions
     def create_registered_model_regex_permission(self, regex: str, priority: int, permission: str, username: str):
         return self.registered_model_regex_repo.grant(regex, priority, permission, username)
 
@@ -252,13 +422,16 @@ class SqlAlchemyStore:
     def list_registered_model_regex_permissions(self, username: str) -> List[RegisteredModelRegexPermission]:
         return self.registered_model_regex_repo.list_regex_for_user(username)
 
+    @invalidates_permission_decisions
     def update_registered_model_regex_permission(self, id: int, regex: str, priority: int, permission: str, username: str) -> RegisteredModelRegexPermission:
         return self.registered_model_regex_repo.update(id, regex, priority, permission, username)
 
+    @invalidates_permission_decisions
     def delete_registered_model_regex_permission(self, id: int, username: str) -> None:
         return self.registered_model_regex_repo.revoke(id, username)
 
     # Registered model regex group CRUD
+    @invalidates_permission_decisions
     def create_group_registered_model_regex_permission(
         self, group_name: str, regex: str, priority: int, permission: str
     ) -> RegisteredModelGroupRegexPermission:
@@ -276,15 +449,18 @@ class SqlAlchemyStore:
     def list_group_registered_model_regex_permissions_for_groups_ids(self, group_ids: List[int]) -> List[RegisteredModelGroupRegexPermission]:
         return self.registered_model_group_regex_repo.list_permissions_for_groups_ids(group_ids)
 
+    @invalidates_permission_decisions
     def update_group_registered_model_regex_permission(
         self, id: int, group_name: str, regex: str, priority: int, permission: str
     ) -> RegisteredModelGroupRegexPermission:
         return self.registered_model_group_regex_repo.update(id=id, group_name=group_name, regex=regex, priority=priority, permission=permission)
 
+    @invalidates_permission_decisions
     def delete_group_registered_model_regex_permission(self, group_name: str, id: int) -> None:
         return self.registered_model_group_regex_repo.revoke(group_name=group_name, id=id)
 
     # Prompt regex CRUD
+    @invalidates_permission_decisions
     def create_prompt_regex_permission(self, regex: str, priority: int, permission: str, username: str, prompt: bool = True):
         return self.prompt_regex_repo.grant(regex=regex, priority=priority, permission=permission, username=username, prompt=prompt)
 
@@ -294,15 +470,18 @@ class SqlAlchemyStore:
     def list_prompt_regex_permissions(self, username: str, prompt: bool = True) -> List[RegisteredModelRegexPermission]:
         return self.prompt_regex_repo.list_regex_for_user(username=username, prompt=prompt)
 
+    @invalidates_permission_decisions
     def update_prompt_regex_permission(
         self, id: int, regex: str, priority: int, permission: str, username: str, prompt: bool = True
     ) -> RegisteredModelRegexPermission:
         return self.prompt_regex_repo.update(id=id, regex=regex, priority=priority, permission=permission, username=username, prompt=prompt)
 
+    @invalidates_permission_decisions
     def delete_prompt_regex_permission(self, id: int, username: str) -> None:
         return self.prompt_regex_repo.revoke(id=id, username=username, prompt=True)
 
     # Prompt regex group CRUD
+    @invalidates_permission_decisions
     def create_group_prompt_regex_permission(self, regex: str, priority: int, permission: str, group_name: str, prompt: bool = True):
         return self.prompt_group_regex_repo.grant(regex=regex, priority=priority, permission=permission, group_name=group_name, prompt=prompt)
 
@@ -318,10 +497,12 @@ class SqlAlchemyStore:
     def list_group_prompt_regex_permissions_for_groups_ids(self, group_ids: List[int], prompt: bool = True) -> List[RegisteredModelGroupRegexPermission]:
         return self.prompt_group_regex_repo.list_permissions_for_groups_ids(group_ids=group_ids, prompt=prompt)
 
+    @invalidates_permission_decisions
     def update_group_prompt_regex_permission(
         self, id: int, regex: str, priority: int, permission: str, group_name: str, prompt: bool = True
     ) -> RegisteredModelGroupRegexPermission:
         return self.prompt_group_regex_repo.update(id=id, regex=regex, priority=priority, permission=permission, group_name=group_name, prompt=prompt)
 
+    @invalidates_permission_decisions
     def delete_group_prompt_regex_permission(self, id: int, group_name: str) -> None:
         return self.prompt_group_regex_repo.revoke(id=id, group_name=group_name, prompt=True)
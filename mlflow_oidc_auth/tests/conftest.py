@@ -0,0 +1,49 @@
+import inspect
+
+import pytest
+from mlflow.store.db.utils import _get_managed_session_maker
+
+from mlflow_oidc_auth.db.models import Base
+from mlflow_oidc_auth.permission_cache import permission_decision_cache
+from mlflow_oidc_auth.regex_rules import regex_rule_cache
+from mlflow_oidc_auth.sqlalchemy_store import SqlAlchemyStore
+from mlflow_oidc_auth.tracking_cache import experiment_name_cache, run_experiment_cache
+
+
+def _writable_managed_session_maker(SessionMaker, db_type):
+    # recent MLflow versions reject flushes on sessions not opened with read_only=False while running under pytest
+    managed_session_maker = _get_managed_session_maker(SessionMaker, db_type)
+    if "read_only" in inspect.signature(managed_session_maker).parameters:
+        return lambda: managed_session_maker(read_only=False)
+    return managed_session_maker
+
+
+@pytest.fixture
+def sqlite_store(monkeypatch):
+    """A SqlAlchemyStore backed by an in-memory SQLite database with all tables created."""
+    monkeypatch.setattr("mlflow_oidc_auth.sqlalchemy_store._get_managed_session_maker", _writable_managed_session_maker)
+    monkeypatch.setattr("mlflow_oidc_auth.sqlalchemy_store.dbutils.migrate_if_needed", lambda engine, revision: None)
+    store = SqlAlchemyStore()
+    store.init_db("sqlite:///:memory:")
+    Base.metadata.create_all(store.engine)
+    # compiled regex rules outlive the in-memory database
+    regex_rule_cache.invalidate()
+    return store
+
+
+@pytest.fixture(autouse=True)
+def clear_tracking_caches():
+    """Experiment names and run experiments are cached per process; tests fake the tracking store in many different ways."""
+    experiment_name_cache.clear()
+    run_experiment_cache.clear()
+    yield
+    experiment_name_cache.clear()
+    run_experiment_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_permission_decision_cache():
+    """Most tests fake the permission store; decisions of one test must not leak into the next."""
+    permission_decision_cache.invalidate()
+    yield
+    permission_decision_cache.invalidate()
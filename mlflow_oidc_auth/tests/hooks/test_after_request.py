@@ -1,8 +1,9 @@
 import pytest
 from unittest.mock import MagicMock, patch
 from flask import Flask, Response
-from mlflow.protos.service_pb2 import CreateExperiment, SearchExperiments
-from mlflow.protos.model_registry_pb2 import CreateRegisteredModel, DeleteRegisteredModel, SearchRegisteredModels
+from mlflow.protos.service_pb2 import CreateExperiment, UpdateExperiment
+from mlflow.protos.model_registry_pb2 import CreateRegisteredModel, DeleteRegisteredModel, RenameRegisteredModel
+
 from mlflow_oidc_auth.hooks.after_request import after_request_hook, AFTER_REQUEST_PATH_HANDLERS
 
 app = Flask(__name__)
@@ -25,10 +26,8 @@ def mock_store():
 
 @pytest.fixture
 def mock_utils():
-    with patch("mlflow_oidc_auth.hooks.after_request.get_username", return_value="test_user") as mock_username, patch(
-        "mlflow_oidc_auth.hooks.after_request.get_is_admin", return_value=False
-    ) as mock_is_admin:
-        yield mock_username, mock_is_admin
+    with patch("mlflow_oidc_auth.hooks.after_request.get_username", return_value="test_user") as mock_username:
+        yield mock_username
 
 
 def test_after_request_hook_no_handler(mock_response):
@@ -51,19 +50,62 @@ def test_delete_can_manage_registered_model_permission(mock_response, mock_store
             mock_store.wipe_registered_model_permissions.assert_called_once_with("test_model")
 
 
-def test_filter_search_experiments(mock_response, mock_store, mock_utils):
-    handler = AFTER_REQUEST_PATH_HANDLERS[SearchExperiments]
-    mock_response.json = {"experiments": [{"experiment_id": "123"}]}
-    with app.test_request_context(path="/api/2.0/mlflow/experiments/search", method="POST", headers={"Content-Type": "application/json"}):
-        with patch("mlflow_oidc_auth.hooks.after_request.can_read_experiment", side_effect=lambda exp_id, _: exp_id != "123"):
-            handler(mock_response)
-            assert len(mock_response.json["experiments"]) == 1
+def test_update_experiment_drops_cached_experiment_name(mock_response, mock_store):
+    with app.test_request_context(
+        path="/api/2.0/mlflow/experiments/update",
+        method="POST",
+        json={"experiment_id": "123", "new_name": "renamed"},
+        headers={"Content-Type": "application/json"},
+    ):
+        with patch("mlflow_oidc_auth.hooks.after_request.experiment_name_cache") as mock_cache:
+            AFTER_REQUEST_PATH_HANDLERS[UpdateExperiment](mock_response)
+            mock_cache.invalidate.assert_called_once_with(experiment_id="123")
+        # other workers learn about the rename through the experiment generation
+        mock_store.bump_permission_generations.assert_called_once_with({"experiment"})
 
 
-def test_filter_search_registered_models(mock_response, mock_store, mock_utils):
-    handler = AFTER_REQUEST_PATH_HANDLERS[SearchRegisteredModels]
-    mock_response.json = {"registered_models": [{"name": "test_model"}]}
-    with app.test_request_context(path="/api/2.0/mlflow/registered-models/search", method="POST", headers={"Content-Type": "application/json"}):
-        with patch("mlflow_oidc_auth.hooks.after_request.can_read_registered_model", side_effect=lambda name, _: name != "test_model"):
-            handler(mock_response)
-            assert len(mock_response.json["registered_models"]) == 1
+def test_create_experiment_drops_cached_experiment_name(mock_response, mock_store, mock_utils):
+    mock_response.json = {"experiment_id": "123"}
+    with app.test_request_context(
+        path="/api/2.0/mlflow/experiments/create",
+        method="POST",
+        json={"name": "new-experiment"},
+        headers={"Content-Type": "application/json"},
+    ):
+        with patch("mlflow_oidc_auth.hooks.after_request.experiment_name_cache") as mock_cache, patch(
+            "mlflow_oidc_auth.hooks.after_request.get_user_groups", return_value=[]
+        ):
+            AFTER_REQUEST_PATH_HANDLERS[CreateExperiment](mock_response)
+            mock_cache.invalidate.assert_called_once_with(experiment_name="new-experiment")
+            mock_store.create_experiment_permission.assert_called_once_with("123", "test_user", "MANAGE")
+
+
+def test_rename_registered_model_forgets_materialized_permissions(mock_response, mock_store):
+    with app.test_request_context(
+        path="/api/2.0/mlflow/registered-models/rename",
+        method="POST",
+        json={"name": "old", "new_name": "new"},
+        headers={"Content-Type": "application/json"},
+    ):
+        with patch("mlflow_oidc_auth.hooks.after_request.config.OIDC_MATERIALIZED_PERMISSIONS", True):
+            AFTER_REQUEST_PATH_HANDLERS[RenameRegisteredModel](mock_response)
+        assert mock_store.forget_materialized_permissions.call_count == 2
+        mock_store.forget_materialized_permissions.assert_any_call("registered_model", ["old", "new"])
+        mock_store.forget_materialized_permissions.assert_any_call("prompt", ["old", "new"])
+
+
+def test_handlers_are_routed_by_url_rule(mock_response):
+    routed = Flask(__name__)
+    rule = "/api/2.0/mlflow/experiments/<string:experiment_id>/update"
+    routed.add_url_rule(rule, "update", lambda **kwargs: None, methods=["POST"])
+    handler = MagicMock()
+    with routed.test_request_context(path="/api/2.0/mlflow/experiments/1/update", method="POST"):
+        with patch.dict("mlflow_oidc_auth.hooks.after_request.AFTER_REQUEST_HANDLERS", {(rule, "POST"): handler}):
+            assert after_request_hook(mock_response) == mock_response
+    handler.assert_called_once_with(mock_response)
+
+
+def test_only_service_endpoints_have_handlers():
+    from mlflow_oidc_auth.hooks.after_request import AFTER_REQUEST_HANDLERS
+
+    assert set(AFTER_REQUEST_HANDLERS.values()) <= set(AFTER_REQUEST_PATH_HANDLERS.values())
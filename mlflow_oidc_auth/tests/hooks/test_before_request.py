@@ -1,7 +1,15 @@
+import json
+
 import pytest
 from unittest.mock import patch, MagicMock
 from flask import Flask, session, request, Response
-from mlflow_oidc_auth.hooks.before_request import before_request_hook
+from mlflow.entities import Experiment
+from mlflow.entities.model_registry import ModelVersion, RegisteredModel
+from mlflow.protos.model_registry_pb2 import SearchModelVersions, SearchRegisteredModels
+from mlflow.protos.service_pb2 import SearchExperiments
+from mlflow.store.entities.paged_list import PagedList
+from mlflow.utils.search_utils import SearchUtils
+from mlflow_oidc_auth.hooks.before_request import BEFORE_REQUEST_RESPONDERS, before_request_hook
 from mlflow_oidc_auth import responses
 from mlflow_oidc_auth.config import config
 
@@ -56,3 +64,138 @@ def test_authorization_failure(client):
             response = before_request_hook()
             assert response.status_code == 403  # type: ignore
             assert b"Forbidden" in response.data  # type: ignore
+
+
+def test_auth_context_is_set_before_authorization(client):
+    context = MagicMock()
+    with app.test_request_context(path="/protected", method="GET", headers={"Authorization": "Basic dXNlcjpwYXNz"}):
+        with patch("mlflow_oidc_auth.hooks.before_request.authenticate_request_basic_auth", return_value=True), patch(
+            "mlflow_oidc_auth.hooks.before_request.build_auth_context", return_value=context
+        ), patch("mlflow_oidc_auth.hooks.before_request.set_auth_context") as mock_set_auth_context, patch(
+            "mlflow_oidc_auth.hooks.before_request.get_is_admin", return_value=True
+        ):
+            assert before_request_hook() is None
+            mock_set_auth_context.assert_called_once_with(context)
+
+
+@pytest.fixture
+def mock_username():
+    with patch("mlflow_oidc_auth.hooks.before_request.get_username", return_value="test_user") as mock_username:
+        yield mock_username
+
+
+def _store_pages(items, make):
+    """A fake store search over ``items``, with offset page tokens like MLflow's stores."""
+
+    def search(page_token=None, max_results=None, **kwargs):
+        offset = SearchUtils.parse_start_offset_from_page_token(page_token)
+        page = [make(item) for item in items[offset : offset + max_results]]
+        return PagedList(page, SearchUtils.create_page_token(offset + max_results) if offset + max_results < len(items) else None)
+
+    return MagicMock(side_effect=search)
+
+
+def _search(responder, path, body, key, method="POST"):
+    kwargs = {"json": body} if method == "POST" else {"query_string": body}
+    with app.test_request_context(path=path, method=method, **kwargs):
+        response = responder()
+    result = json.loads(response.get_data())
+    return [item.get("experiment_id", item.get("name")) for item in result.get(key, [])], result.get("next_page_token")
+
+
+def test_search_experiments(mock_username):
+    responder = BEFORE_REQUEST_RESPONDERS[SearchExperiments]
+    experiment_ids = [str(i) for i in range(1, 100)]
+    fetch = _store_pages(experiment_ids, lambda experiment_id: Experiment(experiment_id, f"name-{experiment_id}", "", "active"))
+    readable = {experiment_id for experiment_id in experiment_ids if int(experiment_id) % 3 == 0}
+    permissions = lambda ids, username, names: {i: MagicMock(permission=MagicMock(can_read=i in readable)) for i in ids}
+    with patch("mlflow_oidc_auth.utils.fetch_experiments_paginated", fetch), patch(
+        "mlflow_oidc_auth.utils.effective_experiment_permissions", side_effect=permissions
+    ):
+        seen, page_token = [], None
+        while True:
+            body = {"max_results": 7, **({"page_token": page_token} if page_token else {})}
+            page, page_token = _search(responder, "/api/2.0/mlflow/experiments/search", body, "experiments")
+            assert len(page) <= 7
+            seen.extend(page)
+            if not page_token:
+                break
+        assert seen == sorted(readable, key=int)
+        # a page only reads the store pages it needs
+        fetch.reset_mock()
+        _search(responder, "/api/2.0/mlflow/experiments/search", {"max_results": 7}, "experiments")
+        assert fetch.call_count == 1
+
+
+def test_search_registered_models(mock_username):
+    responder = BEFORE_REQUEST_RESPONDERS[SearchRegisteredModels]
+    names = [f"model-{i:03}" for i in range(300)]
+    fetch = _store_pages(names, lambda name: RegisteredModel(name))
+    readable = set(names[150:153])
+    permissions = lambda model_names, username: {name: MagicMock(permission=MagicMock(can_read=name in readable)) for name in model_names}
+    with patch("mlflow_oidc_auth.utils.fetch_registered_models_paginated", fetch), patch(
+        "mlflow_oidc_auth.utils.effective_registered_model_permissions", side_effect=permissions
+    ):
+        page, page_token = _search(responder, "/api/2.0/mlflow/registered-models/search", {"max_results": 2}, "registered_models", method="GET")
+        assert page == names[150:152]
+        page, page_token = _search(
+            responder, "/api/2.0/mlflow/registered-models/search", {"max_results": 2, "page_token": page_token}, "registered_models", method="GET"
+        )
+        assert page == names[152:153]
+        assert not page_token
+
+
+def test_search_model_versions(mock_username):
+    responder = BEFORE_REQUEST_RESPONDERS[SearchModelVersions]
+    versions = [(f"model-{i % 4}", str(i)) for i in range(20)]
+    fetch = _store_pages(versions, lambda version: ModelVersion(version[0], version[1], 0))
+    permissions = lambda model_names, username: {name: MagicMock(permission=MagicMock(can_read=name == "model-1")) for name in model_names}
+    with patch("mlflow_oidc_auth.utils._get_model_registry_store") as registry_store, patch(
+        "mlflow_oidc_auth.utils.effective_registered_model_permissions", side_effect=permissions
+    ) as load_permissions:
+        registry_store.return_value.search_model_versions = fetch
+        with app.test_request_context(path="/api/2.0/mlflow/model-versions/search", method="GET", query_string={"max_results": 10}):
+            result = json.loads(responder().get_data())
+    assert [(version["name"], version["version"]) for version in result["model_versions"]] == [version for version in versions if version[0] == "model-1"]
+    # one permission check per store page
+    assert load_permissions.call_count == 1
+
+
+def test_search_registered_models_rejects_invalid_requests(mock_username):
+    with app.test_request_context(path="/api/2.0/mlflow/registered-models/search", method="GET", query_string={"max_results": 5000}):
+        response = BEFORE_REQUEST_RESPONDERS[SearchRegisteredModels]()
+    assert response.status_code == 400
+
+
+def test_searches_are_answered_before_mlflow_runs_them(client):
+    responder = MagicMock(return_value=Response("{}", mimetype="application/json"))
+    with app.test_request_context(path="/api/2.0/mlflow/experiments/search", method="POST", json={}):
+        with patch("mlflow_oidc_auth.hooks.before_request.build_auth_context"), patch("mlflow_oidc_auth.hooks.before_request.set_auth_context"), patch(
+            "mlflow_oidc_auth.hooks.before_request.BEFORE_REQUEST_RESPONDER_PATHS", {("/api/2.0/mlflow/experiments/search", "POST"): responder}
+        ):
+            session["username"] = "test_user"
+            with patch("mlflow_oidc_auth.hooks.before_request.get_is_admin", return_value=True):
+                assert before_request_hook() is None
+            responder.assert_not_called()
+            with patch("mlflow_oidc_auth.hooks.before_request.get_is_admin", return_value=False):
+                assert before_request_hook() is responder.return_value
+
+
+def test_validators_are_routed_by_url_rule():
+    routed = Flask(__name__)
+    routed.secret_key = "test_secret_key"
+    rule = "/api/2.0/mlflow/permissions/experiments/<string:experiment_id>/users/<string:username>"
+    routed.add_url_rule(rule, "detail", lambda **kwargs: None, methods=["PATCH"])
+    routed.add_url_rule("/ajax-api/2.0/mlflow-artifacts/artifacts/<path:artifact_path>", "artifact", lambda **kwargs: None, methods=["PUT"])
+    with patch("mlflow_oidc_auth.hooks.before_request.build_auth_context"), patch("mlflow_oidc_auth.hooks.before_request.set_auth_context"), patch(
+        "mlflow_oidc_auth.hooks.before_request.get_is_admin", return_value=False
+    ), patch("mlflow_oidc_auth.hooks.before_request.render_template", return_value=Response("Forbidden", status=403)):
+        with routed.test_request_context(path="/api/2.0/mlflow/permissions/experiments/1/users/alice", method="PATCH"):
+            session["username"] = "test_user"
+            with patch("mlflow_oidc_auth.hooks.before_request.BEFORE_REQUEST_VALIDATORS", {(rule, "PATCH"): lambda: False}):
+                assert before_request_hook().status_code == 403  # type: ignore
+        with routed.test_request_context(path="/ajax-api/2.0/mlflow-artifacts/artifacts/1/abc/artifacts/model.pkl", method="PUT"):
+            session["username"] = "test_user"
+            with patch("mlflow_oidc_auth.hooks.before_request.validate_can_update_experiment_artifact_proxy", return_value=False) as validator:
+                assert before_request_hook().status_code == 403  # type: ignore
+                validator.assert_called_once()
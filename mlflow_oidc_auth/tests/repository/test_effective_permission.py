@@ -0,0 +1,88 @@
+import pytest
+
+from mlflow_oidc_auth.repository.effective_permission import PermissionSources
+
+
+@pytest.fixture
+def store(sqlite_store):
+    sqlite_store.create_user("alice", "password", "Alice")
+    sqlite_store.create_user("bob", "password", "Bob")
+    sqlite_store.populate_groups(["readers", "editors", "others"])
+    sqlite_store.set_user_groups("alice", ["readers", "editors"])
+    sqlite_store.set_user_groups("bob", ["others"])
+    return sqlite_store
+
+
+def test_permission_sources_group_picks_highest_priority():
+    assert PermissionSources().group is None
+    assert PermissionSources(groups=["READ", "MANAGE", "EDIT"]).group == "MANAGE"
+    assert PermissionSources(groups=["MANAGE", "NO_PERMISSIONS"]).group == "NO_PERMISSIONS"
+
+
+def test_experiment_sources(store):
+    store.create_experiment_permission("1", "alice", "EDIT")
+    store.create_experiment_permission("2", "bob", "MANAGE")
+    store.create_group_experiment_permission("readers", "1", "READ")
+    store.create_group_experiment_permission("editors", "1", "MANAGE")
+    store.create_group_experiment_permission("others", "1", "NO_PERMISSIONS")
+    store.create_experiment_regex_permission("^b.*", 2, "READ", "alice")
+    store.create_experiment_regex_permission("^a.*", 1, "EDIT", "alice")
+    store.create_experiment_regex_permission("^c.*", 1, "EDIT", "bob")
+    store.create_group_experiment_regex_permission("editors", "^x.*", 5, "MANAGE")
+    store.create_group_experiment_regex_permission("others", "^y.*", 1, "READ")
+
+    sources = store.get_experiment_permission_sources("1", "alice")
+    assert sources.user == "EDIT"
+    assert sorted(sources.groups) == ["MANAGE", "READ"]
+    assert sources.group == store.get_user_groups_experiment_permission("1", "alice").permission
+    assert [(r.regex, r.priority, r.permission) for r in sources.regexes] == [("^a.*", 1, "EDIT"), ("^b.*", 2, "READ")]
+    assert [r.regex for r in sources.regexes] == [r.regex for r in store.list_experiment_regex_permissions("alice")]
+    assert [(r.regex, r.permission) for r in sources.group_regexes] == [("^x.*", "MANAGE")]
+
+    sources = store.get_experiment_permission_sources("2", "alice")
+    assert sources.user is None
+    assert sources.groups == []
+
+
+def test_experiment_sources_unknown_user(store):
+    store.create_experiment_permission("1", "alice", "EDIT")
+    sources = store.get_experiment_permission_sources("1", "nobody")
+    assert sources == PermissionSources()
+
+
+def test_registered_model_and_prompt_sources(store):
+    store.create_registered_model_permission("model", "alice", "READ")
+    store.create_group_model_permission("editors", "model", "EDIT")
+    store.create_registered_model_regex_permission("^model.*", 1, "MANAGE", "alice")
+    store.create_prompt_regex_permission("^prompt.*", 1, "READ", "alice")
+    store.create_group_registered_model_regex_permission("readers", "^m.*", 3, "READ")
+    store.create_group_prompt_regex_permission("^p.*", 2, "EDIT", "editors")
+
+    sources = store.get_registered_model_permission_sources("model", "alice")
+    assert sources.user == "READ"
+    assert sources.group == "EDIT"
+    assert [r.regex for r in sources.regexes] == ["^model.*"]
+    assert [r.regex for r in sources.group_regexes] == ["^m.*"]
+
+    sources = store.get_prompt_permission_sources("model", "alice")
+    assert sources.user == "READ"
+    assert sources.group == "EDIT"
+    assert [r.regex for r in sources.regexes] == ["^prompt.*"]
+    assert [r.regex for r in sources.group_regexes] == ["^p.*"]
+
+
+def test_batched_sources_match_single_lookups(store, monkeypatch):
+    monkeypatch.setattr("mlflow_oidc_auth.repository.effective_permission._MAX_KEYS_PER_QUERY", 2)
+    for experiment_id in ["1", "3", "5"]:
+        store.create_experiment_permission(experiment_id, "alice", "READ")
+    store.create_group_experiment_permission("editors", "4", "EDIT")
+    store.create_experiment_regex_permission("^a.*", 1, "EDIT", "alice")
+
+    ids = ["1", "2", "3", "4", "5", "1"]
+    batch = store.get_experiments_permission_sources(ids, "alice")
+    assert list(batch) == ["1", "2", "3", "4", "5"]
+    for experiment_id, sources in batch.items():
+        single = store.get_experiment_permission_sources(experiment_id, "alice")
+        assert (sources.user, sources.groups) == (single.user, single.groups)
+        assert sources.regexes == single.regexes
+    assert store.get_experiments_permission_sources([], "alice") == {}
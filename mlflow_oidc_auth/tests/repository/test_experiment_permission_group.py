@@ -42,78 +42,6 @@ def make_user(id=1, username="user1"):
     return user
 
 
-def test__get_experiment_group_permission_found(repo, session):
-    group = make_group()
-    perm = make_permission()
-    # Mock the first query for finding the group
-    group_query = MagicMock()
-    group_query.filter().one_or_none.return_value = group
-    # Mock the second query for finding the permission
-    perm_query = MagicMock()
-    perm_query.filter().one_or_none.return_value = perm
-    # Configure session.query to return different mocks for different queries
-    session.query.side_effect = [group_query, perm_query]
-    result = repo._get_experiment_group_permission(session, "exp1", "group1")
-    assert result == perm
-
-
-def test__get_experiment_group_permission_group_not_found(repo, session):
-    # Mock the query for finding the group to return None
-    group_query = MagicMock()
-    group_query.filter().one_or_none.return_value = None
-    session.query.return_value = group_query
-    result = repo._get_experiment_group_permission(session, "exp1", "group1")
-    assert result is None
-
-
-def test__get_experiment_group_permission_permission_not_found(repo, session):
-    group = make_group()
-    # Mock the first query for finding the group - returns the group
-    group_query = MagicMock()
-    group_query.filter().one_or_none.return_value = group
-    # Mock the second query for finding the permission - returns None
-    perm_query = MagicMock()
-    perm_query.filter().one_or_none.return_value = None
-    # Configure session.query to return different mocks for different queries
-    session.query.side_effect = [group_query, perm_query]
-    result = repo._get_experiment_group_permission(session, "exp1", "group1")
-    assert result is None
-
-
-def test__get_experiment_group_permission_database_error(repo, session):
-    # Mock the first query to raise a database exception
-    group_query = MagicMock()
-    group_query.filter().one_or_none.side_effect = Exception("Database connection error")
-    session.query.return_value = group_query
-
-    with pytest.raises(Exception, match="Database connection error"):
-        repo._get_experiment_group_permission(session, "exp1", "group1")
-
-
-@patch("mlflow_oidc_auth.repository.experiment_permission_group.get_user")
-@patch("mlflow_oidc_auth.repository.experiment_permission_group.list_user_groups")
-def test__list_user_groups(mock_list_user_groups, mock_get_user, repo):
-    session = MagicMock()
-    user = make_user()
-    mock_get_user.return_value = user
-    group1 = MagicMock(spec=SqlGroup)
-    group1.id = 1
-    group1.group_name = "g1"
-    group2 = MagicMock(spec=SqlGroup)
-    group2.id = 2
-    group2.group_name = "g2"
-    # list_user_groups returns objects with .group_id
-    mock_list_user_groups.return_value = [
-        MagicMock(group_id=1),
-        MagicMock(group_id=2),
-    ]
-    # session.query(SqlGroup).filter(...).all() returns SqlGroup objects
-    session.query().filter().all.return_value = [group1, group2]
-    repo._Session.return_value.__enter__.return_value = session
-    result = repo._list_user_groups("user1")
-    assert result == ["g1", "g2"]
-
-
 @patch("mlflow_oidc_auth.repository.experiment_permission_group._validate_permission")
 @patch("mlflow_oidc_auth.repository.experiment_permission_group.get_group")
 def test_grant_group_permission(mock_get_group, mock_validate, repo):
@@ -174,53 +102,33 @@ def test_list_permissions_for_user_groups(mock_list_user_groups, mock_get_user,
     assert result == [perm1.to_mlflow_entity(), perm2.to_mlflow_entity()]
 
 
-@patch("mlflow_oidc_auth.repository.experiment_permission_group.ExperimentPermissionGroupRepository._list_user_groups")
-@patch("mlflow_oidc_auth.repository.experiment_permission_group.ExperimentPermissionGroupRepository._get_experiment_group_permission")
-@patch("mlflow_oidc_auth.repository.experiment_permission_group.compare_permissions")
-def test_get_group_permission_for_user_experiment_best_permission(mock_compare_permissions, mock_get_experiment_group_permission, mock_list_user_groups, repo):
-    session = MagicMock()
-    repo._Session.return_value.__enter__.return_value = session
-    mock_list_user_groups.return_value = ["g1", "g2"]
-    perm1 = make_permission("exp1", 1, "READ")
-    perm2 = make_permission("exp1", 2, "EDIT")
-    # First call returns perm1, second call returns perm2
-    mock_get_experiment_group_permission.side_effect = [perm1, perm2]
-    # compare_permissions returns True, so perm2 is "better"
-    mock_compare_permissions.return_value = True
-    result = repo.get_group_permission_for_user_experiment("exp1", "user1")
-    assert result == perm2.to_mlflow_entity()
-
-
-@patch("mlflow_oidc_auth.repository.experiment_permission_group.ExperimentPermissionGroupRepository._list_user_groups")
-@patch("mlflow_oidc_auth.repository.experiment_permission_group.ExperimentPermissionGroupRepository._get_experiment_group_permission")
-def test_get_group_permission_for_user_experiment_none_found(mock_get_experiment_group_permission, mock_list_user_groups, repo):
-    session = MagicMock()
-    repo._Session.return_value.__enter__.return_value = session
-    mock_list_user_groups.return_value = ["g1", "g2"]
-    mock_get_experiment_group_permission.side_effect = [None, None]
-    with pytest.raises(MlflowException) as exc:
-        repo.get_group_permission_for_user_experiment("exp1", "user1")
-    assert "not found" in str(exc.value)
-    assert exc.value.error_code == "RESOURCE_DOES_NOT_EXIST"
-
-
-@patch("mlflow_oidc_auth.repository.experiment_permission_group.ExperimentPermissionGroupRepository._list_user_groups")
-@patch("mlflow_oidc_auth.repository.experiment_permission_group.ExperimentPermissionGroupRepository._get_experiment_group_permission")
-def test_get_group_permission_for_user_experiment_attribute_error(mock_get_experiment_group_permission, mock_list_user_groups, repo):
-    session = MagicMock()
-    repo._Session.return_value.__enter__.return_value = session
-    mock_list_user_groups.return_value = ["g1"]
-
-    # Return an object with no .permission attribute to trigger AttributeError
-    class Dummy:
-        def to_mlflow_entity(self):
-            raise AttributeError()
-
-    mock_get_experiment_group_permission.return_value = Dummy()
-    with pytest.raises(MlflowException) as exc:
-        repo.get_group_permission_for_user_experiment("exp1", "user1")
-    assert "not found" in str(exc.value)
-    assert exc.value.error_code == "RESOURCE_DOES_NOT_EXIST"
+def test_get_group_permission_for_user_experiment_best_permission(sqlite_store):
+    sqlite_store.create_user("user1", "password", "User 1")
+    sqlite_store.populate_groups(["g1", "g2", "g3", "other"])
+    sqlite_store.set_user_groups("user1", ["g1", "g2", "g3"])
+    sqlite_store.create_group_experiment_permission("g1", "exp1", "READ")
+    sqlite_store.create_group_experiment_permission("g2", "exp1", "MANAGE")
+    sqlite_store.create_group_experiment_permission("g3", "exp1", "EDIT")
+    sqlite_store.create_group_experiment_permission("other", "exp2", "MANAGE")
+    repo = sqlite_store.experiment_group_repo
+    assert repo.get_group_permission_for_user_experiment("exp1", "user1").permission == "MANAGE"
+
+    sqlite_store.create_group_experiment_permission("g1", "exp3", "READ")
+    sqlite_store.create_group_experiment_permission("g2", "exp3", "NO_PERMISSIONS")
+    assert repo.get_group_permission_for_user_experiment("exp3", "user1").permission == "NO_PERMISSIONS"
+
+
+def test_get_group_permission_for_user_experiment_none_found(sqlite_store):
+    sqlite_store.create_user("user1", "password", "User 1")
+    sqlite_store.populate_groups(["g1", "other"])
+    sqlite_store.set_user_groups("user1", ["g1"])
+    sqlite_store.create_group_experiment_permission("other", "exp1", "MANAGE")
+    repo = sqlite_store.experiment_group_repo
+    for experiment_id, username in [("exp1", "user1"), ("exp1", "unknown")]:
+        with pytest.raises(MlflowException) as exc:
+            repo.get_group_permission_for_user_experiment(experiment_id, username)
+        assert "not found" in str(exc.value)
+        assert exc.value.error_code == "RESOURCE_DOES_NOT_EXIST"
 
 
 @patch("mlflow_oidc_auth.repository.experiment_permission_group._validate_permission")
@@ -0,0 +1,103 @@
+import pytest
+
+from mlflow_oidc_auth.db.models import SqlExperimentPermission, SqlUser
+from mlflow_oidc_auth.repository import MaterializedPermissionRepository
+
+
+@pytest.fixture
+def store(sqlite_store):
+    sqlite_store.create_user("alice", "password", "Alice")
+    sqlite_store.create_user("bob", "password", "Bob")
+    sqlite_store.populate_groups(["readers"])
+    sqlite_store.set_user_groups("alice", ["readers"])
+    return sqlite_store
+
+
+def _materialize(store, username, resource_type="experiment", keys=("1", "2")):
+    decisions = {key: ("READ", "fallback") for key in keys}
+    assert store.materialize_permissions(resource_type, decisions, username, store.get_permission_generations())
+
+
+def test_put_and_get(store):
+    _materialize(store, "alice")
+    assert store.get_materialized_permissions("experiment", ["1", "2", "3"], "alice") == {"1": ("READ", "fallback"), "2": ("READ", "fallback")}
+    assert store.get_materialized_permissions("experiment", ["1"], "bob") == {}
+    assert store.get_materialized_permissions("experiment", ["1"], "nobody") == {}
+
+    assert store.materialize_permissions("experiment", {"3": ("EDIT", "user")}, "alice", store.get_permission_generations(), replace=True)
+    assert store.get_materialized_permissions("experiment", ["1", "2", "3"], "alice") == {"3": ("EDIT", "user")}
+
+
+def test_permissions_computed_before_a_write_are_not_stored(store):
+    generations = store.get_permission_generations()
+    store.create_experiment_permission("1", "bob", "READ")
+    assert not store.materialize_permissions("experiment", {"1": ("READ", "fallback")}, "alice", generations)
+    assert store.get_materialized_permissions("experiment", ["1"], "alice") == {}
+
+
+def test_grants_forget_the_rows_they_change(store):
+    _materialize(store, "alice")
+    _materialize(store, "bob")
+    store.create_experiment_permission("1", "alice", "EDIT")
+    assert set(store.get_materialized_permissions("experiment", ["1", "2"], "alice")) == {"2"}
+    assert set(store.get_materialized_permissions("experiment", ["1", "2"], "bob")) == {"1", "2"}
+
+    store.create_group_experiment_permission("readers", "2", "READ")
+    assert store.get_materialized_permissions("experiment", ["1", "2"], "alice") == {}
+    assert set(store.get_materialized_permissions("experiment", ["1", "2"], "bob")) == {"1", "2"}
+
+
+def test_regex_rules_and_memberships_forget_all_rows_of_their_users(store):
+    _materialize(store, "alice")
+    _materialize(store, "alice", "registered_model", ["model"])
+    _materialize(store, "bob")
+    store.create_experiment_regex_permission(".*", 1, "READ", "bob")
+    assert store.get_materialized_permissions("experiment", ["1", "2"], "bob") == {}
+    assert set(store.get_materialized_permissions("registered_model", ["model"], "alice")) == {"model"}
+
+    store.set_user_groups("alice", [])
+    assert store.get_materialized_permissions("experiment", ["1", "2"], "alice") == {}
+    assert store.get_materialized_permissions("registered_model", ["model"], "alice") == {}
+
+
+def test_forget_drops_the_rows_of_all_users(store):
+    _materialize(store, "alice")
+    _materialize(store, "bob")
+    store.forget_materialized_permissions("experiment", ["1"])
+    assert set(store.get_materialized_permissions("experiment", ["1", "2"], "alice")) == {"2"}
+    assert set(store.get_materialized_permissions("experiment", ["1", "2"], "bob")) == {"2"}
+
+
+def test_bulk_writes_forget_only_the_rows_they_change(store):
+    store.create_experiment_permission("1", "alice", "READ")
+    _materialize(store, "alice")
+    _materialize(store, "bob")
+    with store.ManagedSessionMaker() as session:
+        bob_id = session.query(SqlUser.id).filter(SqlUser.username == "bob").scalar()
+        session.query(SqlExperimentPermission).filter(SqlExperimentPermission.experiment_id == "1").update({"user_id": bob_id})
+    # the grant moved from alice to bob on experiment 1: rows of both on it are stale
+    assert set(store.get_materialized_permissions("experiment", ["1", "2"], "alice")) == {"2"}
+    assert set(store.get_materialized_permissions("experiment", ["1", "2"], "bob")) == {"2"}
+
+    _materialize(store, "alice")
+    _materialize(store, "bob")
+    with store.ManagedSessionMaker() as session:
+        session.query(SqlExperimentPermission).filter(SqlExperimentPermission.experiment_id == "1").delete()
+    assert set(store.get_materialized_permissions("experiment", ["1", "2"], "alice")) == {"1", "2"}
+    assert set(store.get_materialized_permissions("experiment", ["1", "2"], "bob")) == {"2"}
+
+
+def test_rows_of_another_configuration_are_not_served(store):
+    _materialize(store, "alice")
+    reconfigured = MaterializedPermissionRepository(store.ManagedSessionMaker, "other")
+    assert reconfigured.get("experiment", ["1", "2"], "alice") == {}
+    assert reconfigured.put("experiment", {"1": ("EDIT", "fallback")}, "alice", store.get_permission_generations())
+    assert reconfigured.get("experiment", ["1", "2"], "alice") == {"1": ("EDIT", "fallback")}
+    # workers with different configurations keep separate rows
+    assert store.get_materialized_permissions("experiment", ["1", "2"], "alice") == {"1": ("READ", "fallback"), "2": ("READ", "fallback")}
+    assert reconfigured.put("experiment", {"1": ("MANAGE", "fallback")}, "alice", store.get_permission_generations())
+    assert store.get_materialized_permissions("experiment", ["1"], "alice") == {"1": ("READ", "fallback")}
+
+    # a rebuild drops the rows of other configurations
+    assert store.materialize_permissions("experiment", {"3": ("EDIT", "user")}, "alice", store.get_permission_generations(), replace=True)
+    assert reconfigured.get("experiment", ["1", "2", "3"], "alice") == {}
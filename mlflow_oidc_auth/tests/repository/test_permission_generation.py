@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def store(sqlite_store):
+    sqlite_store.create_user("alice", "password", "Alice")
+    sqlite_store.populate_groups(["readers"])
+    return sqlite_store
+
+
+def _changed(store, action):
+    before = store.permission_generation_repo.snapshot()
+    action()
+    after = store.permission_generation_repo.snapshot()
+    return {scope for scope in after if after[scope] != before.get(scope)}
+
+
+def test_writes_bump_their_scopes(store):
+    assert _changed(store, lambda: store.create_experiment_permission("1", "alice", "READ")) == {"experiment"}
+    assert _changed(store, lambda: store.update_experiment_permission("1", "alice", "EDIT")) == {"experiment"}
+    assert _changed(store, lambda: store.delete_experiment_permission("1", "alice")) == {"experiment"}
+    assert _changed(store, lambda: store.create_registered_model_permission("model", "alice", "READ")) == {"registered_model", "prompt"}
+    assert _changed(store, lambda: store.create_group_model_permission("readers", "model", "READ")) == {"registered_model"}
+    assert _changed(store, lambda: store.create_group_prompt_permission("readers", "prompt", "READ")) == {"prompt"}
+    assert _changed(store, lambda: store.set_user_groups("alice", ["readers"])) == {"user", "group"}
+    assert _changed(store, lambda: store.update_user("alice", is_admin=True)) == {"user"}
+    assert _changed(store, lambda: store.bump_permission_generations({"experiment"})) == {"experiment"}
+
+
+def test_reads_do_not_bump(store):
+    assert _changed(store, lambda: store.get_experiment_permission_sources("1", "alice")) == set()
+    assert _changed(store, lambda: store.authenticate_user("alice", "password")) == set()
+
+
+def test_authentication_with_password_expiration_does_not_bump(store):
+    store.update_user("alice", password="password", password_expiration=datetime.now() + timedelta(days=1))
+    for _ in range(3):
+        assert _changed(store, lambda: store.authenticate_user("alice", "password")) == set()
+
+
+def test_bulk_deletes_bump_their_scopes(store):
+    store.create_user_api_key("alice", "ci")
+    assert _changed(store, lambda: store.delete_user_api_key("alice", "ci")) == {"user"}
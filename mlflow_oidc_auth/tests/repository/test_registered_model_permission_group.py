@@ -32,29 +32,24 @@ def test_get(repo, session):
         assert result == ["entity"]
 
 
-def test_get_for_user_found(repo, session):
-    repo._group_repo.list_groups_for_user = MagicMock(return_value=["g"])
-    perm = MagicMock()
-    perm.to_mlflow_entity.return_value = "entity"
-    with patch.object(repo, "_get_registered_model_group_permission", side_effect=[perm]):
-        result = repo.get_for_user("name", "user")
-        assert result == "entity"
-
-
-def test_get_for_user_not_found(repo, session):
-    repo._group_repo.list_groups_for_user = MagicMock(return_value=["g"])
-    with patch.object(repo, "_get_registered_model_group_permission", side_effect=[None]):
-        with pytest.raises(MlflowException):
-            repo.get_for_user("name", "user")
-
-
-def test_get_for_user_attribute_error(repo, session):
-    repo._group_repo.list_groups_for_user = MagicMock(return_value=["g"])
-    perm = MagicMock()
-    del perm.to_mlflow_entity
-    with patch.object(repo, "_get_registered_model_group_permission", side_effect=[perm]):
-        with pytest.raises(MlflowException):
-            repo.get_for_user("name", "user")
+def test_get_for_user_found(sqlite_store):
+    sqlite_store.create_user("user", "password", "User")
+    sqlite_store.populate_groups(["g1", "g2"])
+    sqlite_store.set_user_groups("user", ["g1", "g2"])
+    sqlite_store.create_group_model_permission("g1", "name", "EDIT")
+    sqlite_store.create_group_model_permission("g2", "name", "READ")
+    result = sqlite_store.registered_model_group_repo.get_for_user("name", "user")
+    assert result.permission == "EDIT"
+
+
+def test_get_for_user_not_found(sqlite_store):
+    sqlite_store.create_user("user", "password", "User")
+    sqlite_store.populate_groups(["g1"])
+    sqlite_store.create_group_model_permission("g1", "name", "EDIT")
+    with pytest.raises(MlflowException):
+        sqlite_store.registered_model_group_repo.get_for_user("name", "user")
+    with pytest.raises(MlflowException):
+        sqlite_store.registered_model_group_repo.get_for_user("name", "unknown")
 
 
 def test_list_for_user(repo, session):
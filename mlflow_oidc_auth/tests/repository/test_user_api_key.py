@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from mlflow.exceptions import MlflowException
+
+from mlflow_oidc_auth.repository.user_api_key import UserApiKeyRepository, is_api_key, parse_api_key
+
+
+@pytest.fixture
+def session():
+    s = MagicMock()
+    s.__enter__.return_value = s
+    s.__exit__.return_value = None
+    return s
+
+
+@pytest.fixture
+def session_maker(session):
+    return MagicMock(return_value=session)
+
+
+@pytest.fixture
+def repo(session_maker):
+    return UserApiKeyRepository(session_maker, "digest-secret")
+
+
+def _issue(repo, session):
+    user = MagicMock(id=1)
+    with patch("mlflow_oidc_auth.repository.user_api_key.get_user", return_value=user):
+        _, token = repo.create("user", "ci")
+    return token, session.add.call_args[0][0]
+
+
+def test_parse_api_key():
+    assert parse_api_key("mlf_" + "a" * 12 + "_" + "b" * 40) == ("a" * 12, "b" * 40)
+    assert parse_api_key("plainpassword") is None
+    assert parse_api_key("mlf_short_secret") is None
+    assert not is_api_key("x" * 24)
+
+
+def test_create_replaces_key_with_same_name_and_stores_digest_only(repo, session):
+    token, api_key = _issue(repo, session)
+    key_id, secret = parse_api_key(token)
+    assert api_key.key_id == key_id
+    assert api_key.name == "ci"
+    assert secret not in api_key.key_digest
+    assert len(api_key.key_digest) == 64
+    session.query().filter().delete.assert_called()
+
+
+def test_authenticate_matching_key(repo, session):
+    token, api_key = _issue(repo, session)
+    session.query().join().filter().one_or_none.return_value = MagicMock(key_digest=api_key.key_digest, expires_at=None)
+    assert repo.authenticate("user", token) is True
+
+
+def test_authenticate_wrong_secret(repo, session):
+    token, api_key = _issue(repo, session)
+    session.query().join().filter().one_or_none.return_value = MagicMock(key_digest=api_key.key_digest, expires_at=None)
+    key_id, _ = parse_api_key(token)
+    with patch("mlflow_oidc_auth.repository.user_api_key.app") as app:
+        assert repo.authenticate("user", f"mlf_{key_id}_{'x' * 40}") is False
+    # a digest secret change revokes every key, which operators have to be able to see
+    app.logger.error.assert_called_once()
+    assert key_id in app.logger.error.call_args[0]
+
+
+def test_authenticate_expired_key(repo, session):
+    token, api_key = _issue(repo, session)
+    expired = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(minutes=1)
+    session.query().join().filter().one_or_none.return_value = MagicMock(key_digest=api_key.key_digest, expires_at=expired)
+    assert repo.authenticate("user", token) is False
+
+
+def test_authenticate_unknown_key(repo, session):
+    session.query().join().filter().one_or_none.return_value = None
+    assert repo.authenticate("user", "mlf_" + "a" * 12 + "_" + "b" * 40) is False
+    assert repo.authenticate("user", "not-an-api-key") is False
+
+
+def test_delete_missing_key(repo, session):
+    session.query().filter().delete.return_value = 0
+    with patch("mlflow_oidc_auth.repository.user_api_key.get_user", return_value=MagicMock(id=1)):
+        with pytest.raises(MlflowException):
+            repo.delete("user", "ci")
+
+
+def test_list_for_user(repo, session):
+    key = MagicMock()
+    key.to_mlflow_entity.return_value = "entity"
+    session.query().filter().order_by().all.return_value = [key]
+    with patch("mlflow_oidc_auth.repository.user_api_key.get_user", return_value=MagicMock(id=1)):
+        assert repo.list_for_user("user") == ["entity"]
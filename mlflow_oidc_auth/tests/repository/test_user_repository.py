@@ -46,6 +46,23 @@ def test_get_not_found(repo, session):
         repo.get("user")
 
 
+def test_get_identity_found(repo, session):
+    row = MagicMock(id=1, username="user", is_admin=1, is_service_account=0, password_expiration=None)
+    session.query().filter().one_or_none.return_value = row
+    identity = repo.get_identity("user")
+    assert identity.id == 1
+    assert identity.username == "user"
+    assert identity.is_admin is True
+    assert identity.is_service_account is False
+    assert identity.password_expiration is None
+
+
+def test_get_identity_not_found(repo, session):
+    session.query().filter().one_or_none.return_value = None
+    with pytest.raises(MlflowException):
+        repo.get_identity("user")
+
+
 def test_exist_true(repo, session):
     session.query().filter().first.return_value = True
     assert repo.exist("user") is True
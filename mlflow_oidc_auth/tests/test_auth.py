@@ -37,20 +37,21 @@ class TestAuth:
         )
         assert result == mock_oauth_instance
 
-    @patch("mlflow_oidc_auth.auth.requests")
+    @patch("mlflow_oidc_auth.auth.jwks_fetcher")
     @patch("mlflow_oidc_auth.auth.config")
-    def test_get_oidc_jwks_success(self, mock_config, mock_requests):
+    def test_get_oidc_jwks_success(self, mock_config, mock_fetcher):
         mock_cache = MagicMock()
         mock_app = MagicMock()
-        mock_requests.get.return_value.json.return_value = {"jwks_uri": "jwks_uri"}
+        mock_fetcher.fetch_jwks.return_value = {"keys": []}
         mock_cache.get.return_value = None
         mock_config.OIDC_DISCOVERY_URL = "discovery_url"
 
         mlflow_oidc_app = importlib.import_module("mlflow_oidc_auth.app")
         with patch.object(mlflow_oidc_app, "cache", mock_cache), patch.object(mlflow_oidc_app, "app", mock_app):
             result = _get_oidc_jwks()
-            mock_cache.set.assert_called_once_with("jwks", mock_requests.get.return_value.json.return_value, timeout=3600)
-            assert result == mock_requests.get.return_value.json.return_value
+            mock_fetcher.fetch_jwks.assert_called_once_with("discovery_url")
+            mock_cache.set.assert_called_once_with("jwks", {"keys": []}, timeout=3600)
+            assert result == {"keys": []}
 
     @patch("mlflow_oidc_auth.auth.app")
     def test_get_oidc_jwks_cache_hit(self, mock_app):
@@ -81,33 +82,33 @@ class TestAuth:
 
         mlflow_oidc_app = importlib.import_module("mlflow_oidc_auth.app")
         with patch.object(mlflow_oidc_app, "cache", mock_cache), patch.object(mlflow_oidc_app, "app", mock_app):
-            with patch("mlflow_oidc_auth.auth.requests") as mock_requests:
-                mock_requests.get.return_value.json.return_value = {"jwks_uri": "jwks_uri"}
-                mock_cache.get.return_value = None
+            with patch("mlflow_oidc_auth.auth.jwks_fetcher") as mock_fetcher:
+                mock_fetcher.fetch_jwks.return_value = {"keys": []}
+                mock_cache.get.return_value = {"keys": "cached_keys"}
 
-                _get_oidc_jwks(clear_cache=True)
-                mock_cache.delete.assert_called_once_with("jwks")
+                assert _get_oidc_jwks(clear_cache=True) == {"keys": []}
+                # the shared key set is replaced, never deleted
+                mock_cache.delete.assert_not_called()
+                mock_cache.set.assert_called_once_with("jwks", {"keys": []}, timeout=3600)
 
-    @patch("mlflow_oidc_auth.auth._get_oidc_jwks")
+    @patch("mlflow_oidc_auth.auth._jwks_registry")
     @patch("mlflow_oidc_auth.auth.jwt.decode")
-    def test_validate_token_success(self, mock_jwt_decode, mock_get_oidc_jwks):
-        mock_jwks = {"keys": "jwks"}
-        mock_get_oidc_jwks.return_value = mock_jwks
+    def test_validate_token_success(self, mock_jwt_decode, mock_registry):
         mock_payload = MagicMock()
         mock_jwt_decode.return_value = mock_payload
 
         result = validate_token("token")
 
-        mock_jwt_decode.assert_called_once_with("token", mock_jwks)
+        mock_jwt_decode.assert_called_once_with("token", mock_registry.find_key)
         mock_payload.validate.assert_called_once()
+        mock_registry.refresh_if_allowed.assert_not_called()
         assert result == mock_payload
 
-    @patch("mlflow_oidc_auth.auth._get_oidc_jwks")
+    @patch("mlflow_oidc_auth.auth._jwks_registry")
     @patch("mlflow_oidc_auth.auth.jwt.decode")
-    def test_validate_token_bad_signature_then_success(self, mock_jwt_decode, mock_get_oidc_jwks):
+    def test_validate_token_bad_signature_then_success(self, mock_jwt_decode, mock_registry):
         from authlib.jose.errors import BadSignatureError
 
-        mock_get_oidc_jwks.side_effect = [{"keys": "jwks1"}, {"keys": "jwks2"}]
         mock_payload = MagicMock()
         mock_jwt_decode.side_effect = [BadSignatureError("bad sig"), mock_payload]
 
@@ -115,21 +116,34 @@ class TestAuth:
         with patch.object(mlflow_oidc_app, "app", MagicMock()):
             result = validate_token("token")
             assert result == mock_payload
-            assert mock_get_oidc_jwks.call_count == 2
+            mock_registry.refresh_if_allowed.assert_called_once_with()
+            assert mock_jwt_decode.call_count == 2
 
-    @patch("mlflow_oidc_auth.auth._get_oidc_jwks")
+    @patch("mlflow_oidc_auth.auth._jwks_registry")
     @patch("mlflow_oidc_auth.auth.jwt.decode")
-    def test_validate_token_exception_after_refresh(self, mock_jwt_decode, mock_get_oidc_jwks):
+    def test_validate_token_exception_after_refresh(self, mock_jwt_decode, mock_registry):
         from authlib.jose.errors import BadSignatureError
 
-        mock_get_oidc_jwks.side_effect = [{"keys": "jwks1"}, {"keys": "jwks2"}]
         mock_jwt_decode.side_effect = [BadSignatureError("bad sig"), Exception("other error")]
 
         mlflow_oidc_app = importlib.import_module("mlflow_oidc_auth.app")
         with patch.object(mlflow_oidc_app, "app", MagicMock()):
             with pytest.raises(Exception, match="other error"):
                 validate_token("token")
-            assert mock_get_oidc_jwks.call_count == 2
+            mock_registry.refresh_if_allowed.assert_called_once_with()
+
+    @patch("mlflow_oidc_auth.auth._jwks_registry")
+    @patch("mlflow_oidc_auth.auth.jwt.decode")
+    def test_validate_token_bad_signature_within_refresh_interval(self, mock_jwt_decode, mock_registry):
+        from authlib.jose.errors import BadSignatureError
+
+        mock_jwt_decode.side_effect = BadSignatureError("bad sig")
+        mock_registry.refresh_if_allowed.return_value = False
+
+        with patch("mlflow_oidc_auth.auth.app"):
+            with pytest.raises(BadSignatureError):
+                validate_token("forged-token")
+        assert mock_jwt_decode.call_count == 1
 
     @patch("mlflow_oidc_auth.auth.store")
     def test_authenticate_request_basic_auth_success(self, mock_store):
@@ -410,3 +424,54 @@ class TestAuth:
             email, errors = process_oidc_callback(mock_request, session)
             assert email is None
             assert "Some error" in errors
+
+    @patch("mlflow_oidc_auth.auth._jwks_registry")
+    @patch("mlflow_oidc_auth.auth.jwt.decode")
+    def test_validate_token_caches_claims_until_expiry(self, mock_jwt_decode, mock_registry):
+        import time
+
+        from mlflow_oidc_auth.auth import _token_claims_cache
+
+        _token_claims_cache.clear()
+        claims = MagicMock()
+        claims.get.return_value = time.time() + 600
+        mock_jwt_decode.return_value = claims
+
+        assert validate_token("cached-token") == claims
+        assert validate_token("cached-token") == claims
+        mock_jwt_decode.assert_called_once()
+        claims.get.assert_called_with("exp")
+        _token_claims_cache.clear()
+
+    @patch("mlflow_oidc_auth.auth._jwks_registry")
+    @patch("mlflow_oidc_auth.auth.jwt.decode")
+    def test_validate_token_does_not_cache_tokens_without_exp(self, mock_jwt_decode, mock_registry):
+        from mlflow_oidc_auth.auth import _token_claims_cache
+
+        _token_claims_cache.clear()
+        claims = MagicMock()
+        claims.get.return_value = None
+        mock_jwt_decode.return_value = claims
+        validate_token("no-exp-token")
+        validate_token("no-exp-token")
+        assert mock_jwt_decode.call_count == 2
+        assert len(_token_claims_cache) == 0
+
+    @patch("mlflow_oidc_auth.auth.config")
+    @patch("mlflow_oidc_auth.auth._jwks_registry")
+    @patch("mlflow_oidc_auth.auth.jwks_fetcher")
+    def test_jwks_refresh_invalidates_token_claims_cache_when_key_ids_change(self, mock_fetcher, mock_registry, mock_config):
+        from mlflow_oidc_auth.auth import _token_claims_cache
+
+        mock_config.OIDC_DISCOVERY_URL = "discovery_url"
+        mock_registry.key_ids = frozenset(["old"])
+        mlflow_oidc_app = importlib.import_module("mlflow_oidc_auth.app")
+        with patch.object(mlflow_oidc_app, "cache", MagicMock()), patch("mlflow_oidc_auth.auth.app"):
+            _token_claims_cache.set("key", {"email": "user@example.com"})
+            mock_fetcher.fetch_jwks.return_value = {"keys": [{"kid": "old"}]}
+            _get_oidc_jwks(clear_cache=True)
+            assert _token_claims_cache.get("key") == {"email": "user@example.com"}
+
+            mock_fetcher.fetch_jwks.return_value = {"keys": [{"kid": "new"}]}
+            _get_oidc_jwks(clear_cache=True)
+            assert _token_claims_cache.get("key") is None
@@ -1,5 +1,19 @@
 import unittest
-from mlflow_oidc_auth.entities import User, ExperimentPermission, RegisteredModelPermission, Group, UserGroup
+from mlflow_oidc_auth.entities import User, UserIdentity, ExperimentPermission, RegisteredModelPermission, Group, UserGroup
+
+
+class TestUserIdentity(unittest.TestCase):
+    def test_user_identity_json_round_trip(self):
+        identity = UserIdentity(id_=1, username="svc", is_admin=False, is_service_account=True)
+        expected_json = {
+            "id": 1,
+            "username": "svc",
+            "is_admin": False,
+            "is_service_account": True,
+            "password_expiration": None,
+        }
+        self.assertEqual(identity.to_json(), expected_json)
+        self.assertEqual(UserIdentity.from_json(expected_json).to_json(), expected_json)
 
 
 class TestUser(unittest.TestCase):
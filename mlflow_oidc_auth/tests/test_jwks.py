@@ -0,0 +1,186 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from authlib.jose import JsonWebKey, jwt
+
+from mlflow_oidc_auth.jwks import JwksFetcher, JwksKeyRegistry
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _key(kid):
+    return JsonWebKey.generate_key("RSA", 2048, is_private=True, options={"kid": kid})
+
+
+def _jwks(*keys):
+    return {"keys": [k.as_dict(is_private=False) for k in keys]}
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return _key("k1"), _key("k2")
+
+
+def test_find_key_selects_by_kid_and_decodes(keys):
+    k1, k2 = keys
+    load_jwks = MagicMock(return_value=_jwks(k1, k2))
+    registry = JwksKeyRegistry(load_jwks)
+    token = jwt.encode({"alg": "RS256", "kid": "k2"}, {"sub": "user"}, k2)
+
+    claims = jwt.decode(token, registry.find_key)
+    assert claims["sub"] == "user"
+    jwt.decode(token, registry.find_key)
+    # parsed once from the shared cache, then served from process memory
+    load_jwks.assert_called_once_with(False)
+
+
+def test_unknown_kid_reloads_shared_cache_then_identity_provider(keys):
+    k1, k2 = keys
+    load_jwks = MagicMock(side_effect=[_jwks(k1), _jwks(k1), _jwks(k1, k2)])
+    registry = JwksKeyRegistry(load_jwks)
+    registry.find_key({"kid": "k1"})
+
+    assert registry.find_key({"kid": "k2"}) is not None
+    assert [c.args for c in load_jwks.call_args_list] == [(False,), (False,), (True,)]
+
+
+def test_unknown_kid_forced_refresh_is_throttled(keys):
+    k1, _ = keys
+    timer = FakeTimer()
+    load_jwks = MagicMock(return_value=_jwks(k1))
+    registry = JwksKeyRegistry(load_jwks, min_forced_refresh_interval=30, timer=timer)
+    with pytest.raises(ValueError):
+        registry.find_key({"kid": "unknown"})
+    with pytest.raises(ValueError):
+        registry.find_key({"kid": "unknown"})
+    assert [c.args for c in load_jwks.call_args_list].count((True,)) == 1
+
+
+def test_refresh_if_allowed_is_throttled(keys):
+    k1, _ = keys
+    timer = FakeTimer()
+    load_jwks = MagicMock(return_value=_jwks(k1))
+    registry = JwksKeyRegistry(load_jwks, min_forced_refresh_interval=30, timer=timer)
+    assert registry.refresh_if_allowed()
+    assert not registry.refresh_if_allowed()
+    timer.now += 30
+    assert registry.refresh_if_allowed()
+    assert load_jwks.call_count == 2
+
+
+def test_key_without_kid_uses_single_key(keys):
+    k1, _ = keys
+    registry = JwksKeyRegistry(MagicMock(return_value=_jwks(k1)))
+    assert registry.find_key({}) is not None
+
+
+def test_key_ids_include_keys_that_could_not_be_parsed(keys):
+    k1, _ = keys
+    registry = JwksKeyRegistry(MagicMock())
+    registry.load({"keys": [*_jwks(k1)["keys"], {"kid": "broken", "kty": "unknown"}]})
+    assert registry.key_ids == {"k1", "broken"}
+    registry.clear()
+    assert registry.key_ids == frozenset()
+
+
+def test_refreshes_before_ttl_lapses(keys):
+    k1, _ = keys
+    timer = FakeTimer()
+    load_jwks = MagicMock(return_value=_jwks(k1))
+    registry = JwksKeyRegistry(load_jwks, ttl=100, refresh_ahead=0.9, timer=timer)
+    registry.find_key({"kid": "k1"})
+
+    timer.now += 95
+    registry.find_key({"kid": "k1"})
+    registry._background_refresh.join(timeout=5)
+    load_jwks.assert_called_with(True)
+
+
+def test_expired_key_set_is_kept_when_refresh_fails(keys):
+    k1, _ = keys
+    timer = FakeTimer()
+    load_jwks = MagicMock(side_effect=[_jwks(k1), Exception("IdP down")])
+    registry = JwksKeyRegistry(load_jwks, ttl=100, timer=timer)
+    registry.find_key({"kid": "k1"})
+
+    timer.now += 200
+    assert registry.find_key({"kid": "k1"}) is not None
+
+
+def _response(payload):
+    response = MagicMock()
+    response.json.return_value = payload
+    return response
+
+
+def test_fetcher_caches_discovery_document_separately():
+    session = MagicMock()
+    session.get.side_effect = lambda url, timeout: _response({"jwks_uri": "https://idp/jwks"} if url == "https://idp/discovery" else {"keys": []})
+    fetcher = JwksFetcher(session=session, timeout=(1, 2))
+
+    assert fetcher.fetch_jwks("https://idp/discovery") == {"keys": []}
+    assert fetcher.fetch_jwks("https://idp/discovery") == {"keys": []}
+    urls = [c.args[0] for c in session.get.call_args_list]
+    assert urls == ["https://idp/discovery", "https://idp/jwks", "https://idp/jwks"]
+    assert all(c.kwargs["timeout"] == (1, 2) for c in session.get.call_args_list)
+    stats = fetcher.stats()
+    assert stats["refresh_count"] == 2
+    assert stats["failure_count"] == 0
+    assert stats["last_refresh"] is not None
+
+
+def test_fetcher_counts_failures_and_forgets_discovery_document():
+    session = MagicMock()
+    session.get.side_effect = [
+        _response({"jwks_uri": "https://idp/jwks"}),
+        Exception("boom"),
+        _response({"jwks_uri": "https://idp/jwks"}),
+        _response({"keys": []}),
+    ]
+    fetcher = JwksFetcher(session=session)
+
+    with pytest.raises(Exception, match="boom"):
+        fetcher.fetch_jwks("https://idp/discovery")
+    assert fetcher.stats()["failure_count"] == 1
+    assert fetcher.stats()["consecutive_failures"] == 1
+    assert fetcher.fetch_jwks("https://idp/discovery") == {"keys": []}
+    assert fetcher.stats()["consecutive_failures"] == 0
+    assert session.get.call_count == 4
+
+
+def test_fetcher_coalesces_concurrent_fetches():
+    release = threading.Event()
+    started = threading.Event()
+    session = MagicMock()
+
+    def get(url, timeout):
+        if url.endswith("jwks"):
+            started.set()
+            release.wait(timeout=5)
+            return _response({"keys": []})
+        return _response({"jwks_uri": "https://idp/jwks"})
+
+    session.get.side_effect = get
+    fetcher = JwksFetcher(session=session)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(fetcher.fetch_jwks("https://idp/discovery"))) for _ in range(8)]
+    threads[0].start()
+    started.wait(timeout=5)
+    for t in threads[1:]:
+        t.start()
+    while fetcher.coalesced_count < 7:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join(timeout=5)
+
+    assert results == [{"keys": []}] * 8
+    assert [c.args[0] for c in session.get.call_args_list].count("https://idp/jwks") == 1
@@ -0,0 +1,63 @@
+from mlflow_oidc_auth.local_cache import LocalCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_set_and_stats():
+    cache = LocalCache(maxsize=2)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1, "maxsize": 2}
+
+
+def test_lru_eviction():
+    cache = LocalCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_expiration():
+    timer = FakeTimer()
+    cache = LocalCache(maxsize=10, ttl=5, timer=timer)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=20)
+    timer.now = 6
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert len(cache) == 1
+
+
+def test_non_positive_ttl_and_disabled_cache_do_not_store():
+    cache = LocalCache(maxsize=10)
+    cache.set("a", 1, ttl=0)
+    assert cache.get("a") is None
+    disabled = LocalCache(maxsize=0)
+    disabled.set("a", 1)
+    assert disabled.get("a") is None
+    assert not disabled.enabled
+
+
+def test_delete_where_and_clear():
+    cache = LocalCache(maxsize=10)
+    cache.set(("alice", 1), 1)
+    cache.set(("bob", 1), 2)
+    cache.delete_where(lambda key: key[0] == "alice")
+    assert cache.get(("alice", 1)) is None
+    assert cache.get(("bob", 1)) == 2
+    cache.delete(("bob", 1))
+    assert len(cache) == 0
+    cache.set("c", 3)
+    cache.clear()
+    assert len(cache) == 0
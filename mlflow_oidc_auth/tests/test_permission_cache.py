@@ -0,0 +1,181 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from mlflow_oidc_auth.permission_cache import PermissionChangePoller, PermissionDecisionCache, RunWriteLeases, permission_decision_cache
+from mlflow_oidc_auth.repository.permission_generation import bump_generations
+from mlflow_oidc_auth.utils import (
+    effective_experiment_permission,
+    effective_experiment_permissions,
+    effective_registered_model_permission,
+    rebuild_materialized_permissions,
+)
+
+
+def _fake_backend():
+    data = {}
+    backend = MagicMock()
+    backend.get.side_effect = data.get
+    backend.set.side_effect = lambda key, value, timeout=None: data.__setitem__(key, value)
+    return backend
+
+
+def test_decisions_computed_before_a_write_are_not_stored():
+    cache = PermissionDecisionCache(maxsize=10, ttl=60)
+    version = cache.current_version()
+    cache.invalidate()
+    cache.set("experiment", "alice", "1", ("READ", "user"), version)
+    assert cache.get("experiment", "alice", "1", cache.current_version()) is None
+
+    version = cache.current_version()
+    cache.set("experiment", "alice", "1", ("READ", "user"), version)
+    assert cache.get("experiment", "alice", "1", version) == ("READ", "user")
+    cache.invalidate()
+    assert cache.get("experiment", "alice", "1", cache.current_version()) is None
+
+
+def test_shared_decisions_are_invalidated_in_every_worker():
+    backend = _fake_backend()
+    first, second = PermissionDecisionCache(maxsize=10, ttl=60, shared=True), PermissionDecisionCache(maxsize=10, ttl=60, shared=True)
+    with patch("mlflow_oidc_auth.app.cache", backend):
+        first.set("experiment", "alice", "1", ("READ", "user"), first.current_version())
+        assert second.get("experiment", "alice", "1", second.current_version()) == ("READ", "user")
+
+        first.invalidate()
+        assert second.get("experiment", "alice", "1", second.current_version()) is None
+
+
+def test_store_writes_invalidate_decisions(sqlite_store):
+    sqlite_store.create_user("alice", "password", "Alice")
+    sqlite_store.create_experiment_permission("1", "alice", "READ")
+    with patch("mlflow_oidc_auth.utils.store", sqlite_store), patch.object(
+        sqlite_store, "get_experiment_permission_sources", wraps=sqlite_store.get_experiment_permission_sources
+    ) as load_sources:
+        assert effective_experiment_permission("1", "alice").permission.name == "READ"
+        assert effective_experiment_permission("1", "alice").permission.name == "READ"
+        assert load_sources.call_count == 1
+
+        sqlite_store.update_experiment_permission("1", "alice", "MANAGE")
+        assert effective_experiment_permission("1", "alice").permission.name == "MANAGE"
+        assert load_sources.call_count == 2
+
+
+def test_batched_decisions_only_resolve_missing_resources(sqlite_store):
+    sqlite_store.create_user("alice", "password", "Alice")
+    sqlite_store.create_experiment_permission("1", "alice", "EDIT")
+    with patch("mlflow_oidc_auth.utils.store", sqlite_store), patch("mlflow_oidc_auth.utils.config.DEFAULT_MLFLOW_PERMISSION", "NO_PERMISSIONS"):
+        assert effective_experiment_permission("1", "alice").permission.name == "EDIT"
+        with patch.object(sqlite_store, "get_experiments_permission_sources", wraps=sqlite_store.get_experiments_permission_sources) as load_sources:
+            results = effective_experiment_permissions(["1", "2"], "alice")
+        load_sources.assert_called_once_with(["2"], "alice")
+    assert {experiment_id: (result.permission.name, result.type) for experiment_id, result in results.items()} == {
+        "1": ("EDIT", "user"),
+        "2": ("NO_PERMISSIONS", "fallback"),
+    }
+    assert permission_decision_cache.get("experiment", "alice", "2", permission_decision_cache.current_version()) == ("NO_PERMISSIONS", "fallback")
+
+
+def test_poller_reports_changed_scopes_at_most_once_per_interval():
+    now = [0.0]
+    generations = {"user": 0, "experiment": 0}
+    load = MagicMock(side_effect=lambda: dict(generations))
+    changes = []
+    poller = PermissionChangePoller(load, interval=1, timer=lambda: now[0])
+    poller.subscribe(changes.append)
+
+    poller.poll()
+    assert changes == [{"user", "experiment", "*"}]
+
+    generations["experiment"] += 1
+    poller.poll()
+    assert load.call_count == 1
+
+    now[0] = 1.5
+    poller.poll()
+    poller.poll()
+    assert changes[1:] == [{"experiment"}]
+    assert load.call_count == 2
+
+    now[0] = 3
+    poller.poll()
+    assert len(changes) == 2
+
+
+def test_store_drops_caches_on_changes_from_other_workers(sqlite_store):
+    sqlite_store.create_user("alice", "password", "Alice")
+    sqlite_store.poll_permission_changes()
+    sqlite_store.authenticate_user("alice", "password")
+    version = permission_decision_cache.version
+
+    # another worker writing to the same database
+    with sqlite_store.ManagedSessionMaker() as session:
+        bump_generations(session, {"user"})
+    sqlite_store.permission_changes._next_poll = 0
+    sqlite_store.poll_permission_changes()
+
+    assert len(sqlite_store.credential_cache) == 0
+    assert permission_decision_cache.version == version + 1
+
+
+def test_store_drops_experiment_names_on_experiment_changes_from_other_workers(sqlite_store):
+    sqlite_store.poll_permission_changes()
+    with patch("mlflow_oidc_auth.sqlalchemy_store.experiment_name_cache") as names:
+        # another worker renaming an experiment
+        sqlite_store.bump_permission_generations({"experiment"})
+        sqlite_store.permission_changes._next_poll = 0
+        sqlite_store.poll_permission_changes()
+    names.clear.assert_called_once()
+
+
+def test_materialized_permissions_are_served_from_the_table(sqlite_store):
+    sqlite_store.create_user("alice", "password", "Alice")
+    sqlite_store.create_experiment_permission("1", "alice", "EDIT")
+    with patch("mlflow_oidc_auth.utils.store", sqlite_store), patch("mlflow_oidc_auth.utils.config.OIDC_MATERIALIZED_PERMISSIONS", True), patch(
+        "mlflow_oidc_auth.utils.config.DEFAULT_MLFLOW_PERMISSION", "NO_PERMISSIONS"
+    ):
+        assert effective_experiment_permission("1", "alice").permission.name == "EDIT"
+        assert sqlite_store.get_materialized_permissions("experiment", ["1", "2"], "alice") == {"1": ("EDIT", "user")}
+
+        permission_decision_cache.invalidate()
+        with patch.object(sqlite_store, "get_experiments_permission_sources", wraps=sqlite_store.get_experiments_permission_sources) as load_sources:
+            results = effective_experiment_permissions(["1", "2"], "alice")
+        load_sources.assert_called_once_with(["2"], "alice")
+        assert {experiment_id: result.permission.name for experiment_id, result in results.items()} == {"1": "EDIT", "2": "NO_PERMISSIONS"}
+
+        sqlite_store.update_experiment_permission("1", "alice", "READ")
+        assert effective_experiment_permission("1", "alice").permission.name == "READ"
+
+
+def test_rebuild_materialized_permissions(sqlite_store):
+    sqlite_store.create_user("alice", "password", "Alice")
+    sqlite_store.create_user("bob", "password", "Bob")
+    sqlite_store.create_registered_model_permission("model", "bob", "MANAGE")
+    sqlite_store.materialize_permissions("experiment", {"deleted": ("READ", "user")}, "alice", sqlite_store.get_permission_generations())
+    with patch("mlflow_oidc_auth.utils.store", sqlite_store), patch("mlflow_oidc_auth.utils.config.DEFAULT_MLFLOW_PERMISSION", "READ"), patch(
+        "mlflow_oidc_auth.utils.fetch_all_experiments", return_value=[SimpleNamespace(experiment_id="1", name="one")]
+    ), patch("mlflow_oidc_auth.utils.fetch_all_registered_models", return_value=[SimpleNamespace(name="model")]), patch(
+        "mlflow_oidc_auth.utils.fetch_all_prompts", return_value=[]
+    ):
+        assert rebuild_materialized_permissions() == 4
+        with patch.object(sqlite_store, "get_registered_model_permission_sources") as load_sources, patch(
+            "mlflow_oidc_auth.utils.config.OIDC_MATERIALIZED_PERMISSIONS", True
+        ):
+            assert effective_registered_model_permission("model", "bob").permission.name == "MANAGE"
+        load_sources.assert_not_called()
+    assert sqlite_store.get_materialized_permissions("experiment", ["1", "deleted"], "alice") == {"1": ("READ", "fallback")}
+
+
+def test_run_write_leases_are_revoked_by_permission_writes(sqlite_store):
+    leases = RunWriteLeases(maxsize=10, ttl=60)
+    sqlite_store.create_user("alice", "password", "Alice")
+    leases.grant("alice", "run", leases.current_version())
+    assert leases.holds("alice", "run")
+    assert not leases.holds("bob", "run")
+
+    sqlite_store.create_experiment_permission("1", "alice", "READ")
+    assert not leases.holds("alice", "run")
+
+    # a lease checked before a write is not granted after it
+    version = leases.current_version()
+    sqlite_store.update_experiment_permission("1", "alice", "EDIT")
+    leases.grant("alice", "run", version)
+    assert not leases.holds("alice", "run")
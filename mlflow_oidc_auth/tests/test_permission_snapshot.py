@@ -0,0 +1,124 @@
+from unittest.mock import patch
+
+import pytest
+
+from mlflow_oidc_auth.permission_cache import permission_decision_cache
+from mlflow_oidc_auth.permission_snapshot import PermissionSnapshot, PermissionSnapshotManager, build_snapshot
+from mlflow_oidc_auth.regex_rules import regex_rule_cache
+
+
+@pytest.fixture
+def store(sqlite_store):
+    for username in ("alice", "bob", "zoë"):
+        sqlite_store.create_user(username, "password", username)
+    sqlite_store.populate_groups(["readers", "writers"])
+    sqlite_store.set_user_groups("alice", ["readers", "writers"])
+    sqlite_store.set_user_groups("zoë", ["writers"])
+    sqlite_store.create_experiment_permission("1", "alice", "MANAGE")
+    sqlite_store.create_experiment_permission("2", "bob", "READ")
+    sqlite_store.create_group_experiment_permission("readers", "1", "READ")
+    sqlite_store.create_group_experiment_permission("writers", "3", "EDIT")
+    sqlite_store.create_registered_model_permission("model", "bob", "EDIT")
+    sqlite_store.create_group_model_permission("writers", "model", "READ")
+    sqlite_store.create_experiment_regex_permission("^team-a/.*", 2, "READ", "alice")
+    sqlite_store.create_experiment_regex_permission("^team-a/secret", 1, "NO_PERMISSIONS", "alice")
+    sqlite_store.create_group_experiment_regex_permission("readers", "^shared", 1, "READ")
+    sqlite_store.create_registered_model_regex_permission("^model", 1, "MANAGE", "zoë")
+    sqlite_store.create_prompt_regex_permission("^prompt", 1, "READ", "zoë")
+    return sqlite_store
+
+
+def _write_snapshot(store, path):
+    with store.ManagedSessionMaker() as session:
+        generations, content = build_snapshot(session)
+    path.write_bytes(content)
+    return generations
+
+
+def _as_tuples(sources):
+    return {key: (source.user, sorted(source.groups), source.regexes, source.group_regexes) for key, source in sources.items()}
+
+
+def test_snapshot_agrees_with_the_database(store, tmp_path):
+    _write_snapshot(store, tmp_path / "snapshot")
+    snapshot = PermissionSnapshot(str(tmp_path / "snapshot"))
+    for username in ("alice", "bob", "zoë", "nobody"):
+        regex_rule_cache.invalidate()
+        expected = _as_tuples(store.effective_permission_repo.for_experiments(["1", "2", "3", "4"], username))
+        regex_rule_cache.invalidate()
+        assert _as_tuples(snapshot.for_experiments(["1", "2", "3", "4"], username)) == expected
+        for prompt in (False, True):
+            regex_rule_cache.invalidate()
+            expected = _as_tuples(store.effective_permission_repo.for_registered_models(["model", "other"], username, prompt))
+            regex_rule_cache.invalidate()
+            assert _as_tuples(snapshot.for_registered_models(["model", "other"], username, prompt)) == expected
+
+
+def test_regex_prefixes_are_stored(store, tmp_path):
+    _write_snapshot(store, tmp_path / "snapshot")
+    rules = PermissionSnapshot(str(tmp_path / "snapshot")).for_experiments(["1"], "alice")["1"].regexes
+    assert [(rule.regex, rule.prefix) for rule in rules] == [("^team-a/secret", "team-a/secret"), ("^team-a/.*", "team-a/")]
+    assert rules.match("team-a/secret-model").permission == "NO_PERMISSIONS"
+
+
+def test_manager_builds_once_and_maps_the_file_in_other_processes(store, tmp_path):
+    path = str(tmp_path / "snapshot")
+    generations = store.get_permission_generations()
+    first = PermissionSnapshotManager(path, store.ManagedSessionMaker)
+    first.refresh(generations)
+    assert first.snapshot.generations == generations
+
+    second = PermissionSnapshotManager(path, store.ManagedSessionMaker)
+    with patch("mlflow_oidc_auth.permission_snapshot.build_snapshot") as build:
+        second.refresh(generations)
+    build.assert_not_called()
+    assert second.snapshot.for_experiments(["1"], "alice")["1"].user == "MANAGE"
+
+    # writes of this process are not served from the snapshot until it is refreshed
+    store.create_experiment_permission("4", "alice", "READ")
+    assert first.snapshot is None
+    first.refresh(store.get_permission_generations())
+    assert first.snapshot.for_experiments(["4"], "alice")["4"].user == "READ"
+
+
+def test_store_serves_permission_sources_from_the_snapshot(store, tmp_path):
+    store.permission_snapshot = PermissionSnapshotManager(str(tmp_path / "snapshot"), store.ManagedSessionMaker)
+    store.permission_changes._next_poll = 0
+    store.poll_permission_changes()
+    with patch.object(store.effective_permission_repo, "for_experiments") as from_database:
+        assert store.get_experiment_permission_sources("1", "alice").user == "MANAGE"
+    from_database.assert_not_called()
+
+    permission_decision_cache.invalidate()
+    with patch.object(store.effective_permission_repo, "for_experiments", wraps=store.effective_permission_repo.for_experiments) as from_database:
+        assert store.get_experiment_permission_sources("2", "bob").user == "READ"
+    from_database.assert_called_once()
+
+
+def test_manager_maps_a_file_newer_than_the_polled_generations(store, tmp_path):
+    path = str(tmp_path / "snapshot")
+    polled = store.get_permission_generations()
+    store.create_experiment_permission("4", "alice", "READ")
+    _write_snapshot(store, tmp_path / "snapshot")
+
+    manager = PermissionSnapshotManager(path, store.ManagedSessionMaker)
+    with patch("mlflow_oidc_auth.permission_snapshot.build_snapshot") as build:
+        manager.refresh(polled)
+    build.assert_not_called()
+    assert manager.snapshot.for_experiments(["4"], "alice")["4"].user == "READ"
+
+
+def test_manager_unmaps_replaced_snapshots(store, tmp_path):
+    manager = PermissionSnapshotManager(str(tmp_path / "snapshot"), store.ManagedSessionMaker)
+    manager.refresh(store.get_permission_generations())
+    first = manager.snapshot
+    store.create_experiment_permission("4", "alice", "READ")
+    manager.refresh(store.get_permission_generations())
+    second = manager.snapshot
+    store.create_experiment_permission("5", "alice", "READ")
+    manager.refresh(store.get_permission_generations())
+
+    # the replaced snapshot stays mapped for lookups in flight until the next swap
+    assert first._mmap.closed
+    assert not second._mmap.closed
+    assert manager.snapshot.for_experiments(["5"], "alice")["5"].user == "READ"
@@ -0,0 +1,87 @@
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from mlflow_oidc_auth.regex_rules import RegexRuleCache, RegexRuleSet, literal_prefix, regex_rule_cache
+
+
+def _rule(regex, priority, permission="READ"):
+    return SimpleNamespace(regex=regex, priority=priority, permission=permission)
+
+
+def test_compile_orders_by_priority_and_skips_invalid_patterns():
+    rules = RegexRuleSet.compile([_rule("^b", 2), _rule("[", 1), _rule("^a", 1), _rule("^c", 1)])
+    assert [(rule.regex, rule.priority) for rule in rules] == [("^a", 1), ("^c", 1), ("^b", 2)]
+    assert RegexRuleSet.compile(rules) is rules
+
+
+def test_match_returns_highest_priority_rule():
+    rules = RegexRuleSet.compile([_rule("team-.*", 2, "READ"), _rule("team-a.*", 1, "MANAGE")])
+    assert rules.match("team-a-model").permission == "MANAGE"
+    assert rules.match("team-b-model").permission == "READ"
+    # like re.match, rules are anchored at the start of the name
+    assert rules.match("my-team-a") is None
+    assert RegexRuleSet().match("anything") is None
+    # experiment names are only looked up when there are rules to match
+    assert RegexRuleSet().match(None) is None
+
+
+@pytest.mark.parametrize(
+    "regex, prefix",
+    [
+        ("^team-a/.*", "team-a/"),
+        ("prod-.*", "prod-"),
+        (r"\Amodel\.v1", "model.v1"),
+        ("ab?c", "a"),
+        ("x[0-9]+", "x"),
+        ("a|b", ""),
+        ("(team)-a", ""),
+        ("(?i)team", ""),
+        (".*-prod", ""),
+    ],
+)
+def test_literal_prefix(regex, prefix):
+    assert literal_prefix(re.compile(regex)) == prefix
+
+
+def test_match_with_prefix_index_agrees_with_linear_scan():
+    regexes = ["^team-a/.*", "team-.*", "team-a/prod", "prod-.*", ".*-sandbox$", "[tp].*", "(?i)TEAM-B.*", "team-a/x|prod-x"]
+    rules = RegexRuleSet.compile([_rule(regex, priority, str(priority)) for priority, regex in enumerate(reversed(regexes))])
+    names = ["team-a/prod", "team-a/x", "team-b/model", "prod-x", "prod-y", "dev-sandbox", "team-a", "other", ""]
+    for name in names:
+        expected = next((rule for rule in rules.rules if rule.pattern.match(name)), None)
+        assert rules.match(name) == expected, name
+
+
+def test_merge_keeps_priority_order():
+    first = RegexRuleSet.compile([_rule("^a", 1), _rule("^c", 3)])
+    second = RegexRuleSet.compile([_rule("^b", 2), _rule("^d", 4)])
+    merged = RegexRuleSet.merge([first, second])
+    assert [rule.regex for rule in merged] == ["^a", "^b", "^c", "^d"]
+    assert len(RegexRuleSet.merge([])) == 0
+
+
+def test_cache_ignores_rules_loaded_before_an_invalidation():
+    cache = RegexRuleCache(maxsize=10)
+    rules = RegexRuleSet.compile([_rule("^a", 1)])
+    version = cache.version
+    cache.invalidate()
+    cache.set("key", rules, version)
+    assert cache.get("key") is None
+
+    cache.set("key", rules, cache.version)
+    assert cache.get("key") is rules
+    cache.invalidate()
+    assert cache.get("key") is None
+
+
+def test_regex_permission_changes_invalidate_cached_rules(sqlite_store):
+    sqlite_store.create_user("alice", "password", "Alice")
+    sqlite_store.create_experiment_regex_permission("^a.*", 1, "READ", "alice")
+    assert [rule.regex for rule in sqlite_store.get_experiment_permission_sources("1", "alice").regexes] == ["^a.*"]
+    assert regex_rule_cache.get(("experiment", "user", "alice")) is not None
+
+    sqlite_store.create_experiment_regex_permission("^b.*", 2, "EDIT", "alice")
+    assert regex_rule_cache.get(("experiment", "user", "alice")) is None
+    assert [rule.regex for rule in sqlite_store.get_experiment_permission_sources("1", "alice").regexes] == ["^a.*", "^b.*"]
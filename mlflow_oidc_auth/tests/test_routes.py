@@ -22,6 +22,7 @@ class TestRoutes:
                 routes.UI_ROOT,
                 # User management routes
                 routes.CREATE_ACCESS_TOKEN,
+                routes.ACCESS_TOKENS,
                 routes.GET_CURRENT_USER,
                 routes.CREATE_USER,
                 routes.GET_USER,
@@ -1,3 +1,4 @@
+from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -14,6 +15,94 @@ def store(_mock_migrate_if_needed):
 
 
 class TestSqlAlchemyStore:
+    def test_authenticate_user_routes_api_keys(self, store: SqlAlchemyStore):
+        store.user_repo = MagicMock()
+        store.api_key_repo = MagicMock()
+        store.api_key_repo.verify.return_value = (False, None)
+        store.user_repo.verify_password.return_value = (False, None)
+        api_key = "mlf_" + "a" * 12 + "_" + "b" * 40
+        store.authenticate_user("user", api_key)
+        store.api_key_repo.verify.assert_called_once_with("user", api_key)
+        store.user_repo.verify_password.assert_not_called()
+        store.authenticate_user("user", "password")
+        store.user_repo.verify_password.assert_called_once_with("user", "password")
+
+    def test_authenticate_user_caches_successful_verifications(self, store: SqlAlchemyStore):
+        store.user_repo = MagicMock()
+        store.user_repo.verify_password.return_value = (True, None)
+        store.credential_cache.clear()
+        assert store.authenticate_user("user", "password")
+        assert store.authenticate_user("user", "password")
+        store.user_repo.verify_password.assert_called_once_with("user", "password")
+
+        store.user_repo.verify_password.return_value = (False, None)
+        assert not store.authenticate_user("user", "wrong")
+        assert not store.authenticate_user("user", "wrong")
+        assert store.user_repo.verify_password.call_count == 3
+
+    def test_authenticate_user_cache_respects_expiration(self, store: SqlAlchemyStore):
+        store.user_repo = MagicMock()
+        store.user_repo.verify_password.return_value = (True, datetime.now(timezone.utc) - timedelta(seconds=1))
+        store.credential_cache.clear()
+        store.authenticate_user("user", "password")
+        store.authenticate_user("user", "password")
+        assert store.user_repo.verify_password.call_count == 2
+
+    def test_credential_cache_invalidated_on_password_change(self, sqlite_store: SqlAlchemyStore):
+        store = sqlite_store
+        store.create_user("alice", "password", "Alice")
+        assert store.authenticate_user("alice", "password")
+        store.update_user("alice", password="changed")
+        assert not store.authenticate_user("alice", "password")
+        assert store.authenticate_user("alice", "changed")
+        store.delete_user("alice")
+        assert not store.authenticate_user("alice", "changed")
+
+    def test_logins_during_a_credential_change_are_not_cached(self, sqlite_store: SqlAlchemyStore):
+        store = sqlite_store
+        store.create_user("alice", "password", "Alice")
+        update, verify_password = store.user_repo.update, store.user_repo.verify_password
+
+        def login_then_update(**kwargs):
+            # a login that reads the old hash before the change commits
+            assert store.authenticate_user("alice", "password")
+            return update(**kwargs)
+
+        with patch.object(store.user_repo, "update", side_effect=login_then_update):
+            store.update_user("alice", password="changed")
+        assert not store.authenticate_user("alice", "password")
+
+        def verify_then_revoke(username, password):
+            # a login that verified the key before it was revoked and finishes after
+            result = verify_password(username, password)
+            store.update_user("alice", password="revoked")
+            return result
+
+        with patch.object(store.user_repo, "verify_password", side_effect=verify_then_revoke):
+            assert store.authenticate_user("alice", "changed")
+        assert not store.authenticate_user("alice", "changed")
+
+    def test_api_keys_round_trip(self, sqlite_store: SqlAlchemyStore):
+        store = sqlite_store
+        store.create_user("svc", "password", "Service", is_service_account=True)
+        _, first = store.create_user_api_key("svc", "ci")
+        _, second = store.create_user_api_key("svc", "dev")
+        assert store.authenticate_user("svc", first)
+        assert store.authenticate_user("svc", second)
+        assert not store.authenticate_user("other", first)
+        assert [k.name for k in store.list_user_api_keys("svc")] == ["ci", "dev"]
+
+        _, rotated = store.create_user_api_key("svc", "ci")
+        assert not store.authenticate_user("svc", first)
+        assert store.authenticate_user("svc", rotated)
+        store.delete_user_api_key("svc", "dev")
+        assert not store.authenticate_user("svc", second)
+
+    def test_get_user_identity(self, store: SqlAlchemyStore):
+        store.user_repo = MagicMock()
+        store.get_user_identity("user")
+        store.user_repo.get_identity.assert_called_once_with("user")
+
     def test_create_experiment_regex_permission(self, store: SqlAlchemyStore):
         store.experiment_regex_repo = MagicMock()
         store.create_experiment_regex_permission(".*", 1, "READ", "user")
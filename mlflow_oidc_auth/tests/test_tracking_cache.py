@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from mlflow.exceptions import MlflowException
+from mlflow.store.tracking.sqlalchemy_store import SqlAlchemyStore as TrackingSqlAlchemyStore
+
+from mlflow_oidc_auth.tracking_cache import ExperimentNameCache, RunExperimentCache
+
+
+@pytest.fixture
+def tracking_store(tmp_path):
+    tracking_store = TrackingSqlAlchemyStore(f"sqlite:///{tmp_path}/mlflow.db", str(tmp_path / "artifacts"))
+    with patch("mlflow_oidc_auth.tracking_cache._get_tracking_store", return_value=tracking_store):
+        yield tracking_store
+
+
+def test_lookups_fill_both_directions(tracking_store):
+    experiment_id = tracking_store.create_experiment("team-a/model")
+    cache = ExperimentNameCache(maxsize=10)
+    with patch.object(tracking_store, "get_experiment_by_name", wraps=tracking_store.get_experiment_by_name) as get_by_name, patch.object(
+        tracking_store, "get_experiment", wraps=tracking_store.get_experiment
+    ) as get_by_id:
+        assert cache.get_id("team-a/model") == experiment_id
+        assert cache.get_id("team-a/model") == experiment_id
+        assert cache.get_name(experiment_id) == "team-a/model"
+    get_by_name.assert_called_once()
+    get_by_id.assert_not_called()
+
+    assert cache.get_id("missing") is None
+    with pytest.raises(MlflowException):
+        cache.get_name("12345")
+
+
+def test_get_names_loads_missing_names_in_one_query(tracking_store, monkeypatch):
+    monkeypatch.setattr("mlflow_oidc_auth.tracking_cache._MAX_IDS_PER_QUERY", 2)
+    ids = [tracking_store.create_experiment(f"experiment-{i}") for i in range(5)]
+    cache = ExperimentNameCache(maxsize=10)
+    cache.remember(ids[0], "cached-name")
+    with patch.object(tracking_store, "get_experiment") as get_experiment:
+        names = cache.get_names(ids + ["12345", "not-a-number"])
+    get_experiment.assert_not_called()
+    assert names == {ids[0]: "cached-name", **{experiment_id: f"experiment-{i}" for i, experiment_id in enumerate(ids) if i}}
+    assert cache.get_id("experiment-3") == ids[3]
+
+
+def test_get_names_without_database_tracking_store():
+    tracking_store = MagicMock()
+    tracking_store.get_experiment.side_effect = lambda experiment_id: SimpleNamespace(name=f"name-{experiment_id}")
+    cache = ExperimentNameCache(maxsize=10)
+    with patch("mlflow_oidc_auth.tracking_cache._get_tracking_store", return_value=tracking_store):
+        assert cache.get_names(["1", "2", "1"]) == {"1": "name-1", "2": "name-2"}
+    assert tracking_store.get_experiment.call_count == 2
+
+
+def test_invalidate(tracking_store):
+    experiment_id = tracking_store.create_experiment("old-name")
+    cache = ExperimentNameCache(maxsize=10)
+    cache.prefetch([tracking_store.get_experiment(experiment_id)])
+
+    tracking_store.rename_experiment(experiment_id, "new-name")
+    cache.invalidate(experiment_id=experiment_id)
+    assert cache.get_name(experiment_id) == "new-name"
+    assert cache.get_id("old-name") is None
+
+    cache.remember("999", "created-name")
+    cache.invalidate(experiment_name="created-name")
+    assert cache.get_id("created-name") is None
+
+
+def test_run_experiment_ids_are_loaded_without_the_run(tracking_store):
+    experiment_id = tracking_store.create_experiment("runs")
+    run_ids = [tracking_store.create_run(experiment_id, "alice", 0, [], "run").info.run_id for _ in range(3)]
+    cache = RunExperimentCache(maxsize=10)
+    with patch.object(tracking_store, "get_run") as get_run:
+        assert cache.get_experiment_ids(run_ids + ["missing"]) == {run_id: experiment_id for run_id in run_ids}
+    get_run.assert_not_called()
+
+    with patch("mlflow_oidc_auth.tracking_cache._get_tracking_store") as mock_tracking_store:
+        assert cache.get_experiment_id(run_ids[0]) == experiment_id
+    mock_tracking_store.assert_not_called()
+    with pytest.raises(MlflowException, match="not found"):
+        cache.get_experiment_id("missing")
+
+
+def test_run_experiment_ids_are_shared_through_the_cache_backend(tracking_store):
+    experiment_id = tracking_store.create_experiment("runs")
+    run_id = tracking_store.create_run(experiment_id, "alice", 0, [], "run").info.run_id
+    shared = {}
+    backend = MagicMock()
+    backend.get_many.side_effect = lambda *keys: [shared.get(key) for key in keys]
+    backend.set_many.side_effect = lambda mapping, timeout: shared.update(mapping)
+    with patch("mlflow_oidc_auth.app.cache", backend):
+        assert RunExperimentCache(maxsize=10, shared=True).get_experiment_id(run_id) == experiment_id
+        with patch("mlflow_oidc_auth.tracking_cache._get_tracking_store") as mock_tracking_store:
+            assert RunExperimentCache(maxsize=10, shared=True).get_experiment_id(run_id) == experiment_id
+        mock_tracking_store.assert_not_called()
+    assert shared == {f"run_experiment:{run_id}": experiment_id}
@@ -17,11 +17,11 @@ def test_generate_token_length_and_charset():
 @patch("mlflow_oidc_auth.user.store")
 def test_create_user_already_exists(mock_store):
     dummy = DummyUser("alice", 1)
-    mock_store.get_user.return_value = dummy
+    mock_store.get_user_identity.return_value = dummy
     mock_store.update_user.return_value = None
     result = user.create_user("alice", "Alice", is_admin=True)
     assert result == (False, f"User alice (ID: 1) already exists")
-    mock_store.get_user.assert_called_once_with("alice")
+    mock_store.get_user_identity.assert_called_once_with("alice")
     mock_store.update_user.assert_called_once_with(username="alice", is_admin=True, is_service_account=False)
 
 
@@ -29,7 +29,7 @@ def test_create_user_already_exists(mock_store):
 @patch("mlflow_oidc_auth.user.generate_token", return_value="dummy_password")
 @patch("mlflow_oidc_auth.user.store")
 def test_create_user_new_user(mock_store, mock_generate_token):
-    mock_store.get_user.side_effect = Exception
+    mock_store.get_user_identity.side_effect = Exception
     dummy = DummyUser("bob", 2)
     mock_store.create_user.return_value = dummy
     result = user.create_user("bob", "Bob", is_admin=False, is_service_account=True)
@@ -1,12 +1,20 @@
+import json
 import unittest
 from unittest.mock import MagicMock, patch
 from flask import Flask, session, request
 
 from mlflow.exceptions import MlflowException
 from mlflow.protos.databricks_pb2 import BAD_REQUEST, INVALID_PARAMETER_VALUE, RESOURCE_DOES_NOT_EXIST
+from mlflow.store.entities.paged_list import PagedList
+from mlflow.utils.search_utils import SearchUtils
 
+from mlflow_oidc_auth.auth_context import AuthContext, set_auth_context, set_token_claims
+from mlflow_oidc_auth.permission_cache import permission_decision_cache
 from mlflow_oidc_auth.permissions import Permission
+from mlflow_oidc_auth.tracking_cache import experiment_name_cache
 from mlflow_oidc_auth.utils import (
+    build_auth_context,
+    get_user_group_ids,
     get_is_admin,
     get_user_groups,
     get_permission_from_store_or_default,
@@ -20,6 +28,7 @@ from mlflow_oidc_auth.utils import (
     check_registered_model_permission,
     check_admin_permission,
     effective_experiment_permission,
+    effective_experiment_permissions,
     effective_prompt_permission,
     effective_registered_model_permission,
     fetch_all_experiments,
@@ -32,12 +41,14 @@ from mlflow_oidc_auth.utils import (
     get_experiment_id,
     get_is_admin,
     get_model_name,
+    get_request_json,
     get_optional_request_param,
     get_permission_from_store_or_default,
     get_request_param,
     get_url_param,
     get_optional_url_param,
     get_username,
+    search_readable,
     _get_registered_model_permission_from_regex,
     _get_experiment_permission_from_regex,
     _get_registered_model_group_permission_from_regex,
@@ -66,9 +77,9 @@ class TestUtils(unittest.TestCase):
     def test_get_is_admin(self, mock_get_username, mock_store):
         with self.app.test_request_context():
             mock_get_username.return_value = "user"
-            mock_store.get_user.return_value.is_admin = True
+            mock_store.get_user_identity.return_value.is_admin = True
             self.assertTrue(get_is_admin())
-            mock_store.get_user.return_value.is_admin = False
+            mock_store.get_user_identity.return_value.is_admin = False
             self.assertFalse(get_is_admin())
 
     @patch("mlflow_oidc_auth.utils.store")
@@ -115,6 +126,7 @@ class TestUtils(unittest.TestCase):
                 Permission(name="perm", priority=1, can_read=True, can_update=True, can_delete=True, can_manage=True), "user"
             )
             self.assertTrue(can_manage_experiment("exp_id", "user"))
+            permission_decision_cache.invalidate()
             mock_get_permission_from_store_or_default.return_value = PermissionResult(
                 Permission(name="perm", priority=1, can_read=True, can_update=True, can_delete=True, can_manage=False), "user"
             )
@@ -128,6 +140,7 @@ class TestUtils(unittest.TestCase):
                 Permission(name="perm", priority=1, can_read=True, can_update=True, can_delete=True, can_manage=True), "user"
             )
             self.assertTrue(can_manage_registered_model("model_name", "user"))
+            permission_decision_cache.invalidate()
             mock_get_permission_from_store_or_default.return_value = PermissionResult(
                 Permission(name="perm", priority=1, can_read=True, can_update=True, can_delete=True, can_manage=False), "user"
             )
@@ -342,36 +355,31 @@ class TestUtils(unittest.TestCase):
                 get_optional_request_param("foo")
             self.assertEqual(cm.exception.error_code, "BAD_REQUEST")
 
-    @patch("mlflow_oidc_auth.utils._get_tracking_store")
+    @patch("mlflow_oidc_auth.tracking_cache._get_tracking_store")
     def test_get_experiment_id(self, mock_tracking_store):
         # GET method, experiment_id present
         with self.app.test_request_context("/?experiment_id=123", method="GET"):
             self.assertEqual(get_experiment_id(), "123")
-        # POST method, experiment_id present
+        # POST method, experiment_id present; the body is parsed once per request
         with self.app.test_request_context("/", method="POST", json={"experiment_id": "456"}, content_type="application/json"):
-            self.assertEqual(get_experiment_id(), "456")
+            with patch.object(self.app.json, "loads", wraps=self.app.json.loads) as loads:
+                self.assertEqual(get_experiment_id(), "456")
+                self.assertEqual(get_experiment_id(), "456")
+            loads.assert_called_once()
         # experiment_name present
         with self.app.test_request_context("/?experiment_name=exp", method="GET"):
             mock_tracking_store().get_experiment_by_name.return_value.experiment_id = "789"
             self.assertEqual(get_experiment_id(), "789")
-        # missing both - mock request.json to avoid content type issues
+        # missing both
         with self.app.test_request_context("/", method="GET"):
-            with patch("mlflow_oidc_auth.utils.request") as mock_request:
-                mock_request.view_args = None
-                mock_request.args = {}
-                mock_request.json = None
-                with self.assertRaises(MlflowException) as cm:
-                    get_experiment_id()
-                self.assertEqual(cm.exception.error_code, "INVALID_PARAMETER_VALUE")
-        # unsupported method
-        with self.app.test_request_context("/", method="PUT"):
-            with patch("mlflow_oidc_auth.utils.request") as mock_request:
-                mock_request.view_args = None
-                mock_request.args = {}
-                mock_request.json = None
-                with self.assertRaises(MlflowException) as cm:
-                    get_experiment_id()
-                self.assertEqual(cm.exception.error_code, "INVALID_PARAMETER_VALUE")
+            with self.assertRaises(MlflowException) as cm:
+                get_experiment_id()
+            self.assertEqual(cm.exception.error_code, "INVALID_PARAMETER_VALUE")
+        # missing both in a body
+        with self.app.test_request_context("/", method="PUT", json={"name": "exp"}):
+            with self.assertRaises(MlflowException) as cm:
+                get_experiment_id()
+            self.assertEqual(cm.exception.error_code, "INVALID_PARAMETER_VALUE")
 
     @patch("mlflow_oidc_auth.utils.store")
     @patch("mlflow_oidc_auth.utils.validate_token")
@@ -420,7 +428,7 @@ class TestUtils(unittest.TestCase):
                     with self.assertRaises(MlflowException):
                         get_username()
 
-    @patch("mlflow_oidc_auth.utils._get_tracking_store")
+    @patch("mlflow_oidc_auth.tracking_cache._get_tracking_store")
     def test_get_experiment_id_experiment_name_not_found(self, mock_tracking_store):
         # experiment_name provided but not found
         with self.app.test_request_context("/?experiment_name=nonexistent_exp", method="GET"):
@@ -514,28 +522,32 @@ class TestUtils(unittest.TestCase):
             with patch("mlflow_oidc_auth.utils.request") as mock_request:
                 mock_request.view_args = {"name": "test-model"}
                 mock_request.args = {}
-                mock_request.json = None
                 self.assertEqual(get_model_name(), "test-model")
+                mock_request.view_args = {"prompt_name": "test-prompt", "username": "alice"}
+                self.assertEqual(get_model_name(), "test-prompt")
 
         # Query args
         with self.app.test_request_context("/?name=test-model", method="GET"):
             self.assertEqual(get_model_name(), "test-model")
 
-        # JSON data
+        # JSON data, parsed once per request
         with self.app.test_request_context("/", method="POST", json={"name": "test-model"}, content_type="application/json"):
-            self.assertEqual(get_model_name(), "test-model")
+            with patch.object(self.app.json, "loads", wraps=self.app.json.loads) as loads:
+                self.assertEqual(get_model_name(), "test-model")
+                self.assertEqual(get_model_name(), "test-model")
+            loads.assert_called_once()
 
         # Missing name
         with self.app.test_request_context("/", method="GET"):
-            with patch("mlflow_oidc_auth.utils.request") as mock_request:
-                mock_request.view_args = None
-                mock_request.args = {}
-                mock_request.json = None
-                with self.assertRaises(MlflowException) as cm:
-                    get_model_name()
-                self.assertEqual(cm.exception.error_code, "INVALID_PARAMETER_VALUE")
+            with self.assertRaises(MlflowException) as cm:
+                get_model_name()
+            self.assertEqual(cm.exception.error_code, "INVALID_PARAMETER_VALUE")
+        with self.app.test_request_context("/", method="POST", json={}):
+            with self.assertRaises(MlflowException) as cm:
+                get_model_name()
+            self.assertEqual(cm.exception.error_code, "INVALID_PARAMETER_VALUE")
 
-    @patch("mlflow_oidc_auth.utils._get_tracking_store")
+    @patch("mlflow_oidc_auth.tracking_cache._get_tracking_store")
     def test_experiment_id_from_name(self, mock_tracking_store):
         # Experiment found
         mock_tracking_store().get_experiment_by_name.return_value.experiment_id = "123"
@@ -658,32 +670,65 @@ class TestUtils(unittest.TestCase):
         )
 
     @patch("mlflow_oidc_auth.utils.fetch_all_experiments")
-    @patch("mlflow_oidc_auth.utils.can_read_experiment")
+    @patch("mlflow_oidc_auth.utils.effective_experiment_permissions")
     @patch("mlflow_oidc_auth.utils.get_username")
-    def test_fetch_readable_experiments(self, mock_get_username, mock_can_read, mock_fetch_all):
+    def test_fetch_readable_experiments(self, mock_get_username, mock_permissions, mock_fetch_all):
         mock_get_username.return_value = "user"
         mock_exp1 = MagicMock()
         mock_exp1.experiment_id = "1"
+        mock_exp1.name = "one"
         mock_exp2 = MagicMock()
         mock_exp2.experiment_id = "2"
+        mock_exp2.name = "two"
         mock_fetch_all.return_value = [mock_exp1, mock_exp2]
-        mock_can_read.side_effect = lambda exp_id, user: exp_id == "1"
+        mock_permissions.return_value = {
+            "1": PermissionResult(Permission(name="READ", priority=1, can_read=True, can_update=False, can_delete=False, can_manage=False), "user"),
+            "2": PermissionResult(
+                Permission(name="NO_PERMISSIONS", priority=100, can_read=False, can_update=False, can_delete=False, can_manage=False), "user"
+            ),
+        }
 
         result = fetch_readable_experiments()
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0], mock_exp1)
+        mock_permissions.assert_called_once_with(["1", "2"], "user", {"1": "one", "2": "two"})
+
+    def test_search_readable_cursor(self):
+        pages = {None: PagedList([1, 2, 3], "store-page-2"), "store-page-2": PagedList([4, 5, 6], None)}
+        search_page = MagicMock(side_effect=lambda store_token, page_size: pages[store_token])
+        readable = lambda items: [item % 2 == 0 for item in items]
+
+        items, page_token = search_readable(search_page, readable, max_results=1)
+        self.assertEqual(items, [2])
+        self.assertEqual(search_page.call_count, 2)
+        # MLflow's search handlers parse the token before the response is filtered
+        self.assertEqual(SearchUtils.parse_start_offset_from_page_token(page_token), 3)
+
+        items, page_token = search_readable(search_page, readable, max_results=1, page_token=page_token)
+        self.assertEqual(items, [4])
+        items, page_token = search_readable(search_page, readable, max_results=5, page_token=page_token)
+        self.assertEqual(items, [6])
+        self.assertIsNone(page_token)
+
+        with self.assertRaises(MlflowException):
+            search_readable(search_page, readable, max_results=1, page_token="not a token")
 
     @patch("mlflow_oidc_auth.utils.fetch_all_registered_models")
-    @patch("mlflow_oidc_auth.utils.can_read_registered_model")
+    @patch("mlflow_oidc_auth.utils.effective_registered_model_permissions")
     @patch("mlflow_oidc_auth.utils.get_username")
-    def test_fetch_readable_registered_models(self, mock_get_username, mock_can_read, mock_fetch_all):
+    def test_fetch_readable_registered_models(self, mock_get_username, mock_permissions, mock_fetch_all):
         mock_get_username.return_value = "user"
         mock_model1 = MagicMock()
         mock_model1.name = "model1"
         mock_model2 = MagicMock()
         mock_model2.name = "model2"
         mock_fetch_all.return_value = [mock_model1, mock_model2]
-        mock_can_read.side_effect = lambda name, user: name == "model1"
+        mock_permissions.return_value = {
+            "model1": PermissionResult(Permission(name="EDIT", priority=2, can_read=True, can_update=True, can_delete=False, can_manage=False), "group"),
+            "model2": PermissionResult(
+                Permission(name="NO_PERMISSIONS", priority=100, can_read=False, can_update=False, can_delete=False, can_manage=False), "user"
+            ),
+        }
 
         result = fetch_readable_registered_models()
         self.assertEqual(len(result), 1)
@@ -708,7 +753,7 @@ class TestUtils(unittest.TestCase):
         self.assertEqual(cm.exception.error_code, "RESOURCE_DOES_NOT_EXIST")
 
     @patch("mlflow_oidc_auth.utils.store")
-    @patch("mlflow_oidc_auth.utils._get_tracking_store")
+    @patch("mlflow_oidc_auth.tracking_cache._get_tracking_store")
     def test_get_experiment_permission_from_regex(self, mock_tracking_store, mock_store):
         from mlflow_oidc_auth.entities import ExperimentRegexPermission
 
@@ -725,6 +770,7 @@ class TestUtils(unittest.TestCase):
 
         # No match
         mock_tracking_store().get_experiment.return_value.name = "other-experiment"
+        experiment_name_cache.clear()
         with self.assertRaises(MlflowException) as cm:
             _get_experiment_permission_from_regex(regex_perms, "exp123")
         self.assertEqual(cm.exception.error_code, "RESOURCE_DOES_NOT_EXIST")
@@ -748,7 +794,7 @@ class TestUtils(unittest.TestCase):
         self.assertEqual(cm.exception.error_code, "RESOURCE_DOES_NOT_EXIST")
 
     @patch("mlflow_oidc_auth.utils.store")
-    @patch("mlflow_oidc_auth.utils._get_tracking_store")
+    @patch("mlflow_oidc_auth.tracking_cache._get_tracking_store")
     def test_get_experiment_group_permission_from_regex(self, mock_tracking_store, mock_store):
         from mlflow_oidc_auth.entities import ExperimentGroupRegexPermission
 
@@ -765,6 +811,7 @@ class TestUtils(unittest.TestCase):
 
         # No match
         mock_tracking_store().get_experiment.return_value.name = "other-experiment"
+        experiment_name_cache.clear()
         with self.assertRaises(MlflowException) as cm:
             _get_experiment_group_permission_from_regex(regex_perms, "exp123")
         self.assertEqual(cm.exception.error_code, "RESOURCE_DOES_NOT_EXIST")
@@ -792,6 +839,59 @@ class TestUtils(unittest.TestCase):
         self.assertIn("regex", config)
         self.assertIn("group-regex", config)
 
+    @patch("mlflow_oidc_auth.utils.store")
+    @patch("mlflow_oidc_auth.utils.config")
+    def test_permission_sources_are_loaded_once(self, mock_config, mock_store):
+        from mlflow_oidc_auth.entities import RegisteredModelRegexPermission
+        from mlflow_oidc_auth.repository.effective_permission import PermissionSources
+
+        mock_config.PERMISSION_SOURCE_ORDER = ["user", "group", "regex", "group-regex"]
+        mock_store.get_registered_model_permission_sources.return_value = PermissionSources(
+            regexes=[RegisteredModelRegexPermission(regex="^model", priority=1, user_id=1, permission="EDIT")]
+        )
+        result = effective_registered_model_permission("model", "user")
+        self.assertEqual(result.permission.name, "EDIT")
+        self.assertEqual(result.type, "regex")
+        mock_store.get_registered_model_permission_sources.assert_called_once_with("model", "user")
+
+        mock_store.get_registered_model_permission_sources.return_value = PermissionSources(user="READ", groups=["MANAGE"])
+        permission_decision_cache.invalidate()
+        result = effective_registered_model_permission("model", "user")
+        self.assertEqual((result.permission.name, result.type), ("READ", "user"))
+
+        mock_config.PERMISSION_SOURCE_ORDER = ["group", "user"]
+        permission_decision_cache.invalidate()
+        result = effective_registered_model_permission("model", "user")
+        self.assertEqual((result.permission.name, result.type), ("MANAGE", "group"))
+
+    @patch("mlflow_oidc_auth.utils._get_tracking_store")
+    @patch("mlflow_oidc_auth.utils.store")
+    @patch("mlflow_oidc_auth.utils.config")
+    def test_effective_experiment_permissions(self, mock_config, mock_store, mock_tracking_store):
+        from mlflow_oidc_auth.entities import ExperimentRegexPermission
+        from mlflow_oidc_auth.repository.effective_permission import PermissionSources
+
+        mock_config.PERMISSION_SOURCE_ORDER = ["user", "group", "regex", "group-regex"]
+        mock_config.DEFAULT_MLFLOW_PERMISSION = "NO_PERMISSIONS"
+        regexes = [ExperimentRegexPermission(regex="^team-", priority=1, user_id=1, permission="EDIT")]
+        mock_store.get_experiments_permission_sources.return_value = {
+            "1": PermissionSources(user="MANAGE", regexes=regexes),
+            "2": PermissionSources(regexes=regexes),
+            "3": PermissionSources(regexes=regexes),
+        }
+
+        result = effective_experiment_permissions(["1", "2", "3"], "user", {"1": "team-a", "2": "team-b", "3": "other"})
+        self.assertEqual(
+            {k: (v.permission.name, v.type) for k, v in result.items()},
+            {
+                "1": ("MANAGE", "user"),
+                "2": ("EDIT", "regex"),
+                "3": ("NO_PERMISSIONS", "fallback"),
+            },
+        )
+        mock_store.get_experiments_permission_sources.assert_called_once_with(["1", "2", "3"], "user")
+        mock_tracking_store.assert_not_called()
+
     def test_get_request_param_run_id_fallback(self):
         # Test run_id fallback to run_uuid
         with self.app.test_request_context("/?run_uuid=test-uuid", method="GET"):
@@ -810,6 +910,27 @@ class TestUtils(unittest.TestCase):
             result = get_optional_request_param("param")
             self.assertEqual(result, "value")
 
+    def test_get_request_json_is_parsed_once_and_shared_with_mlflow(self):
+        from mlflow.server.handlers import _get_normalized_request_json
+
+        body = '{"run_id": "run", "experiment_id": "1", "metrics": [{"key": "loss", "value": 0.1}]}'
+        with self.app.test_request_context("/", method="POST", data=body, content_type="application/json"):
+            with patch("json.loads", wraps=json.loads) as loads:
+                self.assertEqual(get_request_param("run_id"), "run")
+                self.assertEqual(get_experiment_id(), "1")
+                self.assertIs(_get_normalized_request_json(request), get_request_json())
+            self.assertEqual(loads.call_count, 1)
+
+    def test_get_request_json_without_json_body(self):
+        # double-encoded by older clients
+        with self.app.test_request_context("/", method="POST", data='"{\\"name\\": \\"model\\"}"', content_type="application/json"):
+            self.assertEqual(get_model_name(), "model")
+        with self.app.test_request_context("/", method="DELETE"):
+            self.assertEqual(get_request_json(), {})
+            with self.assertRaises(MlflowException) as cm:
+                get_experiment_id()
+            self.assertEqual(cm.exception.error_code, "INVALID_PARAMETER_VALUE")
+
     def test_get_experiment_id_view_args(self):
         # Test experiment_id from view_args
         with self.app.test_request_context("/test/123"):
@@ -820,7 +941,7 @@ class TestUtils(unittest.TestCase):
                 result = get_experiment_id()
                 self.assertEqual(result, "123")
 
-    @patch("mlflow_oidc_auth.utils._get_tracking_store")
+    @patch("mlflow_oidc_auth.tracking_cache._get_tracking_store")
     def test_get_experiment_id_view_args_name(self, mock_tracking_store):
         # Test experiment_name from view_args
         mock_tracking_store().get_experiment_by_name.return_value.experiment_id = "456"
@@ -832,7 +953,7 @@ class TestUtils(unittest.TestCase):
                 result = get_experiment_id()
                 self.assertEqual(result, "456")
 
-    @patch("mlflow_oidc_auth.utils._get_tracking_store")
+    @patch("mlflow_oidc_auth.tracking_cache._get_tracking_store")
     def test_get_experiment_id_json_name(self, mock_tracking_store):
         # Test experiment_name from JSON
         mock_tracking_store().get_experiment_by_name.return_value.experiment_id = "789"
@@ -884,6 +1005,44 @@ class TestUtils(unittest.TestCase):
                 get_permission_from_store_or_default({"user": mock_store_permission_user_func})
             self.assertEqual(cm.exception.error_code, "BAD_REQUEST")
 
+    @patch("mlflow_oidc_auth.utils.store")
+    def test_auth_context_short_circuits_identity_lookups(self, mock_store):
+        with self.app.test_request_context():
+            set_auth_context(AuthContext(username="ctx_user", is_admin=True, user_id=7))
+            self.assertEqual(get_username(), "ctx_user")
+            self.assertTrue(get_is_admin())
+            mock_store.get_user_identity.assert_not_called()
+
+    @patch("mlflow_oidc_auth.utils.store")
+    def test_auth_context_memoizes_groups(self, mock_store):
+        mock_store.get_groups_for_user.return_value = ["group1"]
+        mock_store.get_groups_ids_for_user.return_value = [1]
+        with self.app.test_request_context():
+            set_auth_context(AuthContext(username="ctx_user"))
+            self.assertEqual(get_user_groups("ctx_user"), ["group1"])
+            self.assertEqual(get_user_groups("ctx_user"), ["group1"])
+            self.assertEqual(get_user_group_ids("ctx_user"), [1])
+            self.assertEqual(get_user_group_ids("ctx_user"), [1])
+            mock_store.get_groups_for_user.assert_called_once_with("ctx_user")
+            mock_store.get_groups_ids_for_user.assert_called_once_with("ctx_user")
+            # other users are never served from the context
+            get_user_group_ids("other_user")
+            mock_store.get_groups_ids_for_user.assert_called_with("other_user")
+
+    @patch("mlflow_oidc_auth.utils.store")
+    @patch("mlflow_oidc_auth.utils.validate_token")
+    def test_build_auth_context_reuses_token_claims(self, mock_validate_token, mock_store):
+        mock_store.get_user_identity.return_value = MagicMock(id=3, is_admin=False)
+        with self.app.test_request_context(headers={"Authorization": "Bearer tok"}):
+            set_token_claims({"email": "bearer_user"})
+            context = build_auth_context()
+            self.assertEqual(context.username, "bearer_user")
+            self.assertEqual(context.user_id, 3)
+            self.assertFalse(context.is_admin)
+            self.assertEqual(context.claims, {"email": "bearer_user"})
+            mock_validate_token.assert_not_called()
+            mock_store.get_user_identity.assert_called_once_with("bearer_user")
+
 
 if __name__ == "__main__":
     unittest.main()
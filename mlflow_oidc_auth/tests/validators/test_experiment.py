@@ -1,6 +1,7 @@
 from unittest.mock import MagicMock, patch
 
 import pytest
+from flask import Flask
 from mlflow.exceptions import MlflowException
 
 from mlflow_oidc_auth.validators import experiment
@@ -36,7 +37,7 @@ def test__get_permission_from_experiment_name_found():
     store_exp = MagicMock()
     store_exp.experiment_id = "456"
     with patch("mlflow_oidc_auth.validators.experiment.get_request_param", return_value="expname"), patch(
-        "mlflow_oidc_auth.validators.experiment._get_tracking_store"
+        "mlflow_oidc_auth.tracking_cache._get_tracking_store"
     ) as mock_store, patch("mlflow_oidc_auth.validators.experiment.get_username", return_value="alice"), patch(
         "mlflow_oidc_auth.validators.experiment.effective_experiment_permission",
         return_value=MagicMock(permission=DummyPermission(can_update=True)),
@@ -48,7 +49,7 @@ def test__get_permission_from_experiment_name_found():
 
 def test__get_permission_from_experiment_name_not_found():
     with patch("mlflow_oidc_auth.validators.experiment.get_request_param", return_value="expname"), patch(
-        "mlflow_oidc_auth.validators.experiment._get_tracking_store"
+        "mlflow_oidc_auth.tracking_cache._get_tracking_store"
     ) as mock_store, patch("mlflow_oidc_auth.validators.experiment.get_permission") as mock_get_permission:
         mock_store.return_value.get_experiment_by_name.return_value = None
         mock_permission = DummyPermission(can_read=True, can_update=True, can_delete=True, can_manage=True)
@@ -161,3 +162,29 @@ def test_validate_can_delete_experiment_artifact_proxy():
         return_value=DummyPermission(can_manage=True),
     ):
         assert experiment.validate_can_delete_experiment_artifact_proxy() is True
+
+
+def _patch_permissions(readable):
+    return patch(
+        "mlflow_oidc_auth.validators.experiment.effective_experiment_permissions",
+        side_effect=lambda ids, username: {i: MagicMock(permission=DummyPermission(can_read=i in readable)) for i in ids},
+    )
+
+
+def test_validate_can_read_experiments():
+    app = Flask(__name__)
+    with patch("mlflow_oidc_auth.validators.experiment.get_username", return_value="alice"):
+        with app.test_request_context(path="/api/2.0/mlflow/runs/search", method="POST", json={"experiment_ids": ["1", "2", "2"]}):
+            with _patch_permissions({"1", "2"}) as permissions:
+                assert experiment.validate_can_read_experiments() is True
+            permissions.assert_called_once_with(["1", "2"], "alice")
+            with _patch_permissions({"1"}):
+                assert experiment.validate_can_read_experiments() is False
+        with app.test_request_context(path="/api/2.0/mlflow/traces", method="GET", query_string=[("experiment_ids", "1"), ("experiment_ids", "3")]):
+            with _patch_permissions({"1"}):
+                assert experiment.validate_can_read_experiments() is False
+        body = {"locations": [{"type": "MLFLOW_EXPERIMENT", "mlflow_experiment": {"experiment_id": "1"}}, {"type": "INFERENCE_TABLE"}]}
+        with app.test_request_context(path="/api/3.0/mlflow/traces/search", method="POST", json=body):
+            with _patch_permissions({"1"}) as permissions:
+                assert experiment.validate_can_read_trace_locations() is True
+            permissions.assert_called_once_with(["1"], "alice")
@@ -1,5 +1,10 @@
 from unittest.mock import MagicMock, patch
 
+import pytest
+from flask import Flask
+from mlflow.exceptions import MlflowException
+
+from mlflow_oidc_auth.permission_cache import permission_decision_cache
 from mlflow_oidc_auth.validators import run
 
 
@@ -22,7 +27,7 @@ def test__get_permission_from_run_id():
     mock_run = MagicMock()
     mock_run.info.experiment_id = "exp1"
     with patch("mlflow_oidc_auth.validators.run.get_request_param", return_value="run123"), patch(
-        "mlflow_oidc_auth.validators.run._get_tracking_store"
+        "mlflow_oidc_auth.tracking_cache._get_tracking_store"
     ) as mock_store, patch("mlflow_oidc_auth.validators.run.get_username", return_value="alice"), patch(
         "mlflow_oidc_auth.validators.run.effective_experiment_permission",
         return_value=MagicMock(permission=DummyPermission(can_read=True)),
@@ -36,7 +41,7 @@ def test_validate_can_read_run():
     mock_run = MagicMock()
     mock_run.info.experiment_id = "exp1"
     with patch("mlflow_oidc_auth.validators.run.get_request_param", return_value="run123"), patch(
-        "mlflow_oidc_auth.validators.run._get_tracking_store"
+        "mlflow_oidc_auth.tracking_cache._get_tracking_store"
     ) as mock_store, patch("mlflow_oidc_auth.validators.run.get_username", return_value="alice"):
         mock_store.return_value.get_run.return_value = mock_run
         with _patch_permission(can_read=True):
@@ -47,7 +52,7 @@ def test_validate_can_update_run():
     mock_run = MagicMock()
     mock_run.info.experiment_id = "exp1"
     with patch("mlflow_oidc_auth.validators.run.get_request_param", return_value="run123"), patch(
-        "mlflow_oidc_auth.validators.run._get_tracking_store"
+        "mlflow_oidc_auth.tracking_cache._get_tracking_store"
     ) as mock_store, patch("mlflow_oidc_auth.validators.run.get_username", return_value="alice"):
         mock_store.return_value.get_run.return_value = mock_run
         with _patch_permission(can_update=True):
@@ -58,7 +63,7 @@ def test_validate_can_delete_run():
     mock_run = MagicMock()
     mock_run.info.experiment_id = "exp1"
     with patch("mlflow_oidc_auth.validators.run.get_request_param", return_value="run123"), patch(
-        "mlflow_oidc_auth.validators.run._get_tracking_store"
+        "mlflow_oidc_auth.tracking_cache._get_tracking_store"
     ) as mock_store, patch("mlflow_oidc_auth.validators.run.get_username", return_value="alice"):
         mock_store.return_value.get_run.return_value = mock_run
         with _patch_permission(can_delete=True):
@@ -69,8 +74,57 @@ def test_validate_can_manage_run():
     mock_run = MagicMock()
     mock_run.info.experiment_id = "exp1"
     with patch("mlflow_oidc_auth.validators.run.get_request_param", return_value="run123"), patch(
-        "mlflow_oidc_auth.validators.run._get_tracking_store"
+        "mlflow_oidc_auth.tracking_cache._get_tracking_store"
     ) as mock_store, patch("mlflow_oidc_auth.validators.run.get_username", return_value="alice"):
         mock_store.return_value.get_run.return_value = mock_run
         with _patch_permission(can_manage=True):
             assert run.validate_can_manage_run() is True
+
+
+def test_validate_can_read_runs():
+    app = Flask(__name__)
+    run_ids = [("run_id", f"run{i}") for i in range(200)]
+    experiments = {f"run{i}": f"exp{i % 2}" for i in range(200)}
+    permissions = lambda ids, username: {i: MagicMock(permission=DummyPermission(can_read=i == "exp0")) for i in ids}
+    with app.test_request_context(path="/ajax-api/2.0/mlflow/metrics/get-history-bulk", method="GET", query_string=run_ids), patch(
+        "mlflow_oidc_auth.validators.run.get_username", return_value="alice"
+    ), patch("mlflow_oidc_auth.validators.run.run_experiment_cache") as cache, patch(
+        "mlflow_oidc_auth.validators.run.effective_experiment_permissions", side_effect=permissions
+    ) as load_permissions:
+        cache.get_experiment_ids.return_value = experiments
+        assert run.validate_can_read_runs() is False
+        cache.get_experiment_ids.assert_called_once_with([run_id for _, run_id in run_ids])
+        load_permissions.assert_called_once_with(["exp0", "exp1"], "alice")
+
+        cache.get_experiment_ids.return_value = {run_id: "exp0" for run_id in experiments}
+        assert run.validate_can_read_runs() is True
+
+        cache.get_experiment_ids.return_value = {}
+        with pytest.raises(MlflowException):
+            run.validate_can_read_runs()
+
+    with app.test_request_context(
+        path="/api/2.0/mlflow/metrics/get-history-bulk-interval", method="GET", query_string=[("run_ids", "a"), ("run_ids", "b"), ("metric_key", "loss")]
+    ), patch("mlflow_oidc_auth.validators.run.get_username", return_value="alice"), patch(
+        "mlflow_oidc_auth.validators.run.run_experiment_cache"
+    ) as cache, patch(
+        "mlflow_oidc_auth.validators.run.effective_experiment_permissions", side_effect=permissions
+    ):
+        cache.get_experiment_ids.return_value = {"a": "exp0", "b": "exp0"}
+        assert run.validate_can_read_runs() is True
+        cache.get_experiment_ids.assert_called_once_with(["a", "b"])
+
+
+def test_validate_can_update_run_holds_a_lease_until_permissions_change():
+    with patch("mlflow_oidc_auth.validators.run.get_request_param", return_value="run123"), patch(
+        "mlflow_oidc_auth.validators.run.get_username", return_value="alice"
+    ), patch("mlflow_oidc_auth.validators.run._get_permission_from_run_id", return_value=DummyPermission(can_update=True)) as resolve:
+        assert run.validate_can_update_run() is True
+        assert run.validate_can_update_run() is True
+        assert resolve.call_count == 1
+
+        permission_decision_cache.invalidate()
+        resolve.return_value = DummyPermission()
+        assert run.validate_can_update_run() is False
+        assert run.validate_can_update_run() is False
+        assert resolve.call_count == 3
@@ -0,0 +1,225 @@
+from typing import Dict, Iterable, List, Optional
+
+from mlflow.entities import Experiment
+from mlflow.exceptions import MlflowException
+from mlflow.protos.databricks_pb2 import RESOURCE_DOES_NOT_EXIST
+from mlflow.server.handlers import _get_tracking_store
+from mlflow.store.tracking.dbmodels.models import SqlExperiment, SqlRun
+from mlflow.store.tracking.sqlalchemy_store import SqlAlchemyStore as TrackingSqlAlchemyStore
+
+from mlflow_oidc_auth.config import config
+from mlflow_oidc_auth.local_cache import LocalCache
+
+# keeps the number of bound parameters well below the SQLite limit
+_MAX_IDS_PER_QUERY = 500
+
+
+class ExperimentNameCache:
+    """
+    Bounded, bidirectional experiment id <-> name map fed by the tracking store.
+
+    Both directions are filled together whenever an experiment is seen, so a
+    search result warms up later permission checks on its experiments. Entries
+    of an experiment are dropped by the ``after_request`` hooks of the requests
+    that create, rename, delete or restore it; other workers pick up the change
+    once the TTL lapses.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self._names = LocalCache(maxsize=maxsize, ttl=ttl)
+        self._ids = LocalCache(maxsize=maxsize, ttl=ttl)
+
+    def remember(self, experiment_id: str, experiment_name: str) -> None:
+        self._names.set(str(experiment_id), experiment_name)
+        self._ids.set(experiment_name, str(experiment_id))
+
+    def prefetch(self, experiments: Iterable[Experiment]) -> None:
+        """Remember the ids and names of experiments already loaded from the tracking store."""
+        for experiment in experiments:
+            self.remember(experiment.experiment_id, experiment.name)
+
+    def get_name(self, experiment_id: str) -> str:
+        """
+        Get the name of an experiment.
+        :param experiment_id: The ID of the experiment.
+        :return: The name of the experiment.
+        :raises MlflowException: If the experiment does not exist.
+        """
+        experiment_id = str(experiment_id)
+        name = self._names.get(experiment_id)
+        if name is None:
+            name = _get_tracking_store().get_experiment(experiment_id).name
+            self.remember(experiment_id, name)
+        return name
+
+    def get_names(self, experiment_ids: Iterable[str]) -> Dict[str, str]:
+        """
+        Get the names of many experiments, loading the ones not cached with one query per 500 experiments
+        when the tracking store is a database.
+        :param experiment_ids: The IDs of the experiments.
+        :return: The names by experiment ID; experiments that do not exist are left out.
+        """
+        names, missing = {}, []
+        for experiment_id in dict.fromkeys(str(experiment_id) for experiment_id in experiment_ids):
+            name = self._names.get(experiment_id)
+            if name is None:
+                missing.append(experiment_id)
+            else:
+                names[experiment_id] = name
+        for experiment_id, name in self._load_names(missing).items():
+            self.remember(experiment_id, name)
+            names[experiment_id] = name
+        return names
+
+    def get_id(self, experiment_name: str) -> Optional[str]:
+        """
+        Get the ID of an experiment.
+        :param experiment_name: The name of the experiment.
+        :return: The ID of the experiment, or None if it does not exist.
+        """
+        experiment_id = self._ids.get(experiment_name)
+        if experiment_id is None:
+            experiment = _get_tracking_store().get_experiment_by_name(experiment_name)
+            if experiment is None:
+                return None
+            experiment_id = experiment.experiment_id
+            self.remember(experiment_id, experiment.name)
+        return experiment_id
+
+    def invalidate(self, experiment_id: Optional[str] = None, experiment_name: Optional[str] = None) -> None:
+        """
+        Drop the entries of an experiment.
+        :param experiment_id: The ID of a renamed, deleted or restored experiment. Drops every name to ID
+            entry as well, since the previous name of the experiment may not be known.
+        :param experiment_name: The name of a created experiment.
+        """
+        if experiment_id is not None:
+            self._names.delete(str(experiment_id))
+            self._ids.clear()
+        if experiment_name is not None:
+            self._ids.delete(experiment_name)
+
+    def clear(self) -> None:
+        self._names.clear()
+        self._ids.clear()
+
+    def stats(self):
+        return {"names": self._names.stats(), "ids": self._ids.stats()}
+
+    @staticmethod
+    def _load_names(experiment_ids: List[str]) -> Dict[str, str]:
+        if not experiment_ids:
+            return {}
+        tracking_store = _get_tracking_store()
+        if not isinstance(tracking_store, TrackingSqlAlchemyStore):
+            names = {}
+            for experiment_id in experiment_ids:
+                try:
+                    names[experiment_id] = tracking_store.get_experiment(experiment_id).name
+                except MlflowException:
+                    continue
+            return names
+        numeric_ids = [int(experiment_id) for experiment_id in experiment_ids if experiment_id.isdigit()]
+        names = {}
+        with tracking_store.ManagedSessionMaker() as session:
+            for start in range(0, len(numeric_ids), _MAX_IDS_PER_QUERY):
+                rows = session.query(SqlExperiment.experiment_id, SqlExperiment.name).filter(
+                    SqlExperiment.experiment_id.in_(numeric_ids[start : start + _MAX_IDS_PER_QUERY])
+                )
+                names.update((str(experiment_id), name) for experiment_id, name in rows)
+        return names
+
+
+class RunExperimentCache:
+    """
+    Bounded run id -> experiment id map.
+
+    A run never moves to another experiment, so entries are never invalidated.
+    On a miss only the experiment id of the run is queried when the tracking
+    store is a database, instead of loading the run with its metrics, params
+    and tags. With ``shared`` the mapping is also kept in the configured cache
+    backend (``CACHE_TYPE``), so a run looked up by one worker is known to all.
+    """
+
+    def __init__(self, maxsize: int, shared: bool = False, shared_timeout: int = 86400):
+        self._local = LocalCache(maxsize=maxsize)
+        self.shared = shared
+        self.shared_timeout = shared_timeout
+
+    @staticmethod
+    def _shared_key(run_id: str) -> str:
+        return f"run_experiment:{run_id}"
+
+    def get_experiment_id(self, run_id: str) -> str:
+        """
+        Get the ID of the experiment a run belongs to.
+        :param run_id: The ID of the run.
+        :return: The ID of the experiment.
+        :raises MlflowException: If the run does not exist.
+        """
+        experiment_ids = self.get_experiment_ids([run_id])
+        if run_id not in experiment_ids:
+            raise MlflowException(f"Run with id={run_id} not found", RESOURCE_DOES_NOT_EXIST)
+        return experiment_ids[run_id]
+
+    def get_experiment_ids(self, run_ids: Iterable[str]) -> Dict[str, str]:
+        """
+        Get the experiments of many runs, loading the ones not cached with one query per 500 runs
+        when the tracking store is a database.
+        :param run_ids: The IDs of the runs.
+        :return: The experiment IDs by run ID; runs that do not exist are left out.
+        """
+        experiment_ids, missing = {}, []
+        for run_id in dict.fromkeys(run_ids):
+            experiment_id = self._local.get(run_id)
+            if experiment_id is None:
+                missing.append(run_id)
+            else:
+                experiment_ids[run_id] = experiment_id
+        if missing and self.shared:
+            from mlflow_oidc_auth.app import cache
+
+            for run_id, experiment_id in zip(missing, cache.get_many(*(self._shared_key(run_id) for run_id in missing))):
+                if experiment_id is not None:
+                    self._local.set(run_id, experiment_id)
+                    experiment_ids[run_id] = experiment_id
+            missing = [run_id for run_id in missing if run_id not in experiment_ids]
+        loaded = self._load_experiment_ids(missing)
+        for run_id, experiment_id in loaded.items():
+            self._local.set(run_id, experiment_id)
+            experiment_ids[run_id] = experiment_id
+        if loaded and self.shared:
+            from mlflow_oidc_auth.app import cache
+
+            cache.set_many({self._shared_key(run_id): experiment_id for run_id, experiment_id in loaded.items()}, timeout=self.shared_timeout)
+        return experiment_ids
+
+    def clear(self) -> None:
+        self._local.clear()
+
+    def stats(self):
+        return self._local.stats()
+
+    @staticmethod
+    def _load_experiment_ids(run_ids: List[str]) -> Dict[str, str]:
+        if not run_ids:
+            return {}
+        tracking_store = _get_tracking_store()
+        if not isinstance(tracking_store, TrackingSqlAlchemyStore):
+            experiment_ids = {}
+            for run_id in run_ids:
+                try:
+                    experiment_ids[run_id] = tracking_store.get_run(run_id).info.experiment_id
+                except MlflowException:
+                    continue
+            return experiment_ids
+        experiment_ids = {}
+        with tracking_store.ManagedSessionMaker() as session:
+            for start in range(0, len(run_ids), _MAX_IDS_PER_QUERY):
+                rows = session.query(SqlRun.run_uuid, SqlRun.experiment_id).filter(SqlRun.run_uuid.in_(run_ids[start : start + _MAX_IDS_PER_QUERY]))
+                experiment_ids.update((run_id, str(experiment_id)) for run_id, experiment_id in rows)
+        return experiment_ids
+
+
+experiment_name_cache = ExperimentNameCache(maxsize=config.OIDC_EXPERIMENT_NAME_CACHE_SIZE, ttl=config.OIDC_EXPERIMENT_NAME_CACHE_TTL)
+run_experiment_cache = RunExperimentCache(maxsize=config.OIDC_RUN_EXPERIMENT_CACHE_SIZE, shared=config.OIDC_RUN_EXPERIMENT_CACHE_SHARED)
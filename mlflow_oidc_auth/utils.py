@@ -1,17 +1,22 @@
-import re
+import base64
+import binascii
+import json
 from functools import wraps
-from typing import Callable, Dict, List, NamedTuple, Optional
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, TypeVar, Union
 from flask import request, session
 from sqlalchemy.exc import NoResultFound
 from mlflow.exceptions import MlflowException
 from mlflow.protos.databricks_pb2 import BAD_REQUEST, INVALID_PARAMETER_VALUE, RESOURCE_DOES_NOT_EXIST, ErrorCode
 from mlflow.server import app
 from mlflow.server.handlers import _get_tracking_store, _get_model_registry_store
-from mlflow.entities.model_registry import RegisteredModel
-from mlflow.entities import Experiment
+from mlflow.entities.model_registry import ModelVersion, RegisteredModel
+from mlflow.entities import Experiment, ViewType
 from mlflow.store.entities.paged_list import PagedList
+from mlflow.utils.search_utils import SearchUtils
 
 from mlflow_oidc_auth.auth import validate_token
+from mlflow_oidc_auth.auth_context import AuthContext, get_auth_context, get_token_claims
 from mlflow_oidc_auth.config import config
 from mlflow_oidc_auth.entities import (
     ExperimentGroupRegexPermission,
@@ -19,9 +24,18 @@ from mlflow_oidc_auth.entities import (
     RegisteredModelGroupRegexPermission,
     RegisteredModelRegexPermission,
 )
+from mlflow_oidc_auth.permission_cache import permission_decision_cache
 from mlflow_oidc_auth.permissions import Permission, get_permission
+from mlflow_oidc_auth.regex_rules import RegexRuleSet
+from mlflow_oidc_auth.repository.effective_permission import PermissionSources
 from mlflow_oidc_auth.responses.client_error import make_forbidden_response
 from mlflow_oidc_auth.store import store
+from mlflow_oidc_auth.tracking_cache import experiment_name_cache
+
+T = TypeVar("T")
+
+# (position in the store's ordering, store page token, index in that page) of the next item to return
+SearchCursor = Tuple[int, Optional[str], int]
 
 
 def fetch_all_registered_models(
@@ -96,97 +110,125 @@ def fetch_registered_models_paginated(
     )
 
 
-def _get_registered_model_permission_from_regex(regexes: List[RegisteredModelRegexPermission], model_name: str) -> str:
-    for regex in regexes:
-        if re.match(regex.regex, model_name):
-            app.logger.debug(f"Regex permission found for model name {model_name}: {regex.permission} with regex {regex.regex} and priority {regex.priority}")
-            return regex.permission
+def _get_registered_model_permission_from_regex(regexes: Union[RegexRuleSet, List[RegisteredModelRegexPermission]], model_name: str) -> str:
+    if regex := RegexRuleSet.compile(regexes).match(model_name):
+        app.logger.debug(f"Regex permission found for model name {model_name}: {regex.permission} with regex {regex.regex} and priority {regex.priority}")
+        return regex.permission
     raise MlflowException(
         f"model name {model_name}",
         error_code=RESOURCE_DOES_NOT_EXIST,
     )
 
 
-def _get_experiment_permission_from_regex(regexes: List[ExperimentRegexPermission], experiment_id: str) -> str:
-    experiment_name = _get_tracking_store().get_experiment(experiment_id).name
-    for regex in regexes:
-        if re.match(regex.regex, experiment_name):
-            app.logger.debug(
-                f"Regex permission found for experiment id {experiment_name}: {regex.permission} with regex {regex.regex} and priority {regex.priority}"
-            )
-            return regex.permission
+def _get_experiment_permission_from_regex(
+    regexes: Union[RegexRuleSet, List[ExperimentRegexPermission]], experiment_id: str, experiment_name: Optional[str] = None
+) -> str:
+    rules = RegexRuleSet.compile(regexes)
+    if rules and experiment_name is None:
+        experiment_name = experiment_name_cache.get_name(experiment_id)
+    if regex := rules.match(experiment_name):
+        app.logger.debug(
+            f"Regex permission found for experiment id {experiment_name}: {regex.permission} with regex {regex.regex} and priority {regex.priority}"
+        )
+        return regex.permission
     raise MlflowException(
         f"experiment id {experiment_id}",
         error_code=RESOURCE_DOES_NOT_EXIST,
     )
 
 
-def _get_registered_model_group_permission_from_regex(regexes: List[RegisteredModelGroupRegexPermission], model_name: str) -> str:
-    for regex in regexes:
-        if re.match(regex.regex, model_name):
-            app.logger.debug(
-                f"Regex group permission found for model name {model_name}: {regex.permission} with regex {regex.regex} and priority {regex.priority}"
-            )
-            return regex.permission
+def _get_registered_model_group_permission_from_regex(regexes: Union[RegexRuleSet, List[RegisteredModelGroupRegexPermission]], model_name: str) -> str:
+    if regex := RegexRuleSet.compile(regexes).match(model_name):
+        app.logger.debug(f"Regex group permission found for model name {model_name}: {regex.permission} with regex {regex.regex} and priority {regex.priority}")
+        return regex.permission
     raise MlflowException(
         f"model name {model_name}",
         error_code=RESOURCE_DOES_NOT_EXIST,
     )
 
 
-def _get_experiment_group_permission_from_regex(regexes: List[ExperimentGroupRegexPermission], experiment_id: str) -> str:
-    experiment_name = _get_tracking_store().get_experiment(experiment_id).name
-    for regex in regexes:
-        if re.match(regex.regex, experiment_name):
-            app.logger.debug(
-                f"Regex group permission found for experiment id {experiment_name}: {regex.permission} with regex {regex.regex} and priority {regex.priority}"
-            )
-            return regex.permission
+def _get_experiment_group_permission_from_regex(
+    regexes: Union[RegexRuleSet, List[ExperimentGroupRegexPermission]], experiment_id: str, experiment_name: Optional[str] = None
+) -> str:
+    rules = RegexRuleSet.compile(regexes)
+    if rules and experiment_name is None:
+        experiment_name = experiment_name_cache.get_name(experiment_id)
+    if regex := rules.match(experiment_name):
+        app.logger.debug(
+            f"Regex group permission found for experiment id {experiment_name}: {regex.permission} with regex {regex.regex} and priority {regex.priority}"
+        )
+        return regex.permission
     raise MlflowException(
         f"experiment id {experiment_id}",
         error_code=RESOURCE_DOES_NOT_EXIST,
     )
 
 
-def _permission_prompt_sources_config(model_name: str, username: str) -> Dict[str, Callable[[], str]]:
+def _lazy_permission_sources(load: Callable[[], PermissionSources]) -> Callable[[], PermissionSources]:
+    """Defer the permission sources query until a source is consulted, then reuse its result."""
+    loaded: List[PermissionSources] = []
+
+    def get() -> PermissionSources:
+        if not loaded:
+            loaded.append(load())
+        return loaded[0]
+
+    return get
+
+
+def _source_permission(permission: Optional[str], description: str) -> str:
+    if permission is None:
+        raise MlflowException(description, error_code=RESOURCE_DOES_NOT_EXIST)
+    return permission
+
+
+def _prompt_sources_config(model_name: str, username: str, sources: Callable[[], PermissionSources]) -> Dict[str, Callable[[], str]]:
     return {
-        "user": lambda model_name=model_name, user=username: store.get_registered_model_permission(model_name, user).permission,
-        "group": lambda model_name=model_name, user=username: store.get_user_groups_registered_model_permission(model_name, user).permission,
-        "regex": lambda model_name=model_name, user=username: _get_registered_model_permission_from_regex(
-            store.list_prompt_regex_permissions(user), model_name
-        ),
-        "group-regex": lambda model_name=model_name, user=username: _get_registered_model_group_permission_from_regex(
-            store.list_group_prompt_regex_permissions_for_groups_ids(store.get_groups_ids_for_user(user)), model_name
-        ),
+        "user": lambda: _source_permission(sources().user, f"Prompt permission with name={model_name} and username={username} not found"),
+        "group": lambda: _source_permission(sources().group, f"Prompt group permission with name={model_name} and username={username} not found"),
+        "regex": lambda: _get_registered_model_permission_from_regex(sources().regexes, model_name),
+        "group-regex": lambda: _get_registered_model_group_permission_from_regex(sources().group_regexes, model_name),
     }
 
 
-def _permission_experiment_sources_config(experiment_id: str, username: str) -> Dict[str, Callable[[], str]]:
+def _experiment_sources_config(
+    experiment_id: str, username: str, sources: Callable[[], PermissionSources], experiment_name: Optional[str] = None
+) -> Dict[str, Callable[[], str]]:
     return {
-        "user": lambda experiment_id=experiment_id, user=username: store.get_experiment_permission(experiment_id, user).permission,
-        "group": lambda experiment_id=experiment_id, user=username: store.get_user_groups_experiment_permission(experiment_id, user).permission,
-        "regex": lambda experiment_id=experiment_id, user=username: _get_experiment_permission_from_regex(
-            store.list_experiment_regex_permissions(user), experiment_id
-        ),
-        "group-regex": lambda experiment_id=experiment_id, user=username: _get_experiment_group_permission_from_regex(
-            store.list_group_experiment_regex_permissions_for_groups_ids(store.get_groups_ids_for_user(user)), experiment_id
+        "user": lambda: _source_permission(sources().user, f"Experiment permission with experiment_id={experiment_id} and username={username} not found"),
+        "group": lambda: _source_permission(
+            sources().group, f"Experiment group permission with experiment_id={experiment_id} and username={username} not found"
         ),
+        "regex": lambda: _get_experiment_permission_from_regex(sources().regexes, experiment_id, experiment_name),
+        "group-regex": lambda: _get_experiment_group_permission_from_regex(sources().group_regexes, experiment_id, experiment_name),
     }
 
 
-def _permission_registered_model_sources_config(model_name: str, username: str) -> Dict[str, Callable[[], str]]:
+def _registered_model_sources_config(model_name: str, username: str, sources: Callable[[], PermissionSources]) -> Dict[str, Callable[[], str]]:
     return {
-        "user": lambda model_name=model_name, user=username: store.get_registered_model_permission(model_name, user).permission,
-        "group": lambda model_name=model_name, user=username: store.get_user_groups_registered_model_permission(model_name, user).permission,
-        "regex": lambda model_name=model_name, user=username: _get_registered_model_permission_from_regex(
-            store.list_registered_model_regex_permissions(user), model_name
-        ),
-        "group-regex": lambda model_name=model_name, user=username: _get_registered_model_group_permission_from_regex(
-            store.list_group_registered_model_regex_permissions_for_groups_ids(store.get_groups_ids_for_user(user)), model_name
-        ),
+        "user": lambda: _source_permission(sources().user, f"Registered model permission with name={model_name} and username={username} not found"),
+        "group": lambda: _source_permission(sources().group, f"Registered model group permission with name={model_name} and username={username} not found"),
+        "regex": lambda: _get_registered_model_permission_from_regex(sources().regexes, model_name),
+        "group-regex": lambda: _get_registered_model_group_permission_from_regex(sources().group_regexes, model_name),
     }
 
 
+def _permission_prompt_sources_config(model_name: str, username: str) -> Dict[str, Callable[[], str]]:
+    return _prompt_sources_config(model_name, username, _lazy_permission_sources(lambda: store.get_prompt_permission_sources(model_name, username)))
+
+
+def _permission_experiment_sources_config(experiment_id: str, username: str) -> Dict[str, Callable[[], str]]:
+    return _experiment_sources_config(
+        experiment_id, username, _lazy_permission_sources(lambda: store.get_experiment_permission_sources(experiment_id, username))
+    )
+
+
+def _permission_registered_model_sources_config(model_name: str, username: str) -> Dict[str, Callable[[], str]]:
+    return _registered_model_sources_config(
+        model_name, username, _lazy_permission_sources(lambda: store.get_registered_model_permission_sources(model_name, username))
+    )
+
+
 def get_url_param(param: str) -> str:
     """Extract a URL path parameter from Flask's request.view_args.
 
@@ -224,11 +266,28 @@ def get_optional_url_param(param: str) -> str | None:
     return view_args[param]
 
 
+def get_request_json() -> dict:
+    """
+    The JSON body of the request, or an empty dict.
+
+    The body is parsed the way MLflow's handlers parse it (``get_json(force=True, silent=True)``),
+    so Flask decodes it once per request and the handler's ``_get_request_message`` reuses the result.
+    """
+    body = request.get_json(force=True, silent=True)
+    if isinstance(body, str):
+        # older clients post their JSON double-encoded
+        try:
+            body = json.loads(body)
+        except ValueError:
+            body = None
+    return body if isinstance(body, dict) else {}
+
+
 def get_request_param(param: str) -> str:
     if request.method == "GET":
         args = request.args
     elif request.method in ("POST", "PATCH", "DELETE"):
-        args = request.json
+        args = get_request_json()
     else:
         raise MlflowException(
             f"Unsupported HTTP method '{request.method}'",
@@ -250,7 +309,7 @@ def get_optional_request_param(param: str) -> str | None:
     if request.method == "GET":
         args = request.args
     elif request.method in ("POST", "PATCH", "DELETE"):
-        args = request.json
+        args = get_request_json()
     else:
         raise MlflowException(
             f"Unsupported HTTP method '{request.method}'",
@@ -263,7 +322,26 @@ def get_optional_request_param(param: str) -> str | None:
     return args[param]
 
 
+def get_request_param_list(param: str) -> List[str]:
+    """A repeated request parameter, e.g. the experiment_ids of SearchRuns; empty if it is missing."""
+    if request.method == "GET":
+        return request.args.getlist(param)
+    values = get_optional_request_param(param)
+    if values is None:
+        return []
+    return values if isinstance(values, list) else [values]
+
+
+def _get_bearer_token_claims() -> dict:
+    claims = get_token_claims()
+    if claims is None:
+        claims = validate_token(request.authorization.token)
+    return claims
+
+
 def get_username() -> str:
+    if context := get_auth_context():
+        return context.username
     username = session.get("username")
     if username:
         app.logger.debug(f"Username from session: {username}")
@@ -275,7 +353,7 @@ def get_username() -> str:
                 return request.authorization.username
             raise MlflowException("Username not found in basic auth.")
         if request.authorization.type == "bearer":
-            username = validate_token(request.authorization.token).get("email")
+            username = _get_bearer_token_claims().get("email")
             app.logger.debug(f"Username from bearer token: {username}")
             return username
     raise MlflowException("Authentication required. Please see documentation for details: ")
@@ -301,6 +379,15 @@ def get_user_groups(username: Optional[str] = None) -> list[str]:
         A list of strings representing the user's groups. Returns an empty list
         if no groups are found.
     """
+    context = get_auth_context()
+    if context is not None and username == context.username:
+        if context.groups is None:
+            context.groups = _resolve_user_groups(username)
+        return context.groups
+    return _resolve_user_groups(username)
+
+
+def _resolve_user_groups(username: Optional[str] = None) -> list[str]:
     if request.authorization and request.authorization.type == "bearer":
         if config.OIDC_GROUP_DETECTION_PLUGIN:
             import importlib
@@ -312,7 +399,7 @@ def get_user_groups(username: Optional[str] = None) -> list[str]:
                 )
             app.logger.debug(f"Groups from plugin: {user_groups}")
         else:
-            user_groups = validate_token(request.authorization.token).get(
+            user_groups = _get_bearer_token_claims().get(
                 config.OIDC_GROUPS_ATTRIBUTE
                 )
             app.logger.debug(f"Groups from bearer token: {user_groups}")
@@ -328,6 +415,20 @@ def get_user_groups(username: Optional[str] = None) -> list[str]:
     return []
 
 
+def get_user_group_ids(username: str) -> List[int]:
+    """
+    Retrieve the ids of the groups a user is a member of in the store.
+
+    The ids of the current request's user are memoized on the auth context.
+    """
+    context = get_auth_context()
+    if context is not None and username == context.username:
+        if context.group_ids is None:
+            context.group_ids = store.get_groups_ids_for_user(username)
+        return context.group_ids
+    return store.get_groups_ids_for_user(username)
+
+
 def filter_groups(user_groups: list[str]) -> list[str]:
     """
     Filters the user groups to only include those that are allowed by the
@@ -350,7 +451,27 @@ def filter_groups(user_groups: list[str]) -> list[str]:
 
 
 def get_is_admin() -> bool:
-    return bool(store.get_user(get_username()).is_admin)
+    if context := get_auth_context():
+        return context.is_admin
+    return bool(store.get_user_identity(get_username()).is_admin)
+
+
+def build_auth_context() -> AuthContext:
+    """
+    Resolve the caller of the current request into an AuthContext.
+
+    Expects the request to be authenticated already; the bearer token claims
+    validated during authentication are reused instead of decoding the token again.
+    """
+    username = get_username()
+    identity = store.get_user_identity(username)
+    claims = get_token_claims() if request.authorization is not None and request.authorization.type == "bearer" else None
+    return AuthContext(
+        username=username,
+        is_admin=bool(identity.is_admin),
+        user_id=identity.id,
+        claims=claims,
+    )
 
 
 def _experiment_id_from_name(experiment_name: str) -> str:
@@ -358,13 +479,13 @@ def _experiment_id_from_name(experiment_name: str) -> str:
     Helper function to get the experiment ID from the experiment name.
     Raises an exception if the experiment does not exist.
     """
-    experiment = _get_tracking_store().get_experiment_by_name(experiment_name)
-    if experiment is None:
+    experiment_id = experiment_name_cache.get_id(experiment_name)
+    if experiment_id is None:
         raise MlflowException(
             f"Experiment with name '{experiment_name}' not found.",
             INVALID_PARAMETER_VALUE,
         )
-    return experiment.experiment_id
+    return experiment_id
 
 
 def get_experiment_id() -> str:
@@ -381,11 +502,12 @@ def get_experiment_id() -> str:
         elif "experiment_name" in request.args:
             return _experiment_id_from_name(request.args["experiment_name"])
     # Last: check json (POST, PATCH, DELETE)
-    if request.json:
-        if "experiment_id" in request.json:
-            return request.json["experiment_id"]
-        elif "experiment_name" in request.json:
-            return _experiment_id_from_name(request.json["experiment_name"])
+    if request.method != "GET":
+        body = get_request_json()
+        if "experiment_id" in body:
+            return body["experiment_id"]
+        elif "experiment_name" in body:
+            return _experiment_id_from_name(body["experiment_name"])
     raise MlflowException(
         "Either 'experiment_id' or 'experiment_name' must be provided in the request data.",
         INVALID_PARAMETER_VALUE,
@@ -397,12 +519,17 @@ def get_model_name() -> str:
     Helper function to get the model name from the request.
     Raises an exception if the model name is not found.
     """
-    if request.view_args and "name" in request.view_args:
-        return request.view_args["name"]
+    if request.view_args:
+        # prompt permission routes name the prompt prompt_name
+        for key in ("name", "prompt_name"):
+            if key in request.view_args:
+                return request.view_args[key]
     if request.args and "name" in request.args:
         return request.args["name"]
-    if request.json and "name" in request.json:
-        return request.json["name"]
+    if request.method != "GET":
+        body = get_request_json()
+        if "name" in body:
+            return body["name"]
     raise MlflowException(
         "Model name must be provided in the request data.",
         INVALID_PARAMETER_VALUE,
@@ -443,13 +570,95 @@ def get_permission_from_store_or_default(PERMISSION_SOURCES_CONFIG: Dict[str, Ca
     return PermissionResult(get_permission(perm), "fallback")
 
 
+def _materialized(kind: str, username: str, resolve: Callable[[List[str]], Dict[str, PermissionResult]]) -> Callable[[List[str]], Dict[str, PermissionResult]]:
+    """Look permissions up in the effective_permissions table, storing the ones that have to be resolved from the sources."""
+
+    def resolve_materialized(resources: List[str]) -> Dict[str, PermissionResult]:
+        results = {
+            resource: PermissionResult(get_permission(permission), source)
+            for resource, (permission, source) in store.get_materialized_permissions(kind, resources, username).items()
+        }
+        missing = [resource for resource in resources if resource not in results]
+        if missing:
+            generations = store.get_permission_generations()
+            resolved = resolve(missing)
+            store.materialize_permissions(
+                kind, {resource: (result.permission.name, result.type) for resource, result in resolved.items()}, username, generations
+            )
+            results.update(resolved)
+        return results
+
+    return resolve_materialized
+
+
+def _cached_permission(kind: str, resource: str, username: str, resolve: Callable[[], PermissionResult]) -> PermissionResult:
+    version = permission_decision_cache.current_version()
+    if decision := permission_decision_cache.get(kind, username, resource, version):
+        return PermissionResult(get_permission(decision[0]), decision[1])
+    if config.OIDC_MATERIALIZED_PERMISSIONS:
+        result = _materialized(kind, username, lambda missing: {resource: resolve()})([resource])[resource]
+    else:
+        result = resolve()
+    permission_decision_cache.set(kind, username, resource, (result.permission.name, result.type), version)
+    return result
+
+
+def _cached_permissions(
+    kind: str, resources: List[str], username: str, resolve: Callable[[List[str]], Dict[str, PermissionResult]]
+) -> Dict[str, PermissionResult]:
+    version = permission_decision_cache.current_version()
+    results: Dict[str, Optional[PermissionResult]] = {}
+    for resource in resources:
+        decision = permission_decision_cache.get(kind, username, resource, version)
+        results[resource] = PermissionResult(get_permission(decision[0]), decision[1]) if decision else None
+    missing = [resource for resource, result in results.items() if result is None]
+    if missing and config.OIDC_MATERIALIZED_PERMISSIONS:
+        resolve = _materialized(kind, username, resolve)
+    if missing:
+        for resource, result in resolve(missing).items():
+            permission_decision_cache.set(kind, username, resource, (result.permission.name, result.type), version)
+            results[resource] = result
+    return results
+
+
+def _resolve_experiment_permissions(experiment_ids: List[str], username: str, experiment_names: Dict[str, str]) -> Dict[str, PermissionResult]:
+    sources = store.get_experiments_permission_sources(experiment_ids, username)
+    names = experiment_names
+    if any(experiment_sources.regexes or experiment_sources.group_regexes for experiment_sources in sources.values()):
+        names = {**experiment_name_cache.get_names([experiment_id for experiment_id in sources if experiment_id not in names]), **names}
+    return {
+        experiment_id: get_permission_from_store_or_default(
+            _experiment_sources_config(experiment_id, username, lambda s=experiment_sources: s, names.get(experiment_id))
+        )
+        for experiment_id, experiment_sources in sources.items()
+    }
+
+
+def _resolve_registered_model_permissions(model_names: List[str], username: str) -> Dict[str, PermissionResult]:
+    sources = store.get_registered_models_permission_sources(model_names, username)
+    return {
+        name: get_permission_from_store_or_default(_registered_model_sources_config(name, username, lambda s=model_sources: s))
+        for name, model_sources in sources.items()
+    }
+
+
+def _resolve_prompt_permissions(prompt_names: List[str], username: str) -> Dict[str, PermissionResult]:
+    sources = store.get_prompts_permission_sources(prompt_names, username)
+    return {
+        name: get_permission_from_store_or_default(_prompt_sources_config(name, username, lambda s=prompt_sources: s))
+        for name, prompt_sources in sources.items()
+    }
+
+
 def effective_experiment_permission(experiment_id: str, user: str) -> PermissionResult:
     """
     Attempts to get permission from store based on configured sources,
     and returns default permission if no record is found.
     Permissions are checked in the order defined in PERMISSION_SOURCE_ORDER.
     """
-    return get_permission_from_store_or_default(_permission_experiment_sources_config(experiment_id, user))
+    return _cached_permission(
+        "experiment", experiment_id, user, lambda: get_permission_from_store_or_default(_permission_experiment_sources_config(experiment_id, user))
+    )
 
 
 def effective_registered_model_permission(model_name: str, user: str) -> PermissionResult:
@@ -458,7 +667,9 @@ def effective_registered_model_permission(model_name: str, user: str) -> Permiss
     and returns default permission if no record is found.
     Permissions are checked in the order defined in PERMISSION_SOURCE_ORDER.
     """
-    return get_permission_from_store_or_default(_permission_registered_model_sources_config(model_name, user))
+    return _cached_permission(
+        "registered_model", model_name, user, lambda: get_permission_from_store_or_default(_permission_registered_model_sources_config(model_name, user))
+    )
 
 
 def effective_prompt_permission(prompt_name: str, user: str) -> PermissionResult:
@@ -467,7 +678,63 @@ def effective_prompt_permission(prompt_name: str, user: str) -> PermissionResult
     and returns default permission if no record is found.
     Permissions are checked in the order defined in PERMISSION_SOURCE_ORDER.
     """
-    return get_permission_from_store_or_default(_permission_prompt_sources_config(prompt_name, user))
+    return _cached_permission("prompt", prompt_name, user, lambda: get_permission_from_store_or_default(_permission_prompt_sources_config(prompt_name, user)))
+
+
+def effective_experiment_permissions(
+    experiment_ids: List[str], username: str, experiment_names: Optional[Dict[str, str]] = None
+) -> Dict[str, PermissionResult]:
+    """
+    Batched variant of effective_experiment_permission.
+    The user's grants, group grants and regex rules are loaded once for the experiments without a cached decision.
+    Pass the experiment names when they are known to avoid looking them up for the regex sources.
+    """
+    return _cached_permissions(
+        "experiment", experiment_ids, username, lambda missing: _resolve_experiment_permissions(missing, username, experiment_names or {})
+    )
+
+
+def effective_registered_model_permissions(model_names: List[str], username: str) -> Dict[str, PermissionResult]:
+    """
+    Batched variant of effective_registered_model_permission.
+    The user's grants, group grants and regex rules are loaded once for the models without a cached decision.
+    """
+    return _cached_permissions("registered_model", model_names, username, lambda missing: _resolve_registered_model_permissions(missing, username))
+
+
+def effective_prompt_permissions(prompt_names: List[str], username: str) -> Dict[str, PermissionResult]:
+    """
+    Batched variant of effective_prompt_permission.
+    The user's grants, group grants and regex rules are loaded once for the prompts without a cached decision.
+    """
+    return _cached_permissions("prompt", prompt_names, username, lambda missing: _resolve_prompt_permissions(missing, username))
+
+
+def rebuild_materialized_permissions(max_attempts: int = 5) -> int:
+    """
+    Recompute the effective_permissions table: the permission of every user on every experiment,
+    registered model and prompt of the tracking and model registry stores.
+    :param max_attempts: How often to recompute the permissions of a user that changed while they were computed.
+    :return: The number of permissions stored.
+    """
+    experiment_names = {experiment.experiment_id: experiment.name for experiment in fetch_all_experiments(view_type=ViewType.ALL)}
+    resources = {
+        "experiment": (list(experiment_names), lambda keys, username: _resolve_experiment_permissions(keys, username, experiment_names)),
+        "registered_model": ([model.name for model in fetch_all_registered_models()], _resolve_registered_model_permissions),
+        "prompt": ([prompt.name for prompt in fetch_all_prompts()], _resolve_prompt_permissions),
+    }
+    stored = 0
+    for user in store.list_users(all=True):
+        for kind, (keys, resolve) in resources.items():
+            for _ in range(max_attempts):
+                generations = store.get_permission_generations()
+                decisions = {key: (result.permission.name, result.type) for key, result in resolve(keys, user.username).items()}
+                if store.materialize_permissions(kind, decisions, user.username, generations, replace=True):
+                    stored += len(decisions)
+                    break
+            else:
+                app.logger.warning(f"Permissions of {user.username} on {kind} kept changing, they will be materialized on first use")
+    return stored
 
 
 def can_read_experiment(experiment_id: str, user: str) -> bool:
@@ -493,7 +760,7 @@ def can_manage_registered_model(model_name: str, user: str) -> bool:
 def check_experiment_permission(f) -> Callable:
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        current_user = store.get_user(get_username())
+        current_user = store.get_user_identity(get_username())
         if not get_is_admin():
             app.logger.debug(f"Not Admin. Checking permission for {current_user.username}")
             experiment_id = get_experiment_id()
@@ -509,7 +776,7 @@ def check_experiment_permission(f) -> Callable:
 def check_registered_model_permission(f) -> Callable:
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        current_user = store.get_user(get_username())
+        current_user = store.get_user_identity(get_username())
         if not get_is_admin():
             app.logger.debug(f"Not Admin. Checking permission for {current_user.username}")
             model_name = get_model_name()
@@ -525,7 +792,7 @@ def check_registered_model_permission(f) -> Callable:
 def check_prompt_permission(f) -> Callable:
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        current_user = store.get_user(get_username())
+        current_user = store.get_user_identity(get_username())
         if not get_is_admin():
             app.logger.debug(f"Not Admin. Checking permission for {current_user.username}")
             prompt_name = get_model_name()
@@ -541,7 +808,7 @@ def check_prompt_permission(f) -> Callable:
 def check_admin_permission(f) -> Callable:
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        current_user = store.get_user(get_username())
+        current_user = store.get_user_identity(get_username())
         if not get_is_admin():
             app.logger.warning(f"Admin permission denied for {current_user.username}")
             return make_forbidden_response()
@@ -646,8 +913,15 @@ def fetch_readable_experiments(
     # Get all experiments matching the filter
     all_experiments = fetch_all_experiments(view_type=view_type, max_results_per_page=max_results_per_page, order_by=order_by, filter_string=filter_string)
 
+    experiment_name_cache.prefetch(all_experiments)
+
     # Filter by permissions
-    readable_experiments = [experiment for experiment in all_experiments if can_read_experiment(experiment.experiment_id, username)]
+    permissions = effective_experiment_permissions(
+        [experiment.experiment_id for experiment in all_experiments],
+        username,
+        {experiment.experiment_id: experiment.name for experiment in all_experiments},
+    )
+    readable_experiments = [experiment for experiment in all_experiments if permissions[experiment.experiment_id].permission.can_read]
 
     return readable_experiments
 
@@ -675,6 +949,179 @@ def fetch_readable_registered_models(
     all_models = fetch_all_registered_models(filter_string=filter_string, order_by=order_by, max_results_per_page=max_results_per_page)
 
     # Filter by permissions
-    readable_models = [model for model in all_models if can_read_registered_model(model.name, username)]
+    permissions = effective_registered_model_permissions([model.name for model in all_models], username)
+    readable_models = [model for model in all_models if permissions[model.name].permission.can_read]
 
     return readable_models
+
+
+def _encode_search_cursor(cursor: SearchCursor) -> str:
+    position, store_token, skip = cursor
+    # MLflow's search handlers parse the token before the result is filtered; "offset" keeps it valid for them
+    return base64.b64encode(json.dumps({"offset": position, "token": store_token, "skip": skip}).encode("utf-8")).decode("utf-8")
+
+
+def _decode_search_cursor(page_token: Optional[str]) -> SearchCursor:
+    if not page_token:
+        return 0, None, 0
+    try:
+        parsed = json.loads(base64.b64decode(page_token))
+    except (ValueError, binascii.Error):
+        raise MlflowException("Invalid page token", error_code=INVALID_PARAMETER_VALUE)
+    if not isinstance(parsed, dict) or "skip" not in parsed:
+        # a page token of the store itself
+        return SearchUtils.parse_start_offset_from_page_token(page_token), page_token, 0
+    try:
+        skip = int(parsed["skip"])
+        return int(parsed["offset"]) - skip, parsed["token"], skip
+    except (KeyError, TypeError, ValueError):
+        raise MlflowException(f"Invalid page token, parsed value={parsed}", error_code=INVALID_PARAMETER_VALUE)
+
+
+def _readable_items(
+    search_page: Callable[[Optional[str], int], PagedList[T]], readable: Callable[[List[T]], List[bool]], cursor: SearchCursor, page_size: int
+) -> Iterator[Tuple[T, SearchCursor]]:
+    """Pull store pages lazily from ``cursor``, checking the permissions of each page in one batch."""
+    page_start, store_token, skip = cursor
+    while True:
+        page = search_page(store_token, page_size)
+        items = list(page)[skip:]
+        for index, (item, can_read) in enumerate(zip(items, readable(items)), start=skip):
+            if can_read:
+                yield item, (page_start + index, store_token, index)
+        if not page.token:
+            return
+        page_start, store_token, skip = page_start + len(page), page.token.decode("utf-8") if isinstance(page.token, bytes) else page.token, 0
+
+
+def search_readable(
+    search_page: Callable[[Optional[str], int], PagedList[T]],
+    readable: Callable[[List[T]], List[bool]],
+    max_results: int,
+    page_token: Optional[str] = None,
+    max_page_size: int = 1000,
+) -> Tuple[List[T], Optional[str]]:
+    """
+    Return one page of the items a user can read.
+
+    Store pages are fetched only until max_results + 1 readable items are found, so the cost
+    depends on the page, not on the size of the store.
+
+    Args:
+        search_page: Fetches a store page, given a store page token and a page size
+        readable: Tells which items of a store page the user can read
+        max_results: Maximum number of items to return
+        page_token: Token returned with the previous page, if any
+        max_page_size: Largest page to fetch from the store
+
+    Returns:
+        The readable items and the token of the next page, or None on the last page
+    """
+    page_size = min(max(max_results + 1, 100), max_page_size)
+    found = list(islice(_readable_items(search_page, readable, _decode_search_cursor(page_token), page_size), max_results + 1))
+    next_page_token = _encode_search_cursor(found[max_results][1]) if len(found) > max_results else None
+    return [item for item, _ in found[:max_results]], next_page_token
+
+
+def search_readable_experiments(
+    view_type: int = 1,
+    max_results: int = 1000,
+    order_by: Optional[List[str]] = None,
+    filter_string: Optional[str] = None,
+    page_token: Optional[str] = None,
+    username: Optional[str] = None,
+) -> Tuple[List[Experiment], Optional[str]]:
+    """
+    Return one page of the experiments the user can read, see search_readable.
+
+    Args:
+        view_type: ViewType for experiments (1=ACTIVE_ONLY, 2=DELETED_ONLY, 3=ALL)
+        max_results: Maximum number of experiments to return
+        order_by: List of order by clauses
+        filter_string: Filter string for the search
+        page_token: Token returned with the previous page, if any
+        username: Username to check permissions for (defaults to current user)
+
+    Returns:
+        The readable experiments and the token of the next page, or None on the last page
+    """
+    if username is None:
+        username = get_username()
+
+    def search_page(store_token: Optional[str], page_size: int) -> PagedList[Experiment]:
+        return fetch_experiments_paginated(view_type=view_type, max_results=page_size, order_by=order_by, filter_string=filter_string, page_token=store_token)
+
+    def readable(experiments: List[Experiment]) -> List[bool]:
+        experiment_name_cache.prefetch(experiments)
+        permissions = effective_experiment_permissions(
+            [experiment.experiment_id for experiment in experiments], username, {experiment.experiment_id: experiment.name for experiment in experiments}
+        )
+        return [permissions[experiment.experiment_id].permission.can_read for experiment in experiments]
+
+    return search_readable(search_page, readable, max_results, page_token)
+
+
+def search_readable_registered_models(
+    filter_string: Optional[str] = None,
+    max_results: int = 1000,
+    order_by: Optional[List[str]] = None,
+    page_token: Optional[str] = None,
+    username: Optional[str] = None,
+) -> Tuple[List[RegisteredModel], Optional[str]]:
+    """
+    Return one page of the registered models the user can read, see search_readable.
+
+    Args:
+        filter_string: Filter string for the search
+        max_results: Maximum number of models to return
+        order_by: List of order by clauses
+        page_token: Token returned with the previous page, if any
+        username: Username to check permissions for (defaults to current user)
+
+    Returns:
+        The readable models and the token of the next page, or None on the last page
+    """
+    if username is None:
+        username = get_username()
+
+    def search_page(store_token: Optional[str], page_size: int) -> PagedList[RegisteredModel]:
+        return fetch_registered_models_paginated(filter_string=filter_string, max_results=page_size, order_by=order_by, page_token=store_token)
+
+    def readable(models: List[RegisteredModel]) -> List[bool]:
+        permissions = effective_registered_model_permissions([model.name for model in models], username)
+        return [permissions[model.name].permission.can_read for model in models]
+
+    return search_readable(search_page, readable, max_results, page_token)
+
+
+def search_readable_model_versions(
+    filter_string: Optional[str] = None,
+    max_results: int = 1000,
+    order_by: Optional[List[str]] = None,
+    page_token: Optional[str] = None,
+    username: Optional[str] = None,
+) -> Tuple[List[ModelVersion], Optional[str]]:
+    """
+    Return one page of the model versions of registered models the user can read, see search_readable.
+
+    Args:
+        filter_string: Filter string for the search
+        max_results: Maximum number of model versions to return
+        order_by: List of order by clauses
+        page_token: Token returned with the previous page, if any
+        username: Username to check permissions for (defaults to current user)
+
+    Returns:
+        The readable model versions and the token of the next page, or None on the last page
+    """
+    if username is None:
+        username = get_username()
+
+    def search_page(store_token: Optional[str], page_size: int) -> PagedList[ModelVersion]:
+        return _get_model_registry_store().search_model_versions(filter_string=filter_string, max_results=page_size, order_by=order_by, page_token=store_token)
+
+    def readable(model_versions: List[ModelVersion]) -> List[bool]:
+        permissions = effective_registered_model_permissions(list({model_version.name for model_version in model_versions}), username)
+        return [permissions[model_version.name].permission.can_read for model_version in model_versions]
+
+    return search_readable(search_page, readable, max_results, page_token)
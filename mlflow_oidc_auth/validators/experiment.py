@@ -1,11 +1,20 @@
 import re
+from typing import Iterable
 
 from flask import request
-from mlflow.server.handlers import _get_tracking_store
 
 from mlflow_oidc_auth.config import config
 from mlflow_oidc_auth.permissions import Permission, get_permission
-from mlflow_oidc_auth.utils import effective_experiment_permission, get_experiment_id, get_request_param, get_username
+from mlflow_oidc_auth.tracking_cache import experiment_name_cache
+from mlflow_oidc_auth.utils import (
+    effective_experiment_permission,
+    effective_experiment_permissions,
+    get_experiment_id,
+    get_optional_request_param,
+    get_request_param,
+    get_request_param_list,
+    get_username,
+)
 
 
 def _get_permission_from_experiment_id() -> Permission:
@@ -16,12 +25,21 @@ def _get_permission_from_experiment_id() -> Permission:
 
 def _get_permission_from_experiment_name() -> Permission:
     experiment_name = get_request_param("experiment_name")
-    store_exp = _get_tracking_store().get_experiment_by_name(experiment_name)
-    if store_exp is None:
+    experiment_id = experiment_name_cache.get_id(experiment_name)
+    if experiment_id is None:
         # experiment is not exist, need return all permissions
         return get_permission("MANAGE")
     username = get_username()
-    return effective_experiment_permission(store_exp.experiment_id, username).permission
+    return effective_experiment_permission(experiment_id, username).permission
+
+
+def _can_read_experiments(experiment_ids: Iterable) -> bool:
+    # one batched permission lookup, however many experiments a search spans
+    experiment_ids = list(dict.fromkeys(str(experiment_id) for experiment_id in experiment_ids))
+    if not experiment_ids:
+        return True
+    permissions = effective_experiment_permissions(experiment_ids, get_username())
+    return all(permissions[experiment_id].permission.can_read for experiment_id in experiment_ids)
 
 
 _EXPERIMENT_ID_PATTERN = re.compile(r"^(\d+)/")
@@ -51,6 +69,21 @@ def validate_can_read_experiment_by_name():
     return _get_permission_from_experiment_name().can_read
 
 
+def validate_can_read_experiments():
+    """Searches over the experiments in experiment_ids, e.g. SearchRuns: all of them must be readable."""
+    return _can_read_experiments(get_request_param_list("experiment_ids"))
+
+
+def validate_can_read_trace_locations():
+    """SearchTracesV3: all experiments among the trace locations must be readable."""
+    locations = get_optional_request_param("locations") or []
+    return _can_read_experiments(
+        location["mlflow_experiment"]["experiment_id"]
+        for location in locations
+        if isinstance(location, dict) and "experiment_id" in (location.get("mlflow_experiment") or {})
+    )
+
+
 def validate_can_update_experiment():
     return _get_permission_from_experiment_id().can_update
 
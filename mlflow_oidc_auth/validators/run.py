@@ -1,25 +1,56 @@
-from mlflow.server.handlers import _get_tracking_store
+from typing import List
 
+from mlflow.exceptions import MlflowException
+from mlflow.protos.databricks_pb2 import RESOURCE_DOES_NOT_EXIST
+
+from mlflow_oidc_auth.permission_cache import run_write_leases
 from mlflow_oidc_auth.permissions import Permission
-from mlflow_oidc_auth.utils import effective_experiment_permission, get_request_param, get_username
+from mlflow_oidc_auth.tracking_cache import run_experiment_cache
+from mlflow_oidc_auth.utils import (
+    effective_experiment_permission,
+    effective_experiment_permissions,
+    get_request_param,
+    get_request_param_list,
+    get_username,
+)
 
 
 def _get_permission_from_run_id() -> Permission:
     # run permissions inherit from parent resource (experiment)
     # so we just get the experiment permission
     run_id = get_request_param("run_id")
-    run = _get_tracking_store().get_run(run_id)
-    experiment_id = run.info.experiment_id
+    experiment_id = run_experiment_cache.get_experiment_id(run_id)
     username = get_username()
     return effective_experiment_permission(experiment_id, username).permission
 
 
+def _get_permissions_from_run_ids() -> List[Permission]:
+    # get-history-bulk repeats run_id, GetMetricHistoryBulkInterval repeats run_ids
+    run_ids = get_request_param_list("run_ids") or get_request_param_list("run_id")
+    # one query for the runs not cached yet, one permission check per distinct experiment
+    experiment_ids = run_experiment_cache.get_experiment_ids(run_ids)
+    for run_id in run_ids:
+        if run_id not in experiment_ids:
+            raise MlflowException(f"Run with id={run_id} not found", RESOURCE_DOES_NOT_EXIST)
+    permissions = effective_experiment_permissions(list(dict.fromkeys(experiment_ids.values())), get_username())
+    return [result.permission for result in permissions.values()]
+
+
 def validate_can_read_run():
     return _get_permission_from_run_id().can_read
 
 
 def validate_can_update_run():
-    return _get_permission_from_run_id().can_update
+    # LogMetric, LogBatch, SetTag, ... come in bursts from training loops; a granted write holds for the next ones
+    username = get_username()
+    run_id = get_request_param("run_id")
+    if run_write_leases.holds(username, run_id):
+        return True
+    version = run_write_leases.current_version()
+    can_update = _get_permission_from_run_id().can_update
+    if can_update:
+        run_write_leases.grant(username, run_id, version)
+    return can_update
 
 
 def validate_can_delete_run():
@@ -28,3 +59,7 @@ def validate_can_delete_run():
 
 def validate_can_manage_run():
     return _get_permission_from_run_id().can_manage
+
+
+def validate_can_read_runs():
+    return all(permission.can_read for permission in _get_permissions_from_run_ids())
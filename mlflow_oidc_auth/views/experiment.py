@@ -57,7 +57,7 @@ def list_experiments():
     if get_is_admin():
         list_experiments = _get_tracking_store().search_experiments()
     else:
-        current_user = store.get_user(get_username())
+        current_user = store.get_user_identity(get_username())
         list_experiments = []
         for experiment in _get_tracking_store().search_experiments():
             if can_manage_experiment(experiment.experiment_id, current_user.username):
@@ -77,7 +77,7 @@ def list_experiments():
 def get_experiment_users(experiment_id: str):
     experiment_id = str(experiment_id)
     if not get_is_admin():
-        current_user = store.get_user(get_username())
+        current_user = store.get_user_identity(get_username())
         if not can_manage_experiment(experiment_id, current_user.username):
             return make_forbidden_response()
     list_users = store.list_users(all=True)
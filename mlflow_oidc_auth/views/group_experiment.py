@@ -1,7 +1,8 @@
 from flask import jsonify
-from mlflow.server.handlers import _get_tracking_store, catch_mlflow_exception
+from mlflow.server.handlers import catch_mlflow_exception
 
 from mlflow_oidc_auth.store import store
+from mlflow_oidc_auth.tracking_cache import experiment_name_cache
 from mlflow_oidc_auth.utils import (
     can_manage_experiment,
     check_experiment_permission,
@@ -35,23 +36,24 @@ def delete_group_experiment_permission(group_name: str, experiment_id: str):
 @catch_mlflow_exception
 def list_group_experiments(group_name: str):
     experiments = store.get_group_experiments(group_name)
+    names = experiment_name_cache.get_names(experiment.experiment_id for experiment in experiments)
     if get_is_admin():
         return jsonify(
             [
                 {
                     "id": experiment.experiment_id,
-                    "name": _get_tracking_store().get_experiment(experiment.experiment_id).name,
+                    "name": names.get(experiment.experiment_id),
                     "permission": experiment.permission,
                 }
                 for experiment in experiments
             ]
         )
-    current_user = store.get_user(get_username())
+    current_user = store.get_user_identity(get_username())
     return jsonify(
         [
             {
                 "id": experiment.experiment_id,
-                "name": _get_tracking_store().get_experiment(experiment.experiment_id).name,
+                "name": names.get(experiment.experiment_id),
                 "permission": experiment.permission,
             }
             for experiment in experiments
@@ -45,7 +45,7 @@ def get_group_prompts(group_name: str):
                 for model in models
             ]
         )
-    current_user = store.get_user(get_username())
+    current_user = store.get_user_identity(get_username())
     return jsonify(
         [
             {
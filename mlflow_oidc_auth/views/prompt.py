@@ -51,7 +51,7 @@ def list_prompts():
     if get_is_admin():
         prompts = fetch_all_prompts()
     else:
-        current_user = store.get_user(get_username())
+        current_user = store.get_user_identity(get_username())
         prompts = []
         for model in fetch_all_prompts():
             if can_manage_registered_model(model.name, current_user.username):
@@ -71,7 +71,7 @@ def list_prompts():
 @catch_mlflow_exception
 def get_prompt_users(prompt_name):
     if not get_is_admin():
-        current_user = store.get_user(get_username())
+        current_user = store.get_user_identity(get_username())
         if not can_manage_registered_model(prompt_name, current_user.username):
             return make_forbidden_response()
     list_users = store.list_users(all=True)
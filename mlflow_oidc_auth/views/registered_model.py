@@ -55,7 +55,7 @@ def list_registered_models():
     if get_is_admin():
         registered_models = fetch_all_registered_models()
     else:
-        current_user = store.get_user(get_username())
+        current_user = store.get_user_identity(get_username())
         registered_models = []
         for model in fetch_all_registered_models():
             if can_manage_registered_model(model.name, current_user.username):
@@ -75,7 +75,7 @@ def list_registered_models():
 @catch_mlflow_exception
 def get_registered_model_users(name: str):
     if not get_is_admin():
-        current_user = store.get_user(get_username())
+        current_user = store.get_user_identity(get_username())
         if not can_manage_registered_model(name, current_user.username):
             return make_forbidden_response()
     list_users = store.list_users(all=True)
@@ -4,12 +4,13 @@ from flask import jsonify
 from mlflow.server.handlers import _get_model_registry_store, _get_tracking_store, catch_mlflow_exception
 
 from mlflow_oidc_auth.permissions import NO_PERMISSIONS
+from mlflow_oidc_auth.repository.user_api_key import DEFAULT_API_KEY_NAME
 from mlflow_oidc_auth.store import store
 from mlflow_oidc_auth.user import create_user, generate_token
 from mlflow_oidc_auth.utils import (
-    effective_experiment_permission,
-    effective_prompt_permission,
-    effective_registered_model_permission,
+    effective_experiment_permissions,
+    effective_prompt_permissions,
+    effective_registered_model_permissions,
     fetch_all_registered_models,
     fetch_all_prompts,
     get_is_admin,
@@ -62,12 +63,28 @@ def create_user_access_token():
             return jsonify({"message": "Expiration date must be less than 1 year in the future"}), 400
     else:
         expiration = None
-    user = store.get_user(username)
+    name = get_optional_request_param("name") or DEFAULT_API_KEY_NAME
+    user = store.get_user_identity(username)
     if user is None:
         return jsonify({"message": f"User {username} not found"}), 404
-    new_token = generate_token()
-    store.update_user(username=username, password=new_token, password_expiration=expiration)
-    return jsonify({"token": new_token, "message": f"Token for {username} has been created"})
+    api_key, new_token = store.create_user_api_key(username, name, expiration)
+    # tokens issued before API keys were stored as the password, rotating retires them
+    store.update_user(username=username, password=generate_token())
+    return jsonify({"token": new_token, "name": api_key.name, "message": f"Token for {username} has been created"})
+
+
+@catch_mlflow_exception
+def list_user_access_tokens():
+    username = get_request_param("username")
+    return jsonify({"tokens": [api_key.to_json() for api_key in store.list_user_api_keys(username)]})
+
+
+@catch_mlflow_exception
+def delete_user_access_token():
+    username = get_request_param("username")
+    name = get_request_param("name")
+    store.delete_user_api_key(username, name)
+    return jsonify({"message": f"Token {name} for {username} has been deleted"})
 
 
 @catch_mlflow_exception
@@ -77,33 +94,41 @@ def update_username_password():
     return jsonify({"token": new_password})
 
 
-# TODO: move filtering logic to store
+def _listed_permissions(names, username, current_username, is_admin, effective_permissions):
+    """
+    Resolve the permissions of ``username`` on the named resources and keep the resources the caller may see:
+    all of them for admins, the readable ones for the user themselves, the manageable ones otherwise.
+    """
+    permissions = effective_permissions(names, username)
+    if is_admin:
+        return permissions
+    if username == current_username:
+        return {name: perm for name, perm in permissions.items() if perm.permission.name != NO_PERMISSIONS.name}
+    current_user_permissions = effective_permissions(names, current_username)
+    return {name: perm for name, perm in permissions.items() if current_user_permissions[name].permission.can_manage}
+
+
 @catch_mlflow_exception
 def list_user_experiments(username):
-    current_user = store.get_user(get_username())
+    current_user = store.get_user_identity(get_username())
     all_experiments = _get_tracking_store().search_experiments()
-    is_admin = get_is_admin()
-
-    if is_admin:
-        list_experiments = all_experiments
-    else:
-        if username == current_user.username:
-            list_experiments = [
-                exp for exp in all_experiments if effective_experiment_permission(exp.experiment_id, username).permission.name != NO_PERMISSIONS.name
-            ]
-        else:
-            list_experiments = [
-                exp for exp in all_experiments if effective_experiment_permission(exp.experiment_id, current_user.username).permission.can_manage
-            ]
-
+    experiment_names = {exp.experiment_id: exp.name for exp in all_experiments}
+    permissions = _listed_permissions(
+        list(experiment_names),
+        username,
+        current_user.username,
+        get_is_admin(),
+        lambda ids, user: effective_experiment_permissions(ids, user, experiment_names),
+    )
     experiments_list = [
         {
-            "name": _get_tracking_store().get_experiment(exp.experiment_id).name,
+            "name": exp.name,
             "id": exp.experiment_id,
-            "permission": (perm := effective_experiment_permission(exp.experiment_id, username)).permission.name,
+            "permission": (perm := permissions[exp.experiment_id]).permission.name,
             "type": perm.type,
         }
-        for exp in list_experiments
+        for exp in all_experiments
+        if exp.experiment_id in permissions
     ]
     return experiments_list
 
@@ -111,26 +136,18 @@ def list_user_experiments(username):
 @catch_mlflow_exception
 def list_user_models(username):
     all_registered_models = fetch_all_registered_models()
-    current_user = store.get_user(get_username())
-    is_admin = get_is_admin()
-    if is_admin:
-        list_registered_models = all_registered_models
-    else:
-        if username == current_user.username:
-            list_registered_models = [
-                model for model in all_registered_models if effective_registered_model_permission(model.name, username).permission.name != NO_PERMISSIONS.name
-            ]
-        else:
-            list_registered_models = [
-                model for model in all_registered_models if effective_registered_model_permission(model.name, current_user.username).permission.can_manage
-            ]
+    current_user = store.get_user_identity(get_username())
+    permissions = _listed_permissions(
+        [model.name for model in all_registered_models], username, current_user.username, get_is_admin(), effective_registered_model_permissions
+    )
     models = [
         {
             "name": model.name,
-            "permission": (perm := effective_registered_model_permission(model.name, username)).permission.name,
+            "permission": (perm := permissions[model.name]).permission.name,
             "type": perm.type,
         }
-        for model in list_registered_models
+        for model in all_registered_models
+        if model.name in permissions
     ]
     return models
 
@@ -138,26 +155,18 @@ def list_user_models(username):
 @catch_mlflow_exception
 def list_user_prompts(username):
     all_registered_models = fetch_all_prompts()
-    current_user = store.get_user(get_username())
-    is_admin = get_is_admin()
-    if is_admin:
-        list_registered_models = all_registered_models
-    else:
-        if username == current_user.username:
-            list_registered_models = [
-                model for model in all_registered_models if effective_prompt_permission(model.name, username).permission.name != NO_PERMISSIONS.name
-            ]
-        else:
-            list_registered_models = [
-                model for model in all_registered_models if effective_prompt_permission(model.name, current_user.username).permission.can_manage
-            ]
+    current_user = store.get_user_identity(get_username())
+    permissions = _listed_permissions(
+        [model.name for model in all_registered_models], username, current_user.username, get_is_admin(), effective_prompt_permissions
+    )
     models = [
         {
             "name": model.name,
-            "permission": (perm := effective_prompt_permission(model.name, username)).permission.name,
+            "permission": (perm := permissions[model.name]).permission.name,
             "type": perm.type,
         }
-        for model in list_registered_models
+        for model in all_registered_models
+        if model.name in permissions
     ]
     return models
 
@@ -0,0 +1,72 @@
+"""
+Compare the before request hook's dispatch by request path (prefix scans and a
+validator table keyed on the path) with the dispatch by matched URL rule.
+
+Only the dispatch is timed: finding out whether the route is unprotected and
+which validator applies, for a mix of MLflow, plugin and artifact proxy
+requests. The table also shows how many of the requests each dispatch finds a
+validator for; requests to parameterized routes never match by path. Run with::
+
+    python scripts/benchmarks/hook_dispatch.py
+"""
+
+import os
+import tempfile
+import timeit
+
+LOOKUPS = 100000
+
+REQUESTS = [
+    ("/api/2.0/mlflow/runs/log-metric", "POST"),
+    ("/api/2.0/mlflow/runs/log-batch", "POST"),
+    ("/api/2.0/mlflow/runs/get", "GET"),
+    ("/ajax-api/2.0/mlflow/experiments/get", "GET"),
+    ("/api/2.0/mlflow/traces/tr-123/tags", "PATCH"),
+    ("/api/2.0/mlflow/permissions/users/alice/experiments/1", "PATCH"),
+    ("/api/2.0/mlflow/permissions/groups/team/registered-models/model", "DELETE"),
+    ("/api/2.0/mlflow-artifacts/artifacts/1/abc/artifacts/model.pkl", "GET"),
+    ("/ajax-api/2.0/mlflow-artifacts/artifacts/1/abc/artifacts/model.pkl", "PUT"),
+    ("/health", "GET"),
+]
+
+
+def _path_dispatch(request, by_path):
+    path = request.path
+    if path.startswith(("/health", "/login", "/callback", "/oidc/static", "/metrics")):
+        return None
+    return by_path.get((path, request.method)) or path.startswith("/api/2.0/mlflow-artifacts/artifacts/")
+
+
+def _rule_dispatch(request, hook):
+    route = hook._get_route()
+    if hook._is_unprotected_route(route):
+        return None
+    return hook.BEFORE_REQUEST_VALIDATORS.get((route, request.method)) or route in hook.PROXY_ARTIFACT_ROUTES
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    os.environ.setdefault("OIDC_USERS_DB_URI", f"sqlite:///{directory}/auth.db")
+    from flask import request
+
+    import mlflow_oidc_auth.hooks.before_request as hook
+    from mlflow_oidc_auth.app import app
+
+    # what the validator table held before: keys as given, looked up by the concrete path
+    by_path = dict(hook.BEFORE_REQUEST_VALIDATORS)
+
+    print(f"{'request':<72} {'path us':>8} {'rule us':>8} {'path':>5} {'rule':>5}")
+    totals = [0.0, 0.0, 0, 0]
+    for path, method in REQUESTS:
+        with app.test_request_context(path=path, method=method):
+            by_path_found = bool(_path_dispatch(request, by_path))
+            by_rule_found = bool(_rule_dispatch(request, hook))
+            path_us = min(timeit.repeat(lambda: _path_dispatch(request, by_path), number=LOOKUPS, repeat=3)) / LOOKUPS * 1e6
+            rule_us = min(timeit.repeat(lambda: _rule_dispatch(request, hook), number=LOOKUPS, repeat=3)) / LOOKUPS * 1e6
+        totals = [totals[0] + path_us, totals[1] + rule_us, totals[2] + by_path_found, totals[3] + by_rule_found]
+        print(f"{method + ' ' + path:<72} {path_us:>8.3f} {rule_us:>8.3f} {by_path_found!s:>5} {by_rule_found!s:>5}")
+    print(f"{'mean / requests with a validator':<72} {totals[0] / len(REQUESTS):>8.3f} {totals[1] / len(REQUESTS):>8.3f} {totals[2]:>5} {totals[3]:>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compare the prefix-indexed regex rule matcher with a linear scan of all
+pre-compiled rules.
+
+Rules look like the ones used in practice (``^team-17/.*``, ``prod-17-.*``) plus
+a few catch-all patterns without a literal prefix. Run with::
+
+    python scripts/benchmarks/regex_rules.py
+"""
+
+import random
+import timeit
+from types import SimpleNamespace
+
+from mlflow_oidc_auth.regex_rules import RegexRuleSet
+
+SIZES = (10, 100, 1000, 10000)
+LOOKUPS = 500
+
+
+def _rules(count: int):
+    rules = [
+        SimpleNamespace(regex=r".*-sandbox$", priority=count, permission="READ"),
+        SimpleNamespace(regex=r"[a-z]+-tmp-.*", priority=count + 1, permission="READ"),
+    ]
+    for i in range(count - len(rules)):
+        regex = f"^team-{i}/.*" if i % 2 else f"prod-{i}-.*"
+        rules.append(SimpleNamespace(regex=regex, priority=i, permission="EDIT"))
+    return rules
+
+
+def _names(count: int):
+    rng = random.Random(count)
+    names = []
+    for _ in range(LOOKUPS):
+        i = rng.randrange(count)
+        names.append(rng.choice([f"team-{i}/model", f"prod-{i}-model", f"unknown-{i}"]))
+    return names
+
+
+def _linear_match(rules, name):
+    for rule in rules:
+        if rule.pattern.match(name):
+            return rule
+    return None
+
+
+def main():
+    print(f"{'patterns':>8} {'linear us/lookup':>18} {'indexed us/lookup':>18} {'speedup':>8}")
+    for size in SIZES:
+        rule_set = RegexRuleSet.compile(_rules(size))
+        rules = rule_set.rules
+        names = _names(size)
+        for name in names:
+            expected = _linear_match(rules, name)
+            actual = rule_set.match(name)
+            assert (expected and expected.regex) == (actual and actual.regex), name
+        linear = min(timeit.repeat(lambda: [_linear_match(rules, name) for name in names], number=1, repeat=3)) / LOOKUPS * 1e6
+        indexed = min(timeit.repeat(lambda: [rule_set.match(name) for name in names], number=1, repeat=3)) / LOOKUPS * 1e6
+        print(f"{size:>8} {linear:>18.2f} {indexed:>18.2f} {linear / indexed:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Authorize a logging storm: 64 worker processes, each sending LogMetric requests
+for its own run, against a local SQLite tracking store and a SQLite user database.
+
+Each worker runs the authorization the before request hook does for a LogMetric
+request: poll for permission changes, then ``validate_can_update_run``. Three
+configurations are compared:
+
+* uncached: no run experiment cache, no permission decision cache, no leases
+* decisions: run experiment and permission decision caches, no leases
+* leases: all of the above plus run write leases (the default)
+
+Run with::
+
+    python scripts/benchmarks/run_write_leases.py [--workers 64] [--requests 2000]
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+EXPERIMENT_NAME = "logging-storm"
+USERNAME = "trainer"
+LOG_METRIC = "/api/2.0/mlflow/runs/log-metric"
+
+MODES = {
+    "uncached": {"OIDC_RUN_EXPERIMENT_CACHE_SIZE": "0", "OIDC_PERMISSION_CACHE_SIZE": "0", "OIDC_RUN_WRITE_LEASE_SIZE": "0"},
+    "decisions": {"OIDC_RUN_WRITE_LEASE_SIZE": "0"},
+    "leases": {},
+}
+
+
+def _environment(directory: str, mode: str):
+    return {
+        "MLFLOW_TRACKING_URI": f"sqlite:///{directory}/mlflow.db",
+        "_MLFLOW_SERVER_FILE_STORE": f"sqlite:///{directory}/mlflow.db",
+        "_MLFLOW_SERVER_ARTIFACT_ROOT": f"{directory}/artifacts",
+        "OIDC_USERS_DB_URI": f"sqlite:///{directory}/auth.db",
+        "OIDC_PERMISSION_POLL_INTERVAL_MS": "1000",
+        **MODES[mode],
+    }
+
+
+def _setup(directory: str, workers: int):
+    """Create the experiment, one run per worker and the user; returns the run ids."""
+    os.environ.update(_environment(directory, "leases"))
+    from mlflow.server.handlers import _get_tracking_store
+
+    from mlflow_oidc_auth.store import store
+
+    tracking_store = _get_tracking_store()
+    experiment_id = tracking_store.create_experiment(EXPERIMENT_NAME)
+    run_ids = [tracking_store.create_run(experiment_id, USERNAME, 0, [], f"run-{i}").info.run_id for i in range(workers)]
+    store.create_user(USERNAME, "password", "Trainer")
+    store.create_experiment_permission(experiment_id, USERNAME, "EDIT")
+    return run_ids
+
+
+def _worker(directory: str, mode: str, run_id: str, requests: int, start, results) -> None:
+    os.environ.update(_environment(directory, mode))
+    from mlflow.server import app
+
+    from mlflow_oidc_auth.auth_context import AuthContext, set_auth_context
+    from mlflow_oidc_auth.hooks.before_request import BEFORE_REQUEST_VALIDATORS
+    from mlflow_oidc_auth.store import store
+
+    validator = BEFORE_REQUEST_VALIDATORS[(LOG_METRIC, "POST")]
+    start.wait()
+    began = time.process_time()
+    for step in range(requests):
+        body = {"run_id": run_id, "key": "loss", "value": 1.0 / (step + 1), "timestamp": 0, "step": step}
+        with app.test_request_context(path=LOG_METRIC, method="POST", json=body):
+            store.poll_permission_changes()
+            set_auth_context(AuthContext(username=USERNAME))
+            assert validator()
+    results.put(time.process_time() - began)
+
+
+def _storm(directory: str, mode: str, run_ids, requests: int):
+    context = multiprocessing.get_context("spawn")
+    start, results = context.Barrier(len(run_ids) + 1), context.Queue()
+    processes = [context.Process(target=_worker, args=(directory, mode, run_id, requests, start, results)) for run_id in run_ids]
+    for process in processes:
+        process.start()
+    start.wait()
+    began = time.perf_counter()
+    durations = [results.get() for _ in processes]
+    wall = time.perf_counter() - began
+    for process in processes:
+        process.join()
+    return wall, sum(durations) / len(durations) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=2000, help="LogMetric requests per worker")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        run_ids = _setup(directory, args.workers)
+        print(f"{args.workers} workers x {args.requests} LogMetric requests")
+        print(f"{'mode':>10} {'wall s':>8} {'requests/s':>11} {'CPU us/request':>15}")
+        for mode in MODES:
+            wall, per_request = _storm(directory, mode, run_ids, args.requests)
+            print(f"{mode:>10} {wall:>8.2f} {args.workers * args.requests / wall:>11.0f} {per_request:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()